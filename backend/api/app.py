@@ -1,17 +1,14 @@
 import sys
 import os
+import hmac
 import warnings
 import logging
 from datetime import datetime
-# 1. Import the warning class FIRST
-from sklearn.exceptions import UndefinedMetricWarning
-# 2. THEN configure the warnings filter
-warnings.filterwarnings("ignore", category=UndefinedMetricWarning)
+# Silence sklearn's UndefinedMetricWarning without importing sklearn at startup
+warnings.filterwarnings("ignore", category=UserWarning, module=r"sklearn\.metrics")
 
 from dotenv import load_dotenv
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
@@ -25,15 +22,44 @@ sys.path.append(os.path.dirname(current_dir))
 sys.path.append(current_dir) # Also add the current directory
 
 # --- Import Flask and other components ---
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 from config import Config
 from app_config import config as app_config
 from utils.predictor import WeatherPredictor
+from utils.history_store import HistoryStore
+from utils.observation_store import ObservationStore
+from utils.weather_client import WeatherClient
+from utils.rate_limit import AdmissionControl, RateLimiter, make_bucket_store
+from utils.subscriptions import HEARTBEAT, TOO_SLOW, SubscriptionHub
+from utils.response_encoding import OrjsonProvider, encode_response, gzip_response, orjson
+from utils.metrics import REGISTRY, HTTP_LATENCY, HTTP_REQUESTS, CallbackGauge, now
+from utils.logging_config import configure_logging
+
+# Configure logging
+configure_logging(
+    level=Config.LOG_LEVEL,
+    fmt=Config.LOG_FORMAT,
+    async_mode=Config.LOG_ASYNC,
+    sample_rate=Config.LOG_SAMPLE_RATE,
+    queue_size=Config.LOG_QUEUE_SIZE
+)
+
+# WSGI environ keys set by the ASGI entry point (asgi.py), which fetches
+# upstream weather on its event loop before handing the request to Flask
+PREFETCHED_WEATHER = 'weather_api.prefetched_weather'
+REQUEST_STARTED = 'weather_api.request_started'
+# The ASGI layer's admission decision (None or a Rejection), taken before prefetching
+ADMISSION = 'weather_api.admission'
+# The event loop asgi.py streams /forecast/stream from, and the subscription the route hands back to it
+STREAM_LOOP = 'weather_api.stream_loop'
+STREAM_SUBSCRIPTION = 'weather_api.stream_subscription'
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
+if app.config['FAST_JSON'] and orjson is not None:
+    app.json = OrjsonProvider(app)
 
 # Load API key from environment variables as a fallback
 app.config['OPENWEATHER_API_KEY'] = os.getenv('OPENWEATHER_API_KEY', app.config.get('OPENWEATHER_API_KEY'))
@@ -48,11 +74,135 @@ CORS(app, origins=[
 # Initialize predictor
 predictor = None
 try:
-    predictor = WeatherPredictor(app.config['MODEL_PATH'])
+    predictor = WeatherPredictor(
+        app.config['MODEL_PATH'],
+        fast_scaling=app.config['FAST_SCALING'],
+        verify_scaling=app.config['VERIFY_SCALING'],
+        inference_mode=app.config['INFERENCE_MODE'],
+        booster_pool_size=app.config['BOOSTER_POOL_SIZE'],
+        booster_nthread=app.config['BOOSTER_NTHREAD'],
+        numpy_trees_max_rows=app.config['NUMPY_TREES_MAX_ROWS'],
+        weather_cache_ttl=app.config['WEATHER_CACHE_TTL'],
+        weather_cache_size=app.config['WEATHER_CACHE_SIZE'],
+        weather_cache_negative_ttl=app.config['WEATHER_CACHE_NEGATIVE_TTL'],
+        weather_client=WeatherClient(
+            base_url=app.config['OPENWEATHER_BASE_URL'],
+            timeout=app.config['WEATHER_HTTP_TIMEOUT'],
+            pool_size=app.config['WEATHER_HTTP_POOL_SIZE'],
+            max_retries=app.config['WEATHER_HTTP_RETRIES'],
+            failure_threshold=app.config['WEATHER_CIRCUIT_THRESHOLD'],
+            reset_timeout=app.config['WEATHER_CIRCUIT_RESET'],
+            max_inflight=app.config['WEATHER_MAX_INFLIGHT']
+        ),
+        fanout_concurrency=app.config['MULTI_CITY_CONCURRENCY'],
+        enable_lstm=app.config['ENABLE_LSTM'],
+        history_store=HistoryStore(
+            path=app.config['HISTORY_STORE_PATH'] or None,
+            capacity=app.config['HISTORY_CAPACITY'],
+            min_interval=app.config['HISTORY_INTERVAL']
+        ),
+        prediction_cache_size=app.config['PREDICTION_CACHE_SIZE'],
+        prediction_cache_precision=app.config['PREDICTION_CACHE_PRECISION'],
+        model_watch_interval=app.config['MODEL_WATCH_INTERVAL'],
+        observation_store=ObservationStore(
+            app.config['OBSERVATION_STORE_PATH'],
+            max_entries=app.config['OBSERVATION_STORE_SIZE'],
+            compact_interval=app.config['OBSERVATION_COMPACT_INTERVAL']
+        ) if app.config['OBSERVATION_STORE_PATH'] else None
+    )
     logger.info("✅ Weather models loaded successfully")
 except Exception as e:
     logger.error(f"❌ Could not load models: {e}")
 
+# Rate limits and load shedding, checked before every request
+admission = AdmissionControl(
+    limiter=RateLimiter(
+        store=make_bucket_store(app.config['RATE_LIMIT_STORE'], app.config['RATE_LIMIT_STORE_PATH']),
+        client_rate=app.config['RATE_LIMIT_CLIENT_RATE'],
+        client_burst=app.config['RATE_LIMIT_CLIENT_BURST'],
+        global_rate=app.config['RATE_LIMIT_GLOBAL_RATE'],
+        global_burst=app.config['RATE_LIMIT_GLOBAL_BURST']
+    ),
+    max_inflight=app.config['MAX_INFLIGHT_REQUESTS'],
+    proxy_hops=app.config['RATE_LIMIT_PROXY_HOPS']
+)
+
+# Live forecast streams: one refresher per worker shared by every subscriber
+subscriptions = None
+if predictor:
+    subscriptions = SubscriptionHub(
+        predictor,
+        app.config.get('OPENWEATHER_API_KEY'),
+        interval=app.config['STREAM_INTERVAL'],
+        queue_size=app.config['STREAM_QUEUE_SIZE'],
+        max_dropped=app.config['STREAM_MAX_DROPPED'],
+        max_subscribers=app.config['STREAM_MAX_SUBSCRIBERS'],
+        max_thread_subscribers=app.config['STREAM_THREAD_SUBSCRIBERS']
+    )
+
+def _cache_stats():
+    stats = {}
+    for name, cache in (('weather', predictor.weather_cache), ('prediction', predictor.prediction_cache)):
+        if cache is not None:
+            for stat, value in cache.stats().items():
+                stats[(name, stat)] = value
+    return stats
+
+def _upstream_stats():
+    stats = predictor.weather_client.stats()
+    stats['circuit_open'] = int(stats.pop('circuit_state') != 'closed')
+    return {(stat,): value for stat, value in stats.items()}
+
+if predictor:
+    # Snapshots of the existing stats() counters, read only when /metrics is scraped
+    REGISTRY.register(CallbackGauge('cache_stats', 'Weather and prediction cache counters',
+                                    ('cache', 'stat'), _cache_stats))
+    REGISTRY.register(CallbackGauge('weather_upstream_stats', 'OpenWeatherMap client and circuit breaker counters',
+                                    ('stat',), _upstream_stats))
+    REGISTRY.register(CallbackGauge('model_info', 'Serving model version (always 1)',
+                                    ('version',), lambda: {(predictor.model_version,): 1}))
+    REGISTRY.register(CallbackGauge('stream_stats', 'Forecast stream subscribers and refresher counters',
+                                    ('stat',), lambda: {(k,): v for k, v in subscriptions.stats().items()}))
+
+@app.before_request
+def _start_timer():
+    g.request_started = request.environ.get(REQUEST_STARTED) or now()
+
+@app.before_request
+def _admit():
+    if ADMISSION in request.environ:
+        rejection = request.environ[ADMISSION]
+    else:
+        rejection = admission.admit(request.environ)
+        g.admitted = rejection is None
+    if rejection is not None:
+        return (jsonify({'error': rejection.message, 'retry_after': rejection.retry_after}),
+                rejection.status, {'Retry-After': str(rejection.retry_after)})
+
+@app.teardown_request
+def _leave(exc):
+    if g.pop('admitted', False):
+        admission.leave()
+
+@app.after_request
+def _record_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_LATENCY.labels(route, request.method).observe(now() - started)
+        HTTP_REQUESTS.labels(route, request.method, str(response.status_code)).inc()
+    return response
+
+@app.after_request
+def _compress(response):
+    if app.config['GZIP_MIN_SIZE'] > 0:
+        gzip_response(response, request.accept_encodings, app.config['GZIP_MIN_SIZE'], app.config['GZIP_LEVEL'])
+    return response
+
+def _respond(payload):
+    """A successful result as JSON, or as MessagePack (arrays as columns) when the client asks for it"""
+    return encode_response(payload, request.accept_mimetypes, app.response_class, jsonify)
+
 # --- API Routes ---
 
 @app.route('/')
@@ -64,8 +214,16 @@ def home():
         'version': '1.0',
         'endpoints': {
             'predict': '/predict (POST)',
+            'predict_batch': '/predict/batch (POST)',
+            'forecast': '/forecast (POST)',
             'current_weather': '/current-weather/<city> (GET)',
-            'health': '/health (GET)'
+            'current_weather_by_coords': '/current-weather/by-coords?lat=<lat>&lon=<lon> (GET)',
+            'forecast_multi': '/forecast/multi?cities=<city1,city2,...> (GET)',
+            'forecast_stream': '/forecast/stream?cities=<city1,city2,...> (GET, text/event-stream)',
+            'health': '/health (GET)',
+            'metrics': '/metrics (GET)',
+            'admin_models': '/admin/models (GET)',
+            'admin_reload': '/admin/reload (POST)'
         },
         'api_key_configured': bool(app.config.get('OPENWEATHER_API_KEY'))
     })
@@ -76,15 +234,28 @@ def health_check():
     return jsonify({
         'status': 'healthy' if predictor else 'degraded',
         'models_loaded': predictor is not None,
+        'models_available': predictor.available_models if predictor else [],
+        'model_version': predictor.model_version if predictor else None,
         'api_key_configured': bool(app.config.get('OPENWEATHER_API_KEY')),
+        'weather_cache': predictor.weather_cache.stats() if predictor and predictor.weather_cache else None,
+        'weather_upstream': predictor.weather_client.stats() if predictor else None,
+        'prediction_cache': predictor.prediction_cache.stats() if predictor and predictor.prediction_cache else None,
         'timestamp': datetime.utcnow().isoformat() + 'Z'
     })
 
+@app.route('/metrics')
+def metrics():
+    """Request, pipeline-stage, upstream and model metrics in Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """
     Predicts temperature based on provided weather data.
     Expects JSON with 'temperature', 'humidity', 'pressure', 'feels_like'.
+    An optional 'model' (body or query string) selects 'xgboost' (default)
+    or 'lstm'; the LSTM also needs a 'sequence' of lookback feature rows,
+    whose last row may leave lag and rolling features to the history of 'city'.
     Returns JSON with prediction results.
     """
     if not predictor:
@@ -115,14 +286,39 @@ def predict():
                 logger.warning(f"Invalid type for optional field {field}: {type(data[field])}")
                 return jsonify({'error': f'Invalid type for {field}. Must be a number (int or float).'}), 400
 
-        # Optional lag fields with defaults based on current temp
-        temp_lag1 = data.get('temperature_lag1', data['temperature'] - 0.5)
-        temp_lag2 = data.get('temperature_lag2', data['temperature'] - 1.0)
+        model = str(data.get('model', request.args.get('model', 'xgboost'))).lower()
+        if model not in predictor.available_models:
+            logger.warning(f"Prediction requested for unavailable model: {model}")
+            return jsonify({
+                'error': f"Model '{model}' is not available.",
+                'available_models': predictor.available_models
+            }), 400
+
+        if model == 'lstm':
+            if 'sequence' not in data:
+                return jsonify({'error': 'Missing required field for LSTM model: sequence'}), 400
+            try:
+                city = data.get('city') if isinstance(data.get('city'), str) else None
+                sequence = predictor.create_sequence(data['sequence'], city)
+            except ValueError as e:
+                return jsonify({'error': 'Invalid sequence.', 'message': str(e)}), 400
+
+            result = predictor.predict_sequence(data['temperature'], data['feels_like'], sequence)
+            if 'error' in result:
+                logger.error(f"LSTM prediction error: {result['error']}")
+                return jsonify(result), 500
+            return _respond(result)
+
+        # Optional lag fields; the predictor fills missing ones from the city's
+        # history (when 'city' is given) or from the current temperature
+        temp_lag1 = data.get('temperature_lag1')
+        temp_lag2 = data.get('temperature_lag2')
+        city = data.get('city') if isinstance(data.get('city'), str) else None
         wind_speed = data.get('wind_speed')
         visibility = data.get('visibility')
 
-        logger.info(f"Processing prediction request: temp={data['temperature']}, "
-                    f"humidity={data['humidity']}, pressure={data['pressure']}")
+        logger.info("Processing prediction request: temp=%s, humidity=%s, pressure=%s",
+                    data['temperature'], data['humidity'], data['pressure'])
 
         # Call the predictor method
         result = predictor.predict_temperature(
@@ -133,7 +329,9 @@ def predict():
             temp_lag1=temp_lag1,
             temp_lag2=temp_lag2,
             wind_speed=wind_speed,
-            visibility=visibility
+            visibility=visibility,
+            city=city,
+            validated=True  # field types checked above
         )
 
         # Check if predictor returned an error object
@@ -141,8 +339,8 @@ def predict():
             logger.error(f"Prediction model error: {result['error']}")
             return jsonify(result), 500
 
-        logger.info(f"Prediction successful: {result.get('predicted_temperature', 'N/A')}°C")
-        return jsonify(result)
+        logger.info("Prediction successful: %s°C", result.get('predicted_temperature', 'N/A'))
+        return _respond(result)
 
     except Exception as e:
         logger.exception("Unexpected error during prediction")
@@ -151,6 +349,141 @@ def predict():
             'message': str(e)
         }), 500
 
+def _batch_observations(data, allow_single=False):
+    """(observations, row count, None) from a batch request body, or (None, None, error response)"""
+    if isinstance(data, list):
+        observations = data
+    elif 'observations' in data:
+        observations = data['observations']
+    elif 'columns' in data:
+        observations = data['columns']
+    elif allow_single and 'temperature' in data:
+        observations = [data]
+    else:
+        return None, None, (jsonify({'error': "Request body must contain 'observations' or 'columns'."}), 400)
+
+    if not isinstance(observations, (list, dict)) or not observations:
+        return None, None, (jsonify({
+            'error': 'Batch must be a non-empty list of observations or dict of columns.'}), 400)
+
+    batch_size = len(observations) if isinstance(observations, list) else \
+        max((len(v) for v in observations.values() if isinstance(v, list)), default=0)
+    max_batch_size = app.config['MAX_BATCH_SIZE']
+    if batch_size > max_batch_size:
+        logger.warning(f"Batch of {batch_size} rows exceeds limit of {max_batch_size}")
+        return None, None, (jsonify({'error': f'Batch too large. Maximum is {max_batch_size} observations.'}), 413)
+    return observations, batch_size, None
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Predicts temperatures for many observations in a single model call.
+    Expects JSON with either 'observations' (a list of /predict payloads) or
+    'columns' (a dict mapping each field to a list of values).
+    Returns JSON with one result or error per input row.
+    """
+    if not predictor:
+        logger.error("Batch prediction attempt with unloaded models")
+        return jsonify({'error': 'Models not loaded. Service unavailable.'}), 503
+
+    try:
+        data = request.get_json()
+
+        if not data:
+            logger.warning("Empty batch prediction request received")
+            return jsonify({'error': 'No JSON data provided in request body.'}), 400
+
+        observations, batch_size, denied = _batch_observations(data)
+        if denied:
+            return denied
+
+        logger.info("Processing batch prediction request with %d observations", batch_size)
+
+        result = predictor.predict_batch(observations)
+
+        if 'error' in result:
+            logger.error(f"Batch prediction error: {result.get('message', result['error'])}")
+            status = 400 if result['error'] == 'Invalid batch payload' else 500
+            return jsonify(result), status
+
+        return _respond(result)
+
+    except Exception as e:
+        logger.exception("Unexpected error during batch prediction")
+        return jsonify({
+            'error': 'An internal error occurred during batch prediction.',
+            'message': str(e)
+        }), 500
+
+@app.route('/forecast', methods=['POST'])
+def forecast():
+    """
+    Forecasts temperatures several days ahead by feeding each day's
+    prediction back into the model as the next day's lag.
+    Expects JSON with a single /predict payload, 'observations' or 'columns'
+    (as for /predict/batch), and an optional 'horizon' in days (body or
+    query string, default and maximum MAX_FORECAST_HORIZON).
+    Returns JSON with one day-by-day forecast or error per input row.
+    """
+    if not predictor:
+        logger.error("Forecast attempt with unloaded models")
+        return jsonify({'error': 'Models not loaded. Service unavailable.'}), 503
+
+    try:
+        data = request.get_json()
+
+        if not data:
+            logger.warning("Empty forecast request received")
+            return jsonify({'error': 'No JSON data provided in request body.'}), 400
+
+        max_horizon = app.config['MAX_FORECAST_HORIZON']
+        horizon = request.args.get('horizon', max_horizon)
+        if isinstance(data, dict):
+            horizon = data.get('horizon', horizon)
+        # Booleans and fractional numbers are rejected rather than truncated
+        if isinstance(horizon, bool) or (isinstance(horizon, float) and not horizon.is_integer()):
+            horizon = 0
+        try:
+            horizon = int(horizon)
+        except (TypeError, ValueError, OverflowError):
+            horizon = 0
+        if not 1 <= horizon <= max_horizon:
+            return jsonify({'error': f'Horizon must be a whole number of days between 1 and {max_horizon}.'}), 400
+
+        observations, batch_size, denied = _batch_observations(data, allow_single=True)
+        if denied:
+            return denied
+
+        logger.info("Processing %d-day forecast for %d observations", horizon, batch_size)
+
+        result = predictor.forecast(observations, horizon)
+
+        if 'error' in result:
+            logger.error(f"Forecast error: {result.get('message', result['error'])}")
+            status = 400 if result['error'] == 'Invalid forecast payload' else 500
+            return jsonify(result), status
+
+        return _respond(result)
+
+    except Exception as e:
+        logger.exception("Unexpected error during forecast")
+        return jsonify({
+            'error': 'An internal error occurred during forecast.',
+            'message': str(e)
+        }), 500
+
+def _weather_error_response(weather_data):
+    """Map a weather lookup error to its HTTP status"""
+    error_msg = weather_data['error']
+    if "API key" in error_msg:
+        return jsonify(weather_data), 500
+    elif "timed out" in error_msg:
+        return jsonify(weather_data), 504
+    elif "temporarily unavailable" in error_msg:
+        return jsonify(weather_data), 503, {'Retry-After': str(weather_data.get('retry_after', 30))}
+    else:
+        return jsonify(weather_data), 502
+
 @app.route('/current-weather/<city>')
 def current_weather(city):
     """
@@ -170,10 +503,12 @@ def current_weather(city):
         return jsonify({'error': 'Weather service temporarily unavailable.'}), 503
 
     try:
-        logger.info(f"Fetching current weather data for city: {city}")
+        logger.info("Fetching current weather data for city: %s", city)
 
-        # Fetch weather data using the predictor's method
-        weather_data = predictor.get_current_weather(city, api_key)
+        # Fetch weather data using the predictor's method, unless the ASGI layer already did
+        weather_data = request.environ.get(PREFETCHED_WEATHER)
+        if weather_data is None:
+            weather_data = predictor.get_current_weather(city, api_key)
 
         if not weather_data:
             logger.error("Predictor returned no weather data")
@@ -181,19 +516,11 @@ def current_weather(city):
 
         # Check if the predictor's method returned an error object
         if 'error' in weather_data:
-            error_msg = weather_data['error']
-            logger.error(f"Weather API error for {city}: {error_msg}")
-            
-            # Differentiate error types
-            if "API key" in error_msg:
-                return jsonify(weather_data), 500
-            elif "timed out" in error_msg:
-                return jsonify(weather_data), 504
-            else:
-                return jsonify(weather_data), 502
-
-        logger.info(f"Successfully fetched weather data for {city}")
-        return jsonify(weather_data)
+            logger.error(f"Weather API error for {city}: {weather_data['error']}")
+            return _weather_error_response(weather_data)
+
+        logger.info("Successfully fetched weather data for %s", city)
+        return _respond(weather_data)
 
     except Exception as e:
         logger.exception(f"Unexpected error fetching weather for {city}")
@@ -202,6 +529,203 @@ def current_weather(city):
             'message': str(e)
         }), 500
 
+@app.route('/current-weather/by-coords')
+def current_weather_by_coords():
+    """
+    Current weather at a point, given 'lat' and 'lon' query parameters.
+    Answered from a recent observation or the nearest known station within
+    COORDS_RADIUS_KM when there is one, else from OpenWeatherMap. Optional
+    'radius_km' and 'max_age' (seconds) can only tighten the configured limits.
+    """
+    api_key = app.config.get('OPENWEATHER_API_KEY')
+    if not api_key:
+        logger.error("OpenWeatherMap API key is missing")
+        return jsonify({'error': 'OpenWeatherMap API key not configured on the server.'}), 500
+
+    if not predictor:
+        logger.error("Weather fetch attempt with unloaded predictor")
+        return jsonify({'error': 'Weather service temporarily unavailable.'}), 503
+
+    try:
+        lat = request.args.get('lat', type=float)
+        lon = request.args.get('lon', type=float)
+        radius_km = request.args.get('radius_km', app.config['COORDS_RADIUS_KM'], type=float)
+        max_age = request.args.get('max_age', app.config['COORDS_MAX_AGE'], type=float)
+        if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return jsonify({'error': "Query parameters 'lat' (-90..90) and 'lon' (-180..180) are required."}), 400
+        if radius_km is None or max_age is None or radius_km < 0 or max_age < 0:
+            return jsonify({'error': "'radius_km' and 'max_age' must be non-negative numbers."}), 400
+
+        weather_data = predictor.get_weather_by_coords(
+            lat, lon, api_key,
+            radius_km=min(radius_km, app.config['COORDS_RADIUS_KM']),
+            max_age=min(max_age, app.config['COORDS_MAX_AGE']))
+        if 'error' in weather_data:
+            logger.error(f"Weather API error for {lat},{lon}: {weather_data['error']}")
+            return _weather_error_response(weather_data)
+        return _respond(weather_data)
+
+    except Exception as e:
+        logger.exception("Unexpected error fetching weather by coordinates")
+        return jsonify({
+            'error': 'An internal error occurred while fetching weather data.',
+            'message': str(e)
+        }), 500
+
+@app.route('/forecast/multi')
+def forecast_multi():
+    """
+    Fetches current weather for several cities concurrently and predicts
+    temperatures for all of them in one batched model call.
+    Expects a comma-separated 'cities' query parameter.
+    Returns JSON with per-city weather, prediction or error.
+    """
+    api_key = app.config.get('OPENWEATHER_API_KEY')
+    if not api_key:
+        logger.error("OpenWeatherMap API key is missing")
+        return jsonify({
+            'error': 'OpenWeatherMap API key not configured on the server.',
+            'solution': 'Please configure OPENWEATHER_API_KEY in the backend .env file.'
+        }), 500
+
+    if not predictor:
+        logger.error("Multi-city forecast attempt with unloaded predictor")
+        return jsonify({'error': 'Models not loaded. Service unavailable.'}), 503
+
+    cities = [c for c in request.args.get('cities', '').split(',') if c.strip()]
+    if not cities:
+        return jsonify({'error': "Query parameter 'cities' must list at least one city."}), 400
+
+    max_cities = app.config['MAX_MULTI_CITIES']
+    if len(cities) > max_cities:
+        return jsonify({'error': f'Too many cities. Maximum is {max_cities} per request.'}), 400
+
+    try:
+        logger.info("Processing multi-city forecast for %d cities", len(cities))
+        result = predictor.forecast_cities(cities, api_key, prefetched=request.environ.get(PREFETCHED_WEATHER))
+
+        # Partial success is still a success; fail only when every city failed
+        if result['succeeded'] == 0:
+            return jsonify(result), 502
+        return _respond(result)
+
+    except Exception as e:
+        logger.exception("Unexpected error during multi-city forecast")
+        return jsonify({
+            'error': 'An internal error occurred during multi-city forecast.',
+            'message': str(e)
+        }), 500
+
+@app.route('/forecast/stream')
+def forecast_stream():
+    """
+    Server-Sent Events stream of current weather and predictions for several
+    cities. Expects a comma-separated 'cities' query parameter. Sends a
+    'forecast' event (same result shape as /forecast/multi) on connect and
+    after every refresh; a client too slow to keep up gets a 'close' event.
+    """
+    api_key = app.config.get('OPENWEATHER_API_KEY')
+    if not api_key:
+        logger.error("OpenWeatherMap API key is missing")
+        return jsonify({
+            'error': 'OpenWeatherMap API key not configured on the server.',
+            'solution': 'Please configure OPENWEATHER_API_KEY in the backend .env file.'
+        }), 500
+
+    if not predictor:
+        logger.error("Forecast stream attempt with unloaded predictor")
+        return jsonify({'error': 'Models not loaded. Service unavailable.'}), 503
+
+    cities = [c for c in request.args.get('cities', '').split(',') if c.strip()]
+    if not cities:
+        return jsonify({'error': "Query parameter 'cities' must list at least one city."}), 400
+
+    max_cities = app.config['MAX_MULTI_CITIES']
+    if len(cities) > max_cities:
+        return jsonify({'error': f'Too many cities. Maximum is {max_cities} per request.'}), 400
+
+    loop = request.environ.get(STREAM_LOOP)
+    subscription = subscriptions.subscribe(cities, loop=loop)
+    if subscription is None:
+        retry_after = max(1, round(app.config['STREAM_INTERVAL']))
+        return (jsonify({'error': 'Too many open streams. Please retry later.', 'retry_after': retry_after}),
+                503, {'Retry-After': str(retry_after)})
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if loop is not None:
+        # asgi.py streams the events from its event loop instead of holding this thread
+        request.environ[STREAM_SUBSCRIPTION] = subscription
+        return Response(mimetype='text/event-stream', headers=headers)
+    return Response(stream_events(subscription), mimetype='text/event-stream', headers=headers)
+
+def stream_events(subscription):
+    """SSE body for a thread-served stream; unsubscribes when the client goes away"""
+    heartbeat = app.config['STREAM_HEARTBEAT']
+    try:
+        while not subscription.closed:
+            events = subscription.get(heartbeat)
+            yield b''.join(events) if events else HEARTBEAT
+        yield TOO_SLOW
+    finally:
+        subscriptions.unsubscribe(subscription)
+
+def _admin_denied():
+    """Error response unless the request carries the configured admin token"""
+    token = app.config.get('ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        logger.warning("Admin request with invalid token")
+        return jsonify({'error': 'Invalid admin token.'}), 401
+    return None
+
+@app.route('/admin/models')
+def admin_models():
+    """Reports the serving model version and the state of the last reload."""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    if not predictor:
+        return jsonify({'error': 'Models not loaded. Service unavailable.'}), 503
+    return jsonify(predictor.model_info())
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Hot-reloads the models. The new bundle is loaded and warmed up in the
+    background and swapped in atomically; requests in flight finish on the
+    old one. An optional JSON 'model_path' switches to another bundle
+    directory under MODEL_PATH. With ?wait=true the response is sent after
+    the swap (or failure) instead of immediately with 202.
+    This reloads the worker process that receives the request; set
+    MODEL_WATCH_INTERVAL so every worker picks up changed files.
+    """
+    denied = _admin_denied()
+    if denied:
+        return denied
+    if not predictor:
+        return jsonify({'error': 'Models not loaded. Service unavailable.'}), 503
+
+    data = request.get_json(silent=True) or {}
+    model_path = None
+    if data.get('model_path'):
+        root = os.path.realpath(app.config['MODEL_PATH'])
+        model_path = os.path.realpath(os.path.join(root, str(data['model_path'])))
+        if os.path.commonpath([root, model_path]) != root or not os.path.isdir(model_path):
+            return jsonify({'error': 'model_path must be an existing directory under MODEL_PATH.'}), 400
+
+    if request.args.get('wait', 'false').lower() == 'true':
+        try:
+            predictor.reload_models(model_path)
+        except Exception as e:
+            return jsonify({'error': 'Model reload failed', 'message': str(e), **predictor.model_info()}), 500
+        return jsonify(predictor.model_info())
+
+    if not predictor.reload_models_async(model_path):
+        return jsonify({'error': 'A model reload is already in progress.', **predictor.model_info()}), 409
+    logger.info("Model reload started")
+    return jsonify({'status': 'reloading', **predictor.model_info()}), 202
+
 # --- Main Execution ---
 if __name__ == '__main__':
     # Validate configuration and show warnings
@@ -0,0 +1,221 @@
+# asgi.py
+"""ASGI entry point: the same API, with non-blocking upstream weather calls.
+
+Under gunicorn's sync/threaded workers a /current-weather request holds a
+worker thread for the whole OpenWeatherMap call. Here, for
+/current-weather/<city> and /forecast/multi, the weather is fetched on the
+event loop with aiohttp (through the same cache and circuit breaker) and
+handed to the Flask route in the WSGI environ. Every request is then served
+by the unchanged Flask app on a pool of ASGI_THREADS threads, so routes,
+response shapes, CORS and metrics match app.py, and model inference never
+runs on the event loop or more than ASGI_THREADS at a time.
+
+/forecast/stream is validated and subscribed by the Flask route too, but
+its events are then sent from the event loop, so open streams hold no
+thread.
+
+Run from backend/api (needs requirements-asgi.txt):
+  gunicorn asgi:app -k uvicorn.workers.UvicornWorker --config gunicorn.conf.py
+  uvicorn asgi:app --port 5000
+"""
+import asyncio
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import app as flask_api
+from utils.async_weather_client import AsyncWeatherClient
+from utils.metrics import now
+from utils.predictor import normalize_city, unique_cities
+from utils.subscriptions import HEARTBEAT, TOO_SLOW
+
+logger = logging.getLogger(__name__)
+
+CURRENT_WEATHER_PREFIX = '/current-weather/'
+STREAM_PATH = '/forecast/stream'
+
+flask_app = flask_api.app
+config = flask_app.config
+
+# Threads are started on first use, so none exist in a preloading master
+executor = ThreadPoolExecutor(max_workers=config['ASGI_THREADS'], thread_name_prefix='asgi-flask')
+weather_client = None
+if flask_api.predictor:
+    weather_client = AsyncWeatherClient(flask_api.predictor.weather_client, config['ASGI_UPSTREAM_CONNECTIONS'])
+
+
+async def prefetch_weather(scope):
+    """Fetch the upstream weather the Flask route will need, or None for other requests.
+
+    Requests the route would reject (no API key, too many cities) are not
+    prefetched; Flask answers them as usual.
+    """
+    predictor = flask_api.predictor
+    api_key = config.get('OPENWEATHER_API_KEY')
+    if scope['method'] != 'GET' or weather_client is None or not predictor or not api_key:
+        return None
+
+    path = scope['path']
+    if path.startswith(CURRENT_WEATHER_PREFIX):
+        city = path[len(CURRENT_WEATHER_PREFIX):]
+        if city and '/' not in city and city != 'by-coords':
+            return await predictor.get_current_weather_async(city, api_key, weather_client)
+    elif path == '/forecast/multi':
+        query = parse_qs(scope['query_string'].decode('utf-8', 'replace'), keep_blank_values=True)
+        cities = [c for c in query.get('cities', [''])[0].split(',') if c.strip()]
+        if cities and len(cities) <= config['MAX_MULTI_CITIES']:
+            names = unique_cities(cities)
+            # At most MULTI_CITY_CONCURRENCY fetches at a time, like the Flask fan-out
+            limit = asyncio.Semaphore(max(1, config['MULTI_CITY_CONCURRENCY']))
+
+            async def fetch(city):
+                async with limit:
+                    return await predictor.get_current_weather_async(city, api_key, weather_client)
+
+            weather = await asyncio.gather(*(fetch(city) for city in names))
+            return {normalize_city(city): data for city, data in zip(names, weather)}
+    return None
+
+
+def build_environ(scope, body):
+    """PEP 3333 environ for an ASGI HTTP request"""
+    script_name = scope.get('root_path', '')
+    path = scope['path']
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name.encode().decode('latin-1'),
+        'PATH_INFO': path.encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = 'HTTP_' + key
+        value = value.decode('latin-1')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body is already fully read, so describe it by its length: a chunked
+    # request without Content-Length would otherwise reach Flask as empty
+    environ['CONTENT_LENGTH'] = str(len(body))
+    environ.pop('HTTP_TRANSFER_ENCODING', None)
+    return environ
+
+
+def call_flask(environ):
+    """Run one request through the Flask app; returns (status, headers, body)"""
+    response = {}
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+        return chunks.append
+
+    result = flask_app(environ, start_response)
+    try:
+        chunks.extend(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], b''.join(chunks)
+
+
+async def stream_events(subscription, status, headers, receive, send):
+    """Send a subscription's events until the client disconnects or falls too far behind"""
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    headers = [(k, v) for k, v in headers if k != b'content-length']
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    watcher = asyncio.ensure_future(disconnected())
+    heartbeat = config['STREAM_HEARTBEAT']
+    try:
+        while not subscription.closed:
+            waiter = asyncio.ensure_future(subscription.get_async(heartbeat))
+            await asyncio.wait({waiter, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if watcher.done():
+                waiter.cancel()
+                return
+            events = waiter.result()
+            await send({'type': 'http.response.body', 'body': b''.join(events) if events else HEARTBEAT,
+                        'more_body': True})
+        await send({'type': 'http.response.body', 'body': TOO_SLOW})
+    finally:
+        watcher.cancel()
+        flask_api.subscriptions.unsubscribe(subscription)
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if weather_client is not None:
+                await weather_client.close()
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    started = now()
+    environ = build_environ(scope, await read_body(receive))
+    environ[flask_api.REQUEST_STARTED] = started
+    # Admitted here so requests waiting on upstream or for a Flask thread count as in flight;
+    # a rejection is answered by Flask, with the usual CORS headers and metrics
+    rejection = environ[flask_api.ADMISSION] = flask_api.admission.admit(environ)
+    try:
+        if rejection is None:
+            try:
+                prefetched = await prefetch_weather(scope)
+            except Exception:
+                # The Flask route fetches (blocking) and reports errors itself
+                logger.exception("Weather prefetch failed for %s", scope['path'])
+                prefetched = None
+            if prefetched is not None:
+                environ[flask_api.PREFETCHED_WEATHER] = prefetched
+            if scope['path'] == STREAM_PATH:
+                environ[flask_api.STREAM_LOOP] = asyncio.get_running_loop()
+
+        status, headers, body = await asyncio.get_running_loop().run_in_executor(executor, call_flask, environ)
+    finally:
+        if rejection is None:
+            flask_api.admission.leave()
+    # An open stream is not counted as in flight: it holds no thread
+    subscription = environ.get(flask_api.STREAM_SUBSCRIPTION)
+    if subscription is not None:
+        return await stream_events(subscription, status, headers, receive, send)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
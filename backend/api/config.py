@@ -7,4 +7,64 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY')
-    MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'models')
\ No newline at end of file
+    MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'models')
+    MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+    MAX_FORECAST_HORIZON = int(os.environ.get('MAX_FORECAST_HORIZON', 7))
+    FAST_SCALING = os.environ.get('FAST_SCALING', 'true').lower() == 'true'
+    VERIFY_SCALING = os.environ.get('VERIFY_SCALING', 'false').lower() == 'true'
+    INFERENCE_MODE = os.environ.get('INFERENCE_MODE', 'inplace')
+    BOOSTER_POOL_SIZE = int(os.environ.get('BOOSTER_POOL_SIZE', 4))
+    BOOSTER_NTHREAD = int(os.environ.get('BOOSTER_NTHREAD', 1))
+    NUMPY_TREES_MAX_ROWS = int(os.environ.get('NUMPY_TREES_MAX_ROWS', 16))
+    FAST_JSON = os.environ.get('FAST_JSON', 'true').lower() == 'true'
+    GZIP_MIN_SIZE = int(os.environ.get('GZIP_MIN_SIZE', 1024))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 5))
+    WEATHER_CACHE_TTL = int(os.environ.get('WEATHER_CACHE_TTL', 300))
+    WEATHER_CACHE_SIZE = int(os.environ.get('WEATHER_CACHE_SIZE', 1024))
+    WEATHER_CACHE_NEGATIVE_TTL = int(os.environ.get('WEATHER_CACHE_NEGATIVE_TTL', 60))
+    OBSERVATION_STORE_PATH = os.environ.get(
+        'OBSERVATION_STORE_PATH', os.path.join(os.path.dirname(__file__), '..', 'data', 'observations.db'))
+    OBSERVATION_STORE_SIZE = int(os.environ.get('OBSERVATION_STORE_SIZE', 10000))
+    OBSERVATION_COMPACT_INTERVAL = float(os.environ.get('OBSERVATION_COMPACT_INTERVAL', 60))
+    COORDS_RADIUS_KM = float(os.environ.get('COORDS_RADIUS_KM', 25))
+    COORDS_MAX_AGE = float(os.environ.get('COORDS_MAX_AGE', 600))
+    OPENWEATHER_BASE_URL = os.environ.get('OPENWEATHER_BASE_URL', 'http://api.openweathermap.org/data/2.5')
+    WEATHER_HTTP_TIMEOUT = float(os.environ.get('WEATHER_HTTP_TIMEOUT', 10))
+    WEATHER_HTTP_POOL_SIZE = int(os.environ.get('WEATHER_HTTP_POOL_SIZE', 10))
+    WEATHER_HTTP_RETRIES = int(os.environ.get('WEATHER_HTTP_RETRIES', 2))
+    WEATHER_CIRCUIT_THRESHOLD = int(os.environ.get('WEATHER_CIRCUIT_THRESHOLD', 5))
+    WEATHER_CIRCUIT_RESET = float(os.environ.get('WEATHER_CIRCUIT_RESET', 30))
+    WEATHER_MAX_INFLIGHT = int(os.environ.get('WEATHER_MAX_INFLIGHT', 0))
+    MULTI_CITY_CONCURRENCY = int(os.environ.get('MULTI_CITY_CONCURRENCY', 8))
+    MAX_MULTI_CITIES = int(os.environ.get('MAX_MULTI_CITIES', 50))
+    STREAM_INTERVAL = float(os.environ.get('STREAM_INTERVAL', 60))
+    STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', 15))
+    STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', 4))
+    STREAM_MAX_DROPPED = int(os.environ.get('STREAM_MAX_DROPPED', 16))
+    STREAM_MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 1000))
+    STREAM_THREAD_SUBSCRIBERS = int(os.environ.get('STREAM_THREAD_SUBSCRIBERS', 2))
+    ENABLE_LSTM = os.environ.get('ENABLE_LSTM', 'true').lower() == 'true'
+    HISTORY_STORE_PATH = os.environ.get(
+        'HISTORY_STORE_PATH', os.path.join(os.path.dirname(__file__), '..', 'data', 'city_history.dat'))
+    HISTORY_CAPACITY = int(os.environ.get('HISTORY_CAPACITY', 1024))
+    HISTORY_INTERVAL = float(os.environ.get('HISTORY_INTERVAL', 86400))
+    PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 4096))
+    PREDICTION_CACHE_PRECISION = int(os.environ.get('PREDICTION_CACHE_PRECISION', 1))
+    MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 0))
+    RATE_LIMIT_CLIENT_RATE = float(os.environ.get('RATE_LIMIT_CLIENT_RATE', 0))
+    RATE_LIMIT_CLIENT_BURST = float(os.environ.get('RATE_LIMIT_CLIENT_BURST', 0))
+    RATE_LIMIT_GLOBAL_RATE = float(os.environ.get('RATE_LIMIT_GLOBAL_RATE', 0))
+    RATE_LIMIT_GLOBAL_BURST = float(os.environ.get('RATE_LIMIT_GLOBAL_BURST', 0))
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+    RATE_LIMIT_STORE_PATH = os.environ.get(
+        'RATE_LIMIT_STORE_PATH', os.path.join(os.path.dirname(__file__), '..', 'data', 'rate_limits.dat'))
+    RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', 0))
+    MAX_INFLIGHT_REQUESTS = int(os.environ.get('MAX_INFLIGHT_REQUESTS', 0))
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'plain')
+    LOG_ASYNC = os.environ.get('LOG_ASYNC', 'false').lower() == 'true'
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 4))
+    ASGI_UPSTREAM_CONNECTIONS = int(os.environ.get('ASGI_UPSTREAM_CONNECTIONS', 100))
@@ -0,0 +1,42 @@
+# gunicorn.conf.py
+"""Gunicorn settings for the Weather Prediction API.
+
+Picked up automatically when gunicorn is started from backend/api. With
+preload_app the models are loaded once in the master and shared with the
+forked workers copy-on-write instead of being loaded again per worker.
+"""
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def _predictor():
+    """The WeatherPredictor created by app.py, if the app module is loaded"""
+    api = sys.modules.get('app')
+    return getattr(api, 'predictor', None)
+
+
+def when_ready(server):
+    # Move everything allocated during preload out of the GC's reach so that
+    # collections in the workers don't touch (and so copy) the shared pages.
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # The async log writer thread stays behind in the master
+    logging_config = sys.modules.get('utils.logging_config')
+    if logging_config is not None:
+        logging_config.restart_after_fork()
+
+    predictor = _predictor()
+    if preload_app and predictor is not None:
+        predictor.reset_after_fork()
+        predictor.warm_up()
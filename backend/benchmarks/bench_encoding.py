@@ -0,0 +1,76 @@
+# benchmarks/bench_encoding.py
+"""Encode time and bytes on the wire for each response encoding.
+
+Payloads are real predictor results: one /predict response, a 1000-row
+/predict/batch, a 200-row 7-day /forecast and a 50-city /forecast/multi.
+Encodings:
+  flask-json   Flask's standard jsonify (the previous default)
+  orjson       the OrjsonProvider used when orjson is installed
+  msgpack      MessagePack with array results as columns
+and each of them gzipped at GZIP_LEVEL 5.
+
+Usage: python backend/benchmarks/bench_encoding.py [--iterations 200]
+"""
+import argparse
+import gzip
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from common import SAMPLE_OBSERVATION, load_predictor, measure_latency
+from stub_openweather import make_payload
+from utils.predictor import normalize_city
+from utils.response_encoding import OrjsonProvider, columnar, msgpack, orjson
+from utils.weather_client import parse_current_weather
+
+CITIES = ['Mumbai', 'Delhi', 'Chennai', 'Kolkata', 'Pune', 'Jaipur', 'Lucknow', 'Bhopal', 'Indore', 'Surat']
+
+
+def build_payloads(predictor):
+    observations = [{'temperature': 20 + (i % 150) * 0.1, 'humidity': 40 + i % 50, 'pressure': 1000 + i % 20,
+                     'feels_like': 21 + (i % 120) * 0.1, 'city': CITIES[i % len(CITIES)]} for i in range(1000)]
+    cities = [f"{CITIES[i % len(CITIES)]}{i // len(CITIES) or ''}" for i in range(50)]
+    weather = {normalize_city(city): parse_current_weather(make_payload(city)) for city in cities}
+    return {
+        'predict': predictor.predict_temperature(**SAMPLE_OBSERVATION),
+        'predict_batch_1000': predictor.predict_batch(observations),
+        'forecast_200x7': predictor.forecast(observations[:200], horizon=7),
+        'forecast_multi_50': predictor.forecast_cities(cities, 'bench', prefetched=weather),
+    }
+
+
+def encoders(app):
+    flask_json = DefaultJSONProvider(app)
+    result = {'flask-json': lambda payload: flask_json.response(payload).get_data()}
+    if orjson is not None:
+        fast_json = OrjsonProvider(app)
+        result['orjson'] = lambda payload: fast_json.response(payload).get_data()
+    if msgpack is not None:
+        result['msgpack'] = lambda payload: msgpack.packb(columnar(payload))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    payloads = build_payloads(load_predictor())
+    print(f"{'payload':<20}{'encoding':<18}{'encode p50':>12}{'bytes':>10}{'vs flask-json':>15}")
+    with app.app_context():
+        for name, payload in payloads.items():
+            baseline = None
+            for encoding, encode in encoders(app).items():
+                body = encode(payload)
+                for label, fn, size in (
+                        (encoding, lambda: encode(payload), len(body)),
+                        (f'{encoding}+gzip', lambda: gzip.compress(encode(payload), compresslevel=5),
+                         len(gzip.compress(body, compresslevel=5)))):
+                    stats = measure_latency(fn, args.iterations, warmup=min(20, args.iterations))
+                    baseline = baseline or size
+                    print(f"{name:<20}{label:<18}{stats['p50_us']:10.1f}us{size:>10}{size / baseline:>14.0%}")
+
+
+if __name__ == '__main__':
+    main()
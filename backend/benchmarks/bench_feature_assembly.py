@@ -0,0 +1,118 @@
+# benchmarks/bench_feature_assembly.py
+"""Per-row feature-assembly cost: the previous dict-based path vs the compiled feature plan.
+
+"before" re-implements the assembly as it was: type and NaN checks on every
+call (once more in predict_temperature), datetime.now() and np.sin/np.cos
+per row, and a feature dict reordered by the feature list. "after" is
+predictor.create_features (single rows) and create_feature_matrix (batches,
+reported per row). Both must produce identical matrices.
+
+Usage: python backend/benchmarks/bench_feature_assembly.py [--iterations N] [--batch-sizes 100,10000]
+"""
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from common import SAMPLE_OBSERVATION, format_row, load_predictor, measure_latency
+
+
+def legacy_row(features, temp, humidity, pressure, feels_like, temp_lag1=None, temp_lag2=None,
+               wind_speed=None, visibility=None):
+    if not all(isinstance(x, (int, float)) for x in (temp, humidity, pressure, feels_like)):
+        raise ValueError("All required parameters must be numbers")
+    if not all(isinstance(x, (int, float)) and not np.isnan(float(x)) for x in (temp, humidity, pressure, feels_like)):
+        raise ValueError("Core weather parameters must be valid numeric values")
+    if not (0 <= humidity <= 100):
+        raise ValueError(f"Humidity must be between 0-100%, got {humidity}%")
+    lag1 = temp_lag1 if temp_lag1 is not None else temp - 0.5
+    lag2 = temp_lag2 if temp_lag2 is not None else temp - 1.0
+    day_of_year = datetime.now().timetuple().tm_yday
+    values = {
+        'temperature_celsius_lag1': float(lag1),
+        'temperature_celsius_lag2': float(lag2),
+        'humidity': float(humidity),
+        'pressure_mb': float(pressure),
+        'feels_like_celsius': float(feels_like),
+        'dayofyear': float(day_of_year),
+        'sin_doy': np.sin(2 * np.pi * day_of_year / 365.0),
+        'cos_doy': np.cos(2 * np.pi * day_of_year / 365.0)
+    }
+    if 'wind_speed_mps' in features:
+        values['wind_speed_mps'] = float(wind_speed) if wind_speed is not None else 5.0
+    if 'visibility_km' in features:
+        values['visibility_km'] = float(visibility) if visibility is not None else 10.0
+    return np.array([values[f] for f in features]).reshape(1, -1)
+
+
+def legacy_matrix(features, values, valid):
+    temp = values['temperature'][valid]
+    lag1 = values['temperature_lag1'][valid]
+    lag2 = values['temperature_lag2'][valid]
+    day_of_year = datetime.now().timetuple().tm_yday
+    columns = {
+        'temperature_celsius_lag1': np.where(np.isnan(lag1), temp - 0.5, lag1),
+        'temperature_celsius_lag2': np.where(np.isnan(lag2), temp - 1.0, lag2),
+        'humidity': values['humidity'][valid],
+        'pressure_mb': values['pressure'][valid],
+        'feels_like_celsius': values['feels_like'][valid],
+        'dayofyear': float(day_of_year),
+        'sin_doy': np.sin(2 * np.pi * day_of_year / 365.0),
+        'cos_doy': np.cos(2 * np.pi * day_of_year / 365.0)
+    }
+    if 'wind_speed_mps' in features:
+        wind = values['wind_speed'][valid]
+        columns['wind_speed_mps'] = np.where(np.isnan(wind), 5.0, wind)
+    if 'visibility_km' in features:
+        visibility = values['visibility'][valid]
+        columns['visibility_km'] = np.where(np.isnan(visibility), 10.0, visibility)
+    X = np.empty((temp.shape[0], len(features)))
+    for j, name in enumerate(features):
+        X[:, j] = columns[name]
+    return X
+
+
+def per_row(label, stats, rows):
+    """A latency table line for one batch call, divided per row and shown in nanoseconds"""
+    return (f"{label:<28} p50={stats['p50_us'] * 1000 / rows:9.1f}ns  p99={stats['p99_us'] * 1000 / rows:9.1f}ns"
+            f"  mean={stats['mean_us'] * 1000 / rows:9.1f}ns")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--batch-sizes', default='100,10000')
+    args = parser.parse_args()
+
+    predictor = load_predictor()
+    features = predictor.features
+    before = legacy_row(features, **SAMPLE_OBSERVATION)
+    after = predictor.create_features(**SAMPLE_OBSERVATION)
+    assert np.array_equal(before, after), (before, after)
+
+    print("Single row (create_features)")
+    print(format_row("before", measure_latency(lambda: legacy_row(features, **SAMPLE_OBSERVATION), args.iterations)))
+    print(format_row("after", measure_latency(lambda: predictor.create_features(**SAMPLE_OBSERVATION),
+                                              args.iterations)))
+    print(format_row("after, types pre-checked", measure_latency(
+        lambda: predictor.create_features(**SAMPLE_OBSERVATION, validated=True), args.iterations)))
+
+    rng = np.random.default_rng(0)
+    for size in (int(s) for s in args.batch_sizes.split(',')):
+        columns = {'temperature': rng.uniform(-10, 40, size).tolist(), 'humidity': rng.uniform(0, 100, size).tolist(),
+                   'pressure': rng.uniform(980, 1040, size).tolist(), 'feels_like': rng.uniform(-15, 45, size).tolist(),
+                   'temperature_lag1': [None] * size, 'temperature_lag2': [None] * size,
+                   'wind_speed': [None] * size, 'visibility': [None] * size}
+        values, errors = predictor._validate_columns(columns, size)
+        valid = np.array([e is None for e in errors], dtype=bool)
+        assert np.array_equal(legacy_matrix(features, values, valid), predictor.create_feature_matrix(values, valid))
+        iterations = max(20, args.iterations * 10 // size)
+        print(f"\nBatch of {size}, per row (create_feature_matrix)")
+        print(per_row("before", measure_latency(lambda: legacy_matrix(features, values, valid),
+                                                iterations, warmup=5), size))
+        print(per_row("after", measure_latency(lambda: predictor.create_feature_matrix(values, valid),
+                                               iterations, warmup=5), size))
+
+
+if __name__ == '__main__':
+    main()
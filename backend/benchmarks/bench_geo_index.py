@@ -0,0 +1,57 @@
+# benchmarks/bench_geo_index.py
+"""GeoIndex lookup and insert latency against index size.
+
+Points are spread uniformly over the land-heavy band between 60S and 70N.
+Each size is timed for radius queries that hit (centred near a stored
+point) and that miss (random locations), plus a brute-force haversine scan
+over every point for comparison.
+
+Usage: python backend/benchmarks/bench_geo_index.py [--sizes 100,1000,10000,100000] [--radius-km 25]
+"""
+import argparse
+
+import numpy as np
+
+from common import measure_latency
+from utils.geo_index import GeoIndex, haversine_km
+
+
+def random_points(rng, n):
+    return np.column_stack([rng.uniform(-60, 70, n), rng.uniform(-180, 180, n)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000,100000')
+    parser.add_argument('--radius-km', type=float, default=25.0)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'points':>8}{'hit p50':>12}{'miss p50':>12}{'insert p50':>13}{'brute force':>14}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        points = random_points(rng, size)
+        index = GeoIndex()
+        for i, (lat, lon) in enumerate(points):
+            index.insert(i, lat, lon)
+
+        near = points[rng.integers(0, size, args.iterations)] + rng.normal(0, 0.05, (args.iterations, 2))
+        far = random_points(rng, args.iterations)
+        queries = {'hit': iter(near.tolist() * 2), 'miss': iter(far.tolist() * 2)}
+        hit = measure_latency(lambda: index.nearest(*next(queries['hit']), args.radius_km), args.iterations)
+        miss = measure_latency(lambda: index.nearest(*next(queries['miss']), args.radius_km), args.iterations)
+
+        moves = iter(random_points(rng, 2 * args.iterations).tolist())
+        keys = iter(rng.integers(0, size, 2 * args.iterations).tolist())
+        insert = measure_latency(lambda: index.insert(next(keys), *next(moves)), args.iterations)
+
+        scan_points = points.tolist()
+        lat, lon = far[0]
+        scan = measure_latency(lambda: min(haversine_km(lat, lon, p[0], p[1]) for p in scan_points),
+                               iterations=max(5, min(args.iterations, 200000 // size)), warmup=1)
+        print(f"{size:>8}{hit['p50_us']:10.1f}us{miss['p50_us']:10.1f}us{insert['p50_us']:11.1f}us"
+              f"{scan['p50_us']:12.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_logging.py
+"""/predict throughput under each logging mode.
+
+Drives the Flask app in-process with several client threads and writes logs
+to a temporary file, so formatting and I/O are both paid. Modes:
+  sync-plain        basicConfig-style text handler in the request thread (the old setup)
+  async-json        queue handler; a background thread formats JSON and writes
+  async-json-1pct   as above, keeping 1% of INFO records (errors are always kept)
+  off               logging disabled, the upper bound
+
+Usage: python backend/benchmarks/bench_logging.py [--threads 4] [--seconds 5]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from common import BACKEND_DIR
+
+API_DIR = os.path.join(BACKEND_DIR, 'api')
+
+MODES = {
+    'sync-plain': dict(fmt='plain', async_mode=False),
+    'async-json': dict(fmt='json', async_mode=True),
+    'async-json-1pct': dict(fmt='json', async_mode=True, sample_rate=0.01),
+    'off': None,
+}
+
+PAYLOAD = {'temperature': 27.99, 'humidity': 74.0, 'pressure': 1007.0, 'feels_like': 31.19}
+
+
+def load_app():
+    """Import backend/api/app.py with the prediction cache off and in-memory history"""
+    os.environ.update(PREDICTION_CACHE_SIZE='0', HISTORY_STORE_PATH='', ENABLE_LSTM='false')
+    if API_DIR not in sys.path:
+        sys.path.append(API_DIR)
+    import app
+    return app.app
+
+
+def run(flask_app, threads, seconds):
+    """Requests per second from `threads` clients posting to /predict for `seconds`"""
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def client(i):
+        test_client = flask_app.test_client()
+        while not stop.is_set():
+            response = test_client.post('/predict', json=PAYLOAD)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            counts[i] += 1
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    from utils.logging_config import configure_logging, stop_logging
+    flask_app = load_app()
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, options in MODES.items():
+            log_path = os.path.join(tmp, f'{mode}.log')
+            with open(log_path, 'w') as log_file:
+                if options is None:
+                    logging.disable(logging.CRITICAL)
+                else:
+                    logging.disable(logging.NOTSET)
+                    configure_logging(stream=log_file, **options)
+                rps = run(flask_app, args.threads, args.seconds)
+                stop_logging()
+            baseline = baseline or rps
+            size_kb = os.path.getsize(log_path) / 1024
+            print(f"{mode:<18} {rps:8.0f} req/s  ({rps / baseline:5.2f}x)  log {size_kb:8.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
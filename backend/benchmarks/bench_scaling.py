@@ -0,0 +1,42 @@
+# benchmarks/bench_scaling.py
+"""Single-prediction latency with sklearn scaling vs the compiled scaler kernel.
+
+Usage: python backend/benchmarks/bench_scaling.py [--iterations N]
+"""
+import argparse
+
+from common import SAMPLE_OBSERVATION, format_row, load_predictor, measure_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    sklearn_predictor = load_predictor(fast_scaling=False)
+    kernel_predictor = load_predictor(fast_scaling=True)
+
+    X = kernel_predictor.create_features(**SAMPLE_OBSERVATION)
+    scaled = kernel_predictor.bundle.scaler_X_kernel.transform(X)
+    assert abs(sklearn_predictor.predict_temperature(**SAMPLE_OBSERVATION)['predicted_temperature']
+               - kernel_predictor.predict_temperature(**SAMPLE_OBSERVATION)['predicted_temperature']) < 1e-6
+
+    print("Scaling stage only")
+    print(format_row("sklearn transform", measure_latency(
+        lambda: sklearn_predictor.bundle.scaler_X.transform(X), args.iterations)))
+    print(format_row("kernel transform", measure_latency(
+        lambda: kernel_predictor.bundle.scaler_X_kernel.transform(X), args.iterations)))
+    print(format_row("sklearn inverse_transform", measure_latency(
+        lambda: sklearn_predictor.bundle.scaler_y.inverse_transform([[scaled[0, 0]]]), args.iterations)))
+    print(format_row("kernel inverse_transform", measure_latency(
+        lambda: kernel_predictor.bundle.scaler_y_kernel.inverse_transform_scalar(scaled[0, 0]), args.iterations)))
+
+    print("\nEnd-to-end predict_temperature")
+    print(format_row("sklearn scaling", measure_latency(
+        lambda: sklearn_predictor.predict_temperature(**SAMPLE_OBSERVATION), args.iterations)))
+    print(format_row("kernel scaling", measure_latency(
+        lambda: kernel_predictor.predict_temperature(**SAMPLE_OBSERVATION), args.iterations)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_startup.py
+"""Cold-start cost of the API: import time, time to first prediction and per-worker memory.
+
+Part 1 runs a fresh interpreter that imports backend/api/app.py and makes one
+prediction. Part 2 starts gunicorn with and without preload_app and reports
+RSS and PSS (proportional set size, which splits shared copy-on-write pages
+between the processes that map them) for every worker.
+
+Usage: python backend/benchmarks/bench_startup.py [--workers 2] [--skip-gunicorn]
+"""
+import argparse
+import json
+import signal
+import subprocess
+import sys
+import time
+
+from common import API_DIR, free_port, start_gunicorn
+
+COLD_START_SCRIPT = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.append('..')
+import logging; logging.disable(logging.INFO)
+import utils.predictor
+t_predictor = time.perf_counter()
+import app
+t_app = time.perf_counter()
+app.predictor.predict_temperature(27.99, 74.0, 1007.0, 31.19)
+t_first = time.perf_counter()
+rss_kb = next(int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmRSS'))
+print(json.dumps({
+    'import_predictor_s': t_predictor - t0,
+    'import_app_s': t_app - t0,
+    'first_prediction_s': t_first - t0,
+    'rss_mb': rss_kb / 1024,
+}))
+"""
+
+
+def cold_start():
+    """Measure import and first-prediction time in a fresh interpreter"""
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', COLD_START_SCRIPT],
+                         cwd=API_DIR, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _memory_mb(pid):
+    """(RSS, PSS) of a process in MB from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1]) / 1024
+    return values.get('Rss:', 0.0), values.get('Pss:', 0.0)
+
+
+def gunicorn_memory(workers, preload):
+    """Start gunicorn, wait until it serves /health, and measure each worker"""
+    started = time.perf_counter()
+    proc = start_gunicorn(free_port(), {'GUNICORN_WORKERS': str(workers),
+                                        'GUNICORN_PRELOAD': 'true' if preload else 'false'})
+    try:
+        ready_s = time.perf_counter() - started
+        # Let every worker finish booting before sampling memory
+        time.sleep(2)
+        children = subprocess.run(['pgrep', '-P', str(proc.pid)], capture_output=True, text=True).stdout.split()
+        return {
+            'ready_s': ready_s,
+            'master': _memory_mb(proc.pid),
+            'workers': [_memory_mb(int(pid)) for pid in children],
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--skip-gunicorn', action='store_true')
+    args = parser.parse_args()
+
+    stats = cold_start()
+    print("Cold start (fresh interpreter)")
+    print(f"  import utils.predictor   {stats['import_predictor_s'] * 1000:8.0f} ms")
+    print(f"  import app (loads models) {stats['import_app_s'] * 1000:7.0f} ms")
+    print(f"  first prediction          {stats['first_prediction_s'] * 1000:7.0f} ms")
+    print(f"  RSS                       {stats['rss_mb']:7.1f} MB")
+
+    if args.skip_gunicorn:
+        return
+    for preload in (False, True):
+        result = gunicorn_memory(args.workers, preload)
+        print(f"\ngunicorn workers={args.workers} preload={preload}: ready in {result['ready_s']:.2f}s")
+        print(f"  master       RSS {result['master'][0]:7.1f} MB  PSS {result['master'][1]:7.1f} MB")
+        for i, (rss, pss) in enumerate(result['workers']):
+            print(f"  worker {i}     RSS {rss:7.1f} MB  PSS {pss:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/common.py
+"""Shared helpers for the backend benchmark scripts."""
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+API_DIR = os.path.join(BACKEND_DIR, 'api')
+MODEL_PATH = os.path.join(BACKEND_DIR, 'models')
+
+# Make `utils.*` importable the same way backend/api/app.py does
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+# Per-request INFO logging would dominate the timings
+logging.disable(logging.INFO)
+
+SAMPLE_OBSERVATION = {
+    'temp': 27.99,
+    'humidity': 74.0,
+    'pressure': 1007.0,
+    'feels_like': 31.19,
+    'temp_lag1': 27.5,
+    'temp_lag2': 26.8,
+}
+
+
+def load_predictor(**kwargs):
+    """Load a WeatherPredictor from backend/models.
+
+    The prediction cache and the LSTM are off unless asked for, so timings
+    measure the model path rather than cache hits.
+    """
+    from utils.predictor import WeatherPredictor
+    kwargs.setdefault('prediction_cache_size', 0)
+    kwargs.setdefault('enable_lstm', False)
+    return WeatherPredictor(MODEL_PATH, **kwargs)
+
+
+def measure_latency(fn, iterations=2000, warmup=200):
+    """Call fn repeatedly and return latency percentiles in microseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    samples *= 1e6
+    return {
+        'p50_us': float(np.percentile(samples, 50)),
+        'p99_us': float(np.percentile(samples, 99)),
+        'mean_us': float(samples.mean()),
+        'iterations': iterations,
+    }
+
+
+def format_row(label, stats):
+    """Render one line of a latency table"""
+    return f"{label:<28} p50={stats['p50_us']:9.1f}us  p99={stats['p99_us']:9.1f}us  mean={stats['mean_us']:9.1f}us"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(port, env=None, timeout=120):
+    """Start gunicorn on app:app from backend/api and wait until /health answers"""
+    env = dict(os.environ, PORT=str(port), GUNICORN_LOG_LEVEL='warning', **(env or {}))
+    proc = subprocess.Popen([sys.executable, '-W', 'ignore', '-m', 'gunicorn', 'app:app'],
+                            cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1).read()
+            return proc
+        except OSError:
+            if time.time() > deadline or proc.poll() is not None:
+                proc.kill()
+                raise RuntimeError("gunicorn did not become ready")
+            time.sleep(0.1)
@@ -0,0 +1,68 @@
+# benchmarks/load_threads.py
+"""Prediction throughput against thread count for the DMatrix and inplace modes.
+
+Each configuration starts T threads that call predict_temperature in a loop
+for a fixed duration, mimicking gunicorn's threaded workers sharing one
+WeatherPredictor. The booster modes run with the NumPy tree evaluator off;
+the default configuration, which scores single rows with it, is shown last.
+
+Usage: python backend/benchmarks/load_threads.py [--threads 1,2,4,8] [--duration 2]
+"""
+import argparse
+import threading
+import time
+
+from common import SAMPLE_OBSERVATION, load_predictor
+
+
+def run_load(predictor, n_threads, duration):
+    """Return predictions per second achieved by n_threads over duration seconds"""
+    counts = [0] * n_threads
+    stop = threading.Event()
+    start_barrier = threading.Barrier(n_threads + 1)
+
+    def worker(idx):
+        start_barrier.wait()
+        while not stop.is_set():
+            predictor.predict_temperature(**SAMPLE_OBSERVATION)
+            counts[idx] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(counts) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', default='1,2,4,8')
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--nthread', type=int, default=1)
+    args = parser.parse_args()
+    thread_counts = [int(t) for t in args.threads.split(',')]
+
+    # numpy_trees_max_rows=0 keeps single rows on the booster these modes configure
+    configs = [
+        ('dmatrix, shared booster', dict(inference_mode='dmatrix', booster_pool_size=1, booster_nthread=0,
+                                         numpy_trees_max_rows=0)),
+        (f'inplace, pool={args.pool_size}', dict(inference_mode='inplace', booster_pool_size=args.pool_size,
+                                                 booster_nthread=args.nthread, numpy_trees_max_rows=0)),
+        ('numpy trees', dict()),
+    ]
+
+    print(f"{'mode':<28}" + ''.join(f"{f'{t} thr':>12}" for t in thread_counts) + "   (predictions/s)")
+    for label, kwargs in configs:
+        predictor = load_predictor(**kwargs)
+        rates = [run_load(predictor, t, args.duration) for t in thread_counts]
+        print(f"{label:<28}" + ''.join(f"{r:12.0f}" for r in rates))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+# benchmarks/stub_openweather.py
+"""Local stub of the OpenWeatherMap /weather endpoint.
+
+Point the backend at it with OPENWEATHER_BASE_URL=http://127.0.0.1:<port>
+to exercise WeatherClient retries, the circuit breaker and caching without
+touching the real API.
+
+Usage: python backend/benchmarks/stub_openweather.py [--port 8081] [--latency-ms 50]
+           [--fail-rate 0.0] [--status 503]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# City names the stub reports as not found
+UNKNOWN_CITIES = {'nowhere', 'atlantis'}
+
+
+def make_payload(city):
+    """A deterministic OpenWeatherMap-shaped payload for a city"""
+    seed = sum(map(ord, city.lower()))
+    temp = 10 + seed % 25
+    return {
+        'name': city.title(),
+        'coord': {'lat': (seed % 180) - 90.0, 'lon': (seed * 7 % 360) - 180.0},
+        'main': {'temp': temp, 'feels_like': temp + 1.5, 'pressure': 1000 + seed % 20,
+                 'humidity': 40 + seed % 50},
+        'weather': [{'description': 'clear sky'}],
+        'wind': {'speed': 1 + seed % 6},
+        'visibility': 10000,
+        'sys': {'country': 'IN', 'sunrise': 1700000000, 'sunset': 1700040000},
+    }
+
+
+class StubState:
+    """Mutable knobs shared by the request handler threads.
+
+    Besides failing at random (``fail_rate``), the stub fails the next
+    ``fail_next`` requests, so tests can script exact failure sequences.
+    Failures carry a Retry-After header when ``retry_after`` is set.
+    """
+
+    def __init__(self, latency=0.0, fail_rate=0.0, fail_status=503):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.fail_next = 0
+        self.retry_after = None
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def should_fail(self):
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return True
+        return bool(self.fail_rate) and random.random() < self.fail_rate
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out as separate writes; with Nagle on, keep-alive
+        # clients wait ~40ms for the delayed ACK on every response
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, headers=()):
+            raw = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(raw)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            state.count()
+            if state.latency:
+                time.sleep(state.latency)
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if not url.path.rstrip('/').endswith('/weather') or not query.get('appid'):
+                return self._send(401, {'cod': 401, 'message': 'Invalid API key'})
+            if state.should_fail():
+                headers = [('Retry-After', str(state.retry_after))] if state.retry_after is not None else []
+                return self._send(state.fail_status, {'cod': state.fail_status, 'message': 'stub failure'}, headers)
+            if 'lat' in query and 'lon' in query:
+                lat, lon = float(query['lat'][0]), float(query['lon'][0])
+                payload = make_payload(f"{lat:.2f},{lon:.2f}")
+                payload['coord'] = {'lat': lat, 'lon': lon}
+                return self._send(200, payload)
+            city = query.get('q', [''])[0]
+            if city.lower() in UNKNOWN_CITIES:
+                return self._send(404, {'cod': '404', 'message': 'city not found'})
+            return self._send(200, make_payload(city))
+
+    return Handler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connection bursts from concurrent clients
+    request_queue_size = 1024
+
+
+def start_stub_server(port=0, latency=0.0, fail_rate=0.0, fail_status=503):
+    """Start the stub in a daemon thread; returns (server, state, base_url)"""
+    state = StubState(latency, fail_rate, fail_status)
+    server = StubServer(('127.0.0.1', port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--status', type=int, default=503)
+    args = parser.parse_args()
+
+    server, _, base_url = start_stub_server(args.port, args.latency_ms / 1000, args.fail_rate, args.status)
+    print(f"Stub OpenWeatherMap listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
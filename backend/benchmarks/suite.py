@@ -0,0 +1,280 @@
+# benchmarks/suite.py
+"""Benchmark suite for the inference and HTTP paths, with regression checks.
+
+Levels:
+  micro   create_features, scaling, booster prediction, the full predictor calls
+          and the admission check, timed in-process
+  routes  /predict, /predict/batch and /current-weather through the Flask
+          test client against a local OpenWeatherMap stub
+  load    gunicorn under concurrent HTTP load for several workers x threads
+          configurations
+
+Every result has one headline value and the direction that counts as better.
+Results are written as JSON. --compare checks a run against a baseline and
+exits with status 1 when any shared result regressed by more than
+--threshold (relative).
+
+Usage:
+  python backend/benchmarks/suite.py --output results.json [--levels micro,routes] [--quick]
+  python backend/benchmarks/suite.py --output new.json --compare baseline.json --threshold 0.15
+  python backend/benchmarks/suite.py --compare baseline.json new.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from common import (BACKEND_DIR, SAMPLE_OBSERVATION, free_port, load_predictor, measure_latency,
+                    start_gunicorn)
+from stub_openweather import start_stub_server
+from utils.rate_limit import AdmissionControl, MemoryBucketStore, RateLimiter
+
+LEVELS = ('micro', 'routes', 'load')
+
+PREDICT_PAYLOAD = {'temperature': 27.99, 'humidity': 74.0, 'pressure': 1007.0, 'feels_like': 31.19}
+
+
+def latency_result(stats):
+    """A latency measurement whose headline value is the median in microseconds"""
+    return {'value': stats['p50_us'], 'unit': 'us', 'better': 'lower', **stats}
+
+
+def run_micro(iterations):
+    predictor = load_predictor()
+    bundle = predictor.bundle
+    # Same model with every batch size on XGBoost, for the xgboost_* cases
+    xgb_bundle = load_predictor(numpy_trees_max_rows=0).bundle
+    X = predictor.create_features(**SAMPLE_OBSERVATION)
+    X_scaled = bundle.scale_features(X)
+    y_scaled = bundle.predict_scaled(X_scaled)[0]
+    rng = np.random.default_rng(0)
+    X_batch = X + rng.normal(0, 1, size=(256, X.shape[1]))
+    X_batch_scaled = bundle.scale_features(X_batch)
+    batch = [dict(PREDICT_PAYLOAD, temperature=27.99 + i * 0.01) for i in range(100)]
+    # Limits high enough that every request is admitted, so both buckets are charged each time
+    admission = AdmissionControl(RateLimiter(MemoryBucketStore(), 1e9, 1e9, 1e9, 1e9), max_inflight=1000)
+    environ = {'PATH_INFO': '/predict', 'REMOTE_ADDR': '127.0.0.1'}
+
+    def admit():
+        admission.admit(environ)
+        admission.leave()
+
+    cases = {
+        'micro.create_features': lambda: predictor.create_features(**SAMPLE_OBSERVATION),
+        'micro.create_features_city_history': lambda: predictor.create_features(27.99, 74.0, 1007.0, 31.19,
+                                                                                city='Mumbai'),
+        'micro.scale_features': lambda: bundle.scale_features(X),
+        'micro.inverse_scale': lambda: bundle.inverse_scale_scalar(y_scaled),
+        'micro.predict_scaled_1': lambda: bundle.predict_scaled(X_scaled),
+        'micro.predict_scaled_256': lambda: bundle.predict_scaled(X_batch_scaled),
+        'micro.xgboost_predict_1': lambda: xgb_bundle.predict_scaled(X_scaled),
+        'micro.xgboost_predict_256': lambda: xgb_bundle.predict_scaled(X_batch_scaled),
+        'micro.xgboost_inplace_1': lambda: bundle.booster_pool.inplace_predict(X_scaled.astype(np.float32)),
+        **({'micro.numpy_trees_1': lambda: bundle.tree_ensemble.predict(X_scaled)}
+           if bundle.tree_ensemble is not None else {}),
+        'micro.predict_temperature': lambda: predictor.predict_temperature(**SAMPLE_OBSERVATION),
+        'micro.predict_batch_100': lambda: predictor.predict_batch(batch),
+        'micro.admission_check': admit,
+    }
+    return {name: latency_result(measure_latency(fn, iterations)) for name, fn in cases.items()}
+
+
+def load_app(stub_url):
+    """Import backend/api/app.py against the stub, with the prediction cache, stores and the LSTM off"""
+    os.environ.update(OPENWEATHER_API_KEY='bench', OPENWEATHER_BASE_URL=stub_url, HISTORY_STORE_PATH='',
+                      OBSERVATION_STORE_PATH='', PREDICTION_CACHE_SIZE='0', ENABLE_LSTM='false', LOG_LEVEL='WARNING')
+    from api import app
+    return app
+
+
+def run_routes(iterations):
+    server, _, stub_url = start_stub_server()
+    try:
+        api = load_app(stub_url)
+        client = api.app.test_client()
+        batch = {'observations': [dict(PREDICT_PAYLOAD, temperature=27.99 + i * 0.01) for i in range(100)]}
+
+        def request(method, path, **kwargs):
+            def call():
+                response = client.open(path, method=method, **kwargs)
+                assert response.status_code == 200, (path, response.status_code, response.get_data(as_text=True))
+            return call
+
+        def weather_miss():
+            api.predictor.weather_cache.clear()
+            request('GET', '/current-weather/Mumbai')()
+
+        cases = {
+            'routes.predict': request('POST', '/predict', json=PREDICT_PAYLOAD),
+            'routes.predict_batch_100': request('POST', '/predict/batch', json=batch),
+            'routes.current_weather_cached': request('GET', '/current-weather/Mumbai'),
+            'routes.current_weather_upstream': weather_miss,
+        }
+        return {name: latency_result(measure_latency(fn, iterations, warmup=min(200, iterations // 10)))
+                for name, fn in cases.items()}
+    finally:
+        server.shutdown()
+
+
+def http_load(port, concurrency, duration):
+    """POST /predict from `concurrency` keep-alive clients; returns throughput and latency"""
+    body = json.dumps(PREDICT_PAYLOAD)
+    headers = {'Content-Type': 'application/json'}
+    samples = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop = threading.Event()
+
+    def client(i):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                conn.request('POST', '/predict', body, headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                ok = False
+            if ok:
+                samples[i].append(time.perf_counter() - started)
+            else:
+                errors[i] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies = np.concatenate([np.array(s) for s in samples]) * 1000
+    return {
+        'value': len(latencies) / elapsed,
+        'unit': 'req/s',
+        'better': 'higher',
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+        'requests': int(len(latencies)),
+        'errors': int(sum(errors)),
+    }
+
+
+def run_load(configs, concurrency, duration):
+    results = {}
+    for workers, threads in configs:
+        port = free_port()
+        proc = start_gunicorn(port, {
+            'GUNICORN_WORKERS': str(workers), 'GUNICORN_THREADS': str(threads),
+            'HISTORY_STORE_PATH': '', 'OBSERVATION_STORE_PATH': '', 'PREDICTION_CACHE_SIZE': '0',
+            'ENABLE_LSTM': 'false', 'LOG_LEVEL': 'WARNING'})
+        try:
+            http_load(port, concurrency, min(1.0, duration / 4))  # warm every worker
+            results[f'load.predict_w{workers}_t{threads}'] = dict(
+                http_load(port, concurrency, duration), workers=workers, threads=threads, concurrency=concurrency)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=30)
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    import xgboost
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'xgboost': xgboost.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print a comparison table and return the names of regressed results"""
+    regressions = []
+    print(f"{'benchmark':<40}{'baseline':>14}{'current':>14}{'change':>9}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or not base.get('value') or result.get('value') is None:
+            print(f"{name:<40}{'-':>14}{result.get('value') or 0:14.1f}{'new':>9}")
+            continue
+        change = (result['value'] - base['value']) / base['value']
+        worse = change > threshold if result['better'] == 'lower' else change < -threshold
+        flag = '  REGRESSION' if worse else ''
+        print(f"{name:<40}{base['value']:14.1f}{result['value']:14.1f}{change:+9.1%}  {result['unit']}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', default='micro,routes', help=f"comma-separated subset of {','.join(LEVELS)}")
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', nargs='+', metavar='JSON',
+                        help='baseline file, or baseline and current files to compare without running')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change counted as a regression')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--load-configs', default='1x4,2x2,2x4', help='gunicorn WORKERSxTHREADS list')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per load configuration')
+    parser.add_argument('--quick', action='store_true', help='fewer iterations and shorter load runs')
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f, open(args.compare[1]) as g:
+            regressions = compare(json.load(f), json.load(g), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    levels = [level.strip() for level in args.levels.split(',') if level.strip()]
+    unknown = set(levels) - set(LEVELS)
+    if unknown:
+        parser.error(f"unknown levels: {', '.join(sorted(unknown))}")
+    iterations = max(100, args.iterations // 5) if args.quick else args.iterations
+    duration = min(args.duration, 2.0) if args.quick else args.duration
+
+    results = {}
+    if 'micro' in levels:
+        results.update(run_micro(iterations))
+    if 'routes' in levels:
+        results.update(run_routes(iterations))
+    if 'load' in levels:
+        configs = [tuple(int(n) for n in c.split('x')) for c in args.load_configs.split(',')]
+        results.update(run_load(configs, args.concurrency, duration))
+
+    run = {'meta': metadata(), 'results': results}
+    for name, result in results.items():
+        print(f"{name:<40}{result['value']:14.1f} {result['unit']}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            regressions = compare(json.load(f), run, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# bulk_score.py
+"""Backfill temperature predictions for a large CSV or Parquet file.
+
+Reads the feature columns listed in the model's feature_list_xgb.json in
+chunks, scores each chunk in one model call and appends the results to the
+output file, so memory stays constant however large the input is. Output
+format follows the output file's extension (.csv or .parquet).
+
+Usage:
+  python backend/bulk_score.py input.csv predictions.csv --keep city,timestamp
+  python backend/bulk_score.py history.parquet out.parquet --workers 4 --chunk-size 100000
+"""
+import argparse
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from utils.bulk_scoring import score_file
+from utils.logging_config import configure_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help='CSV or Parquet file with the model feature columns')
+    parser.add_argument('output', help='Destination .csv or .parquet file')
+    parser.add_argument('--model-path', default=os.path.join(BACKEND_DIR, 'models'))
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per chunk')
+    parser.add_argument('--keep', default='',
+                        help='Comma-separated input columns copied to the output (e.g. city,timestamp)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Score chunks in this many processes (default: in-process)')
+    parser.add_argument('--nthread', type=int, default=os.cpu_count() or 1,
+                        help='XGBoost threads per scoring process')
+    args = parser.parse_args()
+
+    configure_logging(level='WARNING')
+    nthread = args.nthread if args.workers <= 1 else max(1, args.nthread // args.workers)
+    stats = score_file(args.input, args.output, args.model_path, chunk_size=args.chunk_size,
+                       keep=[c.strip() for c in args.keep.split(',') if c.strip()],
+                       workers=args.workers, nthread=nthread)
+    print(json.dumps(stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND_DIR, os.path.join(BACKEND_DIR, 'benchmarks')]
+
+from stub_openweather import start_stub_server  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    """A local OpenWeatherMap stub; yields (state, base_url)"""
+    server, state, base_url = start_stub_server()
+    yield state, base_url
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,122 @@
+# tests/test_cache.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.cache import TTLCache
+from utils.weather_client import WeatherClient
+
+
+def test_entries_expire_after_ttl():
+    clock = [0.0]
+    cache = TTLCache(clock=lambda: clock[0])
+    cache.set('mumbai', 'sunny', ttl=60)
+
+    assert cache.get('mumbai') == 'sunny'
+    clock[0] = 60.0
+    assert cache.get('mumbai') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(max_size=2)
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=60)
+    cache.get('a')
+    cache.set('c', 3, ttl=60)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_results_without_ttl_are_not_cached():
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {'error': 'Weather API error: 503'}, None
+
+    cache.get_or_load('mumbai', loader)
+    cache.get_or_load('mumbai', loader)
+
+    assert len(calls) == 2
+    assert len(cache) == 0
+
+
+def test_concurrent_misses_make_one_upstream_call(stub):
+    state, base_url = stub
+    state.latency = 0.2
+    client = WeatherClient(base_url)
+    cache = TTLCache()
+    barrier = threading.Barrier(20)
+    results = []
+
+    def lookup():
+        barrier.wait()
+        results.append(cache.get_or_load('mumbai', lambda: (client.get_current_weather('Mumbai', 'key')[0], 60)))
+
+    threads = [threading.Thread(target=lookup) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert state.requests == 1
+    assert len(results) == 20 and all(r is results[0] for r in results)
+    stats = cache.stats()
+    assert stats['misses'] == 1 and stats['coalesced'] == 19
+    # Later lookups are plain hits
+    assert cache.get_or_load('mumbai', lambda: pytest.fail("loader called on a hit")) is results[0]
+
+
+def test_waiters_see_the_leaders_error():
+    cache = TTLCache()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def failing_loader():
+        started.set()
+        release.wait()
+        raise ConnectionError("upstream down")
+
+    def lookup():
+        try:
+            cache.get_or_load('mumbai', failing_loader)
+        except ConnectionError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    started.wait()
+    waiter = threading.Thread(target=lookup)
+    waiter.start()
+    while cache.stats()['coalesced'] == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    waiter.join()
+
+    assert len(errors) == 2
+    # Nothing is left in flight: the next lookup loads again
+    assert cache.get_or_load('mumbai', lambda: ('ok', 60)) == 'ok'
+
+
+def test_concurrent_async_misses_share_one_load():
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'sunny', 60
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_load_async('mumbai', loader) for _ in range(10)))
+
+    assert asyncio.run(main()) == ['sunny'] * 10
+    assert len(calls) == 1
+    assert cache.stats()['coalesced'] == 9
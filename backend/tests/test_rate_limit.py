@@ -0,0 +1,105 @@
+# tests/test_rate_limit.py
+import threading
+import time
+
+import pytest
+
+from utils.rate_limit import AdmissionControl, MemoryBucketStore, RateLimiter, SharedBucketStore
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBucketStore()
+    return SharedBucketStore(str(tmp_path / 'buckets.dat'), slots=64)
+
+
+def test_bucket_allows_burst_then_reports_wait(store):
+    assert [store.take('client', rate=1.0, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    wait = store.take('client', rate=1.0, burst=3)
+    assert 0 < wait <= 1.0
+
+
+def test_buckets_are_per_key(store):
+    store.take('a', rate=1.0, burst=1)
+
+    assert store.take('a', rate=1.0, burst=1) > 0
+    assert store.take('b', rate=1.0, burst=1) == 0.0
+
+
+def test_bucket_refills_at_rate(store):
+    store.take('client', rate=100.0, burst=1)
+    wait = store.take('client', rate=100.0, burst=1)
+    assert 0 < wait <= 0.01
+
+    time.sleep(0.02)
+    assert store.take('client', rate=1000.0, burst=1) == 0.0
+
+
+def test_shared_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'buckets.dat')
+    first, second = SharedBucketStore(path, slots=64), SharedBucketStore(path, slots=64)
+
+    assert first.take('client', rate=1.0, burst=2) == 0.0
+    assert second.take('client', rate=1.0, burst=2) == 0.0
+    assert first.take('client', rate=1.0, burst=2) > 0
+
+
+def test_limiter_reports_client_then_global_scope():
+    limiter = RateLimiter(client_rate=1.0, client_burst=1, global_rate=1.0, global_burst=2)
+
+    assert limiter.check('a') is None
+    assert limiter.check('a')[0] == 'client'
+    assert limiter.check('b') is None
+    assert limiter.check('c')[0] == 'global'
+
+
+def test_limiter_with_zero_rates_is_disabled():
+    assert not RateLimiter().enabled
+    assert AdmissionControl(RateLimiter()).limiter is None
+
+
+def test_admission_rejects_rate_limited_clients_with_429():
+    admission = AdmissionControl(RateLimiter(client_rate=1.0, client_burst=1))
+    environ = {'PATH_INFO': '/predict', 'REMOTE_ADDR': '10.0.0.1'}
+
+    assert admission.admit(environ) is None
+    rejection = admission.admit(environ)
+    assert rejection.status == 429 and rejection.retry_after >= 1
+    # Only the admitted request holds an in-flight slot
+    assert admission.inflight == 1
+
+
+def test_admission_never_rejects_exempt_paths():
+    admission = AdmissionControl(RateLimiter(client_rate=1.0, client_burst=1), max_inflight=1)
+    admission.admit({'PATH_INFO': '/predict', 'REMOTE_ADDR': '10.0.0.1'})
+
+    assert admission.admit({'PATH_INFO': '/health', 'REMOTE_ADDR': '10.0.0.1'}) is None
+
+
+def test_admission_reads_client_from_forwarded_for():
+    admission = AdmissionControl(proxy_hops=1)
+
+    assert admission.client_id({'HTTP_X_FORWARDED_FOR': '1.2.3.4, 10.0.0.9', 'REMOTE_ADDR': '10.0.0.1'}) == '10.0.0.9'
+    assert admission.client_id({'REMOTE_ADDR': '10.0.0.1'}) == '10.0.0.1'
+
+
+def test_concurrent_admissions_do_not_overshoot_max_inflight():
+    admission = AdmissionControl(max_inflight=5)
+    barrier = threading.Barrier(50)
+    outcomes = []
+
+    def admit():
+        barrier.wait()
+        outcomes.append(admission.admit({'PATH_INFO': '/predict'}))
+
+    threads = [threading.Thread(target=admit) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count(None) == 5
+    assert all(o.status == 503 for o in outcomes if o is not None)
+    assert admission.inflight == 5
@@ -0,0 +1,160 @@
+# tests/test_weather_client.py
+from utils.weather_client import CircuitBreaker, WeatherClient
+
+
+def make_client(base_url, **kwargs):
+    """A client whose backoff sleeps are recorded instead of slept"""
+    delays = []
+    kwargs.setdefault('max_retries', 2)
+    client = WeatherClient(base_url, sleep=delays.append, **kwargs)
+    return client, delays
+
+
+def test_fetches_and_normalizes_current_weather(stub):
+    state, base_url = stub
+    client, _ = make_client(base_url)
+
+    weather_data, status = client.get_current_weather('Mumbai', 'key')
+
+    assert status == 200
+    assert weather_data['city'] == 'Mumbai'
+    assert {'temperature', 'humidity', 'pressure', 'feels_like'} <= weather_data.keys()
+    assert state.requests == 1
+
+
+def test_retries_5xx_then_succeeds(stub):
+    state, base_url = stub
+    state.fail_next = 2
+    client, delays = make_client(base_url)
+
+    weather_data, status = client.get_current_weather('Mumbai', 'key')
+
+    assert status == 200
+    assert state.requests == 3
+    assert len(delays) == 2
+    assert client.stats()['retries'] == 2
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_gives_up_after_max_retries(stub):
+    state, base_url = stub
+    state.fail_next = 10
+    client, delays = make_client(base_url, max_retries=2)
+
+    weather_data, status = client.get_current_weather('Mumbai', 'key')
+
+    assert status == 503
+    assert weather_data == {'error': 'Weather API error: 503'}
+    assert state.requests == 3
+
+
+def test_does_not_retry_client_errors(stub):
+    state, base_url = stub
+    client, delays = make_client(base_url)
+
+    weather_data, status = client.get_current_weather('Atlantis', 'key')
+
+    assert status == 404
+    assert state.requests == 1
+    assert delays == []
+
+
+def test_429_honours_retry_after(stub):
+    state, base_url = stub
+    state.fail_next, state.fail_status, state.retry_after = 1, 429, 2
+    client, delays = make_client(base_url, backoff_max=4.0)
+
+    weather_data, status = client.get_current_weather('Mumbai', 'key')
+
+    assert status == 200
+    assert delays == [2.0]
+    # A 429 says the upstream is up, so it does not count against the breaker
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_429_retry_after_beyond_backoff_cap_falls_back_to_jitter(stub):
+    state, base_url = stub
+    state.fail_next, state.fail_status, state.retry_after = 1, 429, 60
+    client, delays = make_client(base_url, backoff_base=0.25, backoff_max=4.0)
+
+    client.get_current_weather('Mumbai', 'key')
+
+    assert len(delays) == 1 and 0 <= delays[0] <= 0.25
+
+
+def test_breaker_opens_then_half_opens_then_closes(stub):
+    state, base_url = stub
+    clock = [0.0]
+    client, _ = make_client(base_url, max_retries=0)
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=lambda: clock[0])
+
+    state.fail_next = 2
+    client.get_current_weather('Mumbai', 'key')
+    client.get_current_weather('Mumbai', 'key')
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    # Open: fail fast without calling upstream
+    weather_data, status = client.get_current_weather('Mumbai', 'key')
+    assert status is None
+    assert weather_data['retry_after'] == 31
+    assert state.requests == 2
+    assert client.stats()['short_circuited'] == 1
+
+    # After reset_timeout one probe goes through; its success closes the circuit
+    clock[0] = 30.0
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    weather_data, status = client.get_current_weather('Mumbai', 'key')
+    assert status == 200
+    assert state.requests == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_half_open_probe_reopens_breaker(stub):
+    state, base_url = stub
+    clock = [0.0]
+    client, _ = make_client(base_url, max_retries=0)
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=lambda: clock[0])
+
+    state.fail_next = 2
+    client.get_current_weather('Mumbai', 'key')
+    clock[0] = 30.0
+    client.get_current_weather('Mumbai', 'key')
+
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.breaker.times_opened == 2
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    clock = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=lambda: clock[0])
+    breaker.record_failure()
+    clock[0] = 30.0
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    # A probe abandoned by its caller says nothing about upstream; another may probe
+    breaker.record_abandoned()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_connection_errors_are_retried_and_mapped():
+    client, delays = make_client('http://127.0.0.1:1', max_retries=1)
+
+    weather_data, status = client.get_current_weather('Mumbai', 'key')
+
+    assert status is None
+    assert weather_data == {'error': 'Unable to connect to weather service'}
+    assert len(delays) == 1
+
+
+def test_sheds_calls_beyond_max_inflight(stub):
+    _, base_url = stub
+    client, _ = make_client(base_url, max_inflight=1)
+    client.inflight = 1  # another call is already upstream
+
+    weather_data, status = client.get_current_weather('Mumbai', 'key')
+
+    assert status is None
+    assert weather_data['retry_after'] == 1
+    assert client.stats()['shed'] == 1
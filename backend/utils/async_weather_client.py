@@ -0,0 +1,99 @@
+# utils/async_weather_client.py
+"""asyncio transport for WeatherClient, used by the ASGI entry point.
+
+Wraps a WeatherClient and drives its public retry, circuit breaker and
+error handling helpers, so both transports share one policy and one set
+of counters; only the HTTP calls differ. They go through an aiohttp
+session, so one event loop can keep many upstream requests in flight
+without a thread each. Needs aiohttp.
+"""
+import asyncio
+import functools
+import json
+import logging
+
+import aiohttp
+
+from utils.metrics import now
+from utils.weather_client import _FETCH_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# aiohttp's exceptions for each kind of failure WeatherClient.error_response reports.
+# ServerTimeoutError is also a ClientConnectionError; it counts as a timeout.
+TIMEOUT_ERRORS = (asyncio.TimeoutError,)
+CONNECTION_ERRORS = (aiohttp.ClientConnectionError,)
+REQUEST_ERRORS = (aiohttp.ClientError,)
+
+
+class AsyncWeatherClient:
+    """Non-blocking OpenWeatherMap client sharing state with a WeatherClient.
+
+    ``connections`` caps the open upstream connections. The session is
+    created on first use because it belongs to the running event loop.
+    Timeouts are not retried, as with the blocking client's read timeouts.
+    A cancelled request (the client went away) does not count against the
+    circuit breaker.
+    """
+
+    def __init__(self, client, connections=100):
+        self.client = client
+        self.connections = connections
+        self.session = None
+
+    def _session(self):
+        if self.session is None:
+            connect_timeout, read_timeout = self.client.timeout
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout))
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def request(self, path, params):
+        """GET base_url/path with retries; returns (status, headers, body)"""
+        client = self.client
+        url = client.url(path)
+        for attempt in range(client.max_retries + 1):
+            client.begin_attempt()
+            try:
+                async with self._session().get(url, params=params) as response:
+                    status, headers, body = response.status, response.headers, await response.read()
+            except Exception as e:
+                retryable = isinstance(e, CONNECTION_ERRORS) and not isinstance(e, TIMEOUT_ERRORS)
+                delay = client.attempt_failed(attempt, retryable)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:  # asyncio.CancelledError
+                client.attempt_abandoned()
+                raise
+            finally:
+                client.end_attempt()
+
+            delay = client.attempt_answered(attempt, status, headers.get('Retry-After'))
+            if delay is None:
+                return status, headers, body
+            await asyncio.sleep(delay)
+
+    async def get_current_weather(self, city, api_key):
+        """Fetch and normalize current weather; returns (weather_data, HTTP status or None)"""
+        params = {
+            'q': city.strip(),
+            'appid': api_key,
+            'units': 'metric'
+        }
+
+        try:
+            logger.info("Fetching weather data for %s", city)
+            t0 = now()
+            status, _, body = await self.request('weather', params)
+            _FETCH_LATENCY.observe(now() - t0)
+            return self.client.weather_response(city, status, functools.partial(json.loads, body))
+        except Exception as e:
+            return self.client.error_response(city, e, TIMEOUT_ERRORS, CONNECTION_ERRORS, REQUEST_ERRORS)
@@ -0,0 +1,58 @@
+# utils/booster_pool.py
+import queue
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class BoosterPool:
+    """Fixed pool of XGBoost booster handles for concurrent request threads.
+
+    Each handle is an independent copy of the loaded model with its own
+    bounded ``nthread``, so N gunicorn threads never share one native booster
+    and the process never oversubscribes cores. Threads beyond the pool size
+    wait for a handle to be returned.
+    """
+
+    def __init__(self, booster, size=1, nthread=1):
+        if size < 1:
+            raise ValueError(f"Booster pool size must be at least 1, got {size}")
+        self.size = size
+        self.nthread = nthread
+        self._handles = queue.Queue(maxsize=size)
+        for i in range(size):
+            handle = booster if i == 0 else booster.copy()
+            handle.set_param({'nthread': nthread})
+            self._handles.put(handle)
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a booster handle for the duration of the with-block"""
+        handle = self._handles.get()
+        try:
+            yield handle
+        finally:
+            self._handles.put(handle)
+
+    def warm_up(self, n_features):
+        """Run one throwaway prediction on every handle, holding all of them meanwhile"""
+        X = np.zeros((1, n_features), dtype=np.float32)
+        handles = [self._handles.get() for _ in range(self.size)]
+        try:
+            for handle in handles:
+                handle.inplace_predict(X, validate_features=False)
+        finally:
+            for handle in handles:
+                self._handles.put(handle)
+
+    def inplace_predict(self, X):
+        """Predict on a contiguous float32 matrix without building a DMatrix"""
+        with self.acquire() as handle:
+            return handle.inplace_predict(X, validate_features=False)
+
+    def predict(self, X):
+        """Predict through a DMatrix (reference path)"""
+        import xgboost as xgb
+        dmatrix = xgb.DMatrix(X)
+        with self.acquire() as handle:
+            return handle.predict(dmatrix)
@@ -0,0 +1,223 @@
+# utils/bulk_scoring.py
+"""Stream large CSV/Parquet files through the XGBoost model in fixed-size chunks.
+
+Only the feature columns named in the model's feature list (plus any
+pass-through columns) are parsed. Each chunk is scored with one vectorized
+model call and written out before more input is read, so memory stays
+bounded by the chunk size whatever the file size. Parquet needs pyarrow.
+
+CSV chunks travel as raw lines and are parsed where they are scored, so
+with a process pool the parsing (the expensive part) is spread over the
+workers too. CSV rows must not contain quoted line breaks.
+"""
+import csv
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+PREDICTION_COLUMN = 'predicted_temperature'
+
+_worker_predictor = None
+_worker_ready = None
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Parquet support needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+
+def _check_columns(path, available, wanted):
+    missing = [c for c in wanted if c not in available]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+
+
+def _parse_float(cell):
+    try:
+        return float(cell)
+    except ValueError:
+        return np.nan
+
+
+def parse_csv_lines(lines, feature_idx, keep_idx):
+    """(feature matrix, kept column values) for a list of raw CSV lines.
+
+    np.loadtxt parses the whole chunk in C; a chunk with empty or non-numeric
+    feature cells falls back to the csv module for the features, with those
+    cells as NaN. Both skip blank lines.
+    """
+    options = dict(delimiter=',', quotechar='"', comments=None, ndmin=2)
+    try:
+        X = np.loadtxt(lines, usecols=feature_idx, dtype=np.float64, **options)
+    except ValueError:
+        X = np.array([[_parse_float(row[i]) for i in feature_idx] for row in csv.reader(lines) if row],
+                     dtype=np.float64).reshape(-1, len(feature_idx))
+    kept = []
+    if keep_idx:
+        kept = np.loadtxt(lines, usecols=keep_idx, dtype=str, **options).T.tolist()
+    return X, kept
+
+
+def iter_csv_chunks(path, features, keep, chunk_size):
+    """Yield (raw lines, feature column indices, keep column indices) per chunk of a CSV file"""
+    with open(path, newline='') as f:
+        header = next(csv.reader([f.readline()]))
+        _check_columns(path, header, features + keep)
+        feature_idx = [header.index(c) for c in features]
+        keep_idx = [header.index(c) for c in keep]
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            yield lines, feature_idx, keep_idx
+
+
+def iter_parquet_chunks(path, features, keep, chunk_size):
+    """Yield (feature matrix, kept column values) per record batch of a Parquet file"""
+    pa = _require_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(path)
+    _check_columns(path, parquet_file.schema_arrow.names, features + keep)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(dict.fromkeys(features + keep))):
+        X = np.column_stack([batch.column(c).to_numpy(zero_copy_only=False).astype(np.float64)
+                             for c in features])
+        yield X, [batch.column(c).to_pylist() for c in keep]
+
+
+class CsvResultWriter:
+    def __init__(self, path, keep):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(keep + [PREDICTION_COLUMN])
+
+    def write(self, kept, predictions):
+        formatted = ['' if np.isnan(p) else f'{p:.4f}' for p in predictions.tolist()]
+        self._writer.writerows(zip(*kept, formatted))
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    def __init__(self, path, keep):
+        self._pa = _require_pyarrow()
+        self._path = path
+        self._keep = keep
+        self._writer = None
+
+    def write(self, kept, predictions):
+        pa = self._pa
+        columns = {name: pa.array(values) for name, values in zip(self._keep, kept)}
+        columns[PREDICTION_COLUMN] = pa.array(predictions, from_pandas=True)  # NaN -> null
+        table = pa.table(columns)
+        if self._writer is None:
+            self._writer = pa.parquet.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _init_worker(predictor_kwargs, quiet=True, ready=None):
+    global _worker_predictor, _worker_ready
+    from utils.predictor import WeatherPredictor
+    if quiet:
+        # Every worker loading the model would repeat the same startup lines
+        logging.disable(logging.INFO)
+    _worker_predictor = WeatherPredictor(**predictor_kwargs)
+    _worker_ready = ready
+
+
+def _wait_for_workers():
+    # Each pool process blocks here once, so all of them have loaded the model when these return
+    _worker_ready.wait()
+
+
+def _score_csv_chunk(lines, feature_idx, keep_idx):
+    X, kept = parse_csv_lines(lines, feature_idx, keep_idx)
+    return kept, _worker_predictor.score_features(X)
+
+
+def _score_matrix_chunk(X, kept):
+    return kept, _worker_predictor.score_features(X)
+
+
+def score_file(input_path, output_path, model_path, chunk_size=50000, keep=(), workers=1, nthread=1):
+    """Score every row of input_path and write keep columns plus predictions to output_path.
+
+    With workers > 1 chunks are parsed and scored in a process pool while
+    this process reads and writes; at most 2 * workers chunks are in flight,
+    and results are written in input order. Returns row counts and
+    throughput; the time spent loading the model is reported separately and
+    not counted in the scoring time.
+    """
+    from utils.model_bundle import load_model_config
+    xgb_spec = load_model_config(model_path)['models']['xgboost']
+    with open(os.path.join(model_path, xgb_spec['features_file'])) as f:
+        features = json.load(f)
+    keep = list(keep)
+    predictor_kwargs = dict(model_path=model_path, enable_lstm=False, weather_cache_ttl=0,
+                            prediction_cache_size=0, booster_pool_size=1, booster_nthread=nthread)
+
+    if _is_parquet(input_path):
+        chunks, score_chunk = iter_parquet_chunks(input_path, features, keep, chunk_size), _score_matrix_chunk
+    else:
+        chunks, score_chunk = iter_csv_chunks(input_path, features, keep, chunk_size), _score_csv_chunk
+    writer = (ParquetResultWriter if _is_parquet(output_path) else CsvResultWriter)(output_path, keep)
+    load_started = time.perf_counter()
+    rows = scored = 0
+
+    def write(result):
+        nonlocal rows, scored
+        kept, predictions = result
+        writer.write(kept, predictions)
+        rows += len(predictions)
+        scored += int(np.count_nonzero(~np.isnan(predictions)))
+
+    try:
+        if workers > 1:
+            ready = multiprocessing.Barrier(workers)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(predictor_kwargs, True, ready)) as pool:
+                for future in [pool.submit(_wait_for_workers) for _ in range(workers)]:
+                    future.result()
+                started = time.perf_counter()
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, *chunk))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+        else:
+            _init_worker(predictor_kwargs, quiet=False)
+            started = time.perf_counter()
+            for chunk in chunks:
+                write(score_chunk(*chunk))
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'scored': scored,
+        'skipped': rows - scored,
+        'load_seconds': round(started - load_started, 3),
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds) if seconds > 0 else None,
+    }
@@ -0,0 +1,218 @@
+# utils/cache.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class _InFlight:
+    """A pending load that concurrent callers for the same key wait on"""
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache with per-entry TTL and single-flight loads.
+
+    ``get_or_load`` runs the loader at most once per key at a time: concurrent
+    misses for the same key block on the first caller's result instead of
+    each going upstream. The loader returns ``(value, ttl)``; a ttl of None or
+    <= 0 means the value is returned but not cached. ``get_or_load_async`` does
+    the same for coroutines on one event loop; the two do not coalesce with
+    each other.
+    """
+
+    def __init__(self, max_size=1024, clock=time.monotonic):
+        if max_size < 1:
+            raise ValueError(f"Cache size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._async_inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Return the cached value for key, or None if absent or expired"""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is None:
+                self.misses += 1
+            return value
+
+    def _get_locked(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        """Store value under key for ttl seconds, evicting the least recently used entries"""
+        if ttl is None or ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() once on a miss"""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                return value
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            value, ttl = loader()
+            call.value = value
+            self.set(key, value, ttl)
+            return value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    async def get_or_load_async(self, key, loader):
+        """Return the cached value for key, awaiting loader() once on a miss"""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                return value
+            future = self._async_inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._async_inflight[key] = asyncio.get_running_loop().create_future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # A waiter being cancelled must not cancel the shared load
+            return await asyncio.shield(future)
+
+        try:
+            value, ttl = await loader()
+            future.set_result(value)
+            self.set(key, value, ttl)
+            return value
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # retrieved here, so an unwaited failure is not logged
+            raise
+        finally:
+            with self._lock:
+                self._async_inflight.pop(key, None)
+
+    def clear(self):
+        """Drop all cached entries (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+class PredictionCache:
+    """LRU memo of model outputs keyed on quantized feature vectors.
+
+    Feature rows are rounded to ``precision`` decimals before being used as
+    keys, so near-identical requests share one entry. Entries are scoped to a
+    (model version, day of year) pair: when either changes the cache is
+    cleared, so a reload or a new day can never serve stale predictions.
+    """
+
+    def __init__(self, max_size=4096, precision=1):
+        self.precision = precision
+        self._cache = TTLCache(max_size)
+        self._scope = None
+        self._scope_lock = threading.Lock()
+        self.invalidations = 0
+
+    def _check_scope(self, scope):
+        if scope != self._scope:
+            with self._scope_lock:
+                if scope != self._scope:
+                    if self._scope is not None:
+                        self.invalidations += 1
+                    self._cache.clear()
+                    self._scope = scope
+
+    def key(self, X):
+        """Cache key for a feature row: its values rounded to the configured precision"""
+        # Adding 0.0 folds -0.0 into 0.0 so both round to the same key
+        return (np.round(X, self.precision) + 0.0).tobytes()
+
+    def get(self, key, scope):
+        self._check_scope(scope)
+        return self._cache.get(key)
+
+    def set(self, key, value, scope):
+        if scope == self._scope:
+            self._cache.set(key, value, float('inf'))
+
+    def clear(self):
+        with self._scope_lock:
+            self._cache.clear()
+            self._scope = None
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats.pop('coalesced', None)
+        stats.pop('expirations', None)
+        stats['precision'] = self.precision
+        stats['invalidations'] = self.invalidations
+        return stats
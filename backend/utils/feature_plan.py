@@ -0,0 +1,107 @@
+# utils/feature_plan.py
+import math
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Model features a plan can fill, in the order of the source vector rows are assembled from
+INPUT_FEATURES = ('temperature_celsius_lag1', 'temperature_celsius_lag2', 'humidity', 'pressure_mb',
+                  'feels_like_celsius', 'wind_speed_mps', 'visibility_km', 'dayofyear', 'sin_doy', 'cos_doy')
+CALENDAR_FEATURES = INPUT_FEATURES[7:]
+
+# Used when an observation has no wind speed or visibility
+DEFAULT_WIND_SPEED = 5.0
+DEFAULT_VISIBILITY = 10.0
+
+CORE_VALUES_ERROR = "Core weather parameters must be valid numeric values"
+
+# Row d - 1 holds (dayofyear, sin_doy, cos_doy) for day of year d. Each value is computed
+# exactly as the per-request code did, so features are unchanged bit for bit.
+DOY_TABLE = np.array([(float(d), np.sin(2 * np.pi * d / 365.0), np.cos(2 * np.pi * d / 365.0))
+                      for d in range(1, 367)])
+DOY_TABLE.flags.writeable = False
+_DOY_ROWS = [tuple(row) for row in DOY_TABLE.tolist()]
+
+_today = (0.0, 1)  # (time the cached day ends, its day of year)
+
+
+def day_of_year():
+    """Today's day of year in local time, recomputed once a day"""
+    global _today
+    ends, doy = _today
+    if time.time() >= ends:
+        today = date.today()
+        doy = today.timetuple().tm_yday
+        _today = (datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp(), doy)
+    return doy
+
+
+def core_error(temp, humidity, pressure, feels_like):
+    """The validation error for one observation's numeric core values, or None"""
+    try:
+        if not (math.isfinite(temp) and math.isfinite(humidity) and math.isfinite(pressure)
+                and math.isfinite(feels_like)):
+            return CORE_VALUES_ERROR
+    except OverflowError:  # an int too large for a float
+        return CORE_VALUES_ERROR
+    if not 0 <= humidity <= 100:
+        return f"Humidity must be between 0-100%, got {humidity}%"
+    return None
+
+
+def core_errors(core):
+    """core_error for every row of an N x 4 array (temperature, humidity, pressure, feels_like)"""
+    not_finite = ~np.isfinite(core).all(axis=1)
+    humidity = core[:, 1]
+    bad_humidity = ~not_finite & ((humidity < 0) | (humidity > 100))
+    errors = [None] * core.shape[0]
+    for i in np.flatnonzero(not_finite | bad_humidity):
+        errors[i] = CORE_VALUES_ERROR if not_finite[i] else f"Humidity must be between 0-100%, got {humidity[i]}%"
+    return errors
+
+
+class FeaturePlan:
+    """Where each input lands in a model's feature row, worked out once per feature list.
+
+    A single row is one gather from a small source vector; a matrix is one
+    column copy per feature. Features outside INPUT_FEATURES raise
+    ValueError when a row is built, as they did before plans.
+    """
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.index = {name: j for j, name in enumerate(self.features)}
+        self.missing = [name for name in self.features if name not in INPUT_FEATURES]
+        self.sources = tuple(INPUT_FEATURES.index(name) if name in INPUT_FEATURES else 0 for name in self.features)
+        self._order = np.array(self.sources, dtype=np.intp)
+        self.calendar = tuple((self.index[name], k) for k, name in enumerate(CALENDAR_FEATURES) if name in self.index)
+
+    def _check(self):
+        if self.missing:
+            raise ValueError(f"Missing required feature in model: '{self.missing[0]}'")
+
+    def row(self, lag1, lag2, humidity, pressure, feels_like, wind_speed, visibility, doy):
+        """1 x F feature row for one observation on day of year doy"""
+        self._check()
+        source = np.array((lag1, lag2, humidity, pressure, feels_like, wind_speed, visibility) + _DOY_ROWS[doy - 1],
+                          dtype=np.float64)
+        return source[self._order].reshape(1, -1)
+
+    def matrix(self, lag1, lag2, humidity, pressure, feels_like, wind_speed, visibility, doy):
+        """N x F feature matrix from equal-length input arrays, all on day of year doy.
+
+        Inputs the feature list does not use may be None.
+        """
+        self._check()
+        sources = (lag1, lag2, humidity, pressure, feels_like, wind_speed, visibility) + _DOY_ROWS[doy - 1]
+        X = np.empty((len(lag1), len(self.features)), dtype=np.float64)
+        for j, source in enumerate(self.sources):
+            X[:, j] = sources[source]
+        return X
+
+    def set_calendar(self, X, doy):
+        """Overwrite the day-of-year columns of X in place"""
+        row = _DOY_ROWS[doy - 1]
+        for j, k in self.calendar:
+            X[:, j] = row[k]
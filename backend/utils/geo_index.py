@@ -0,0 +1,102 @@
+# utils/geo_index.py
+import csv
+import math
+import threading
+import time
+from collections import namedtuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GeoPoint = namedtuple('GeoPoint', 'key lat lon value timestamp')
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex:
+    """Keyed points on the globe in a grid of ``cell_deg`` degree cells.
+
+    A radius query only visits the cells the radius overlaps (wrapping at
+    the antimeridian, widening towards the poles), so its cost depends on
+    how many points sit nearby, not on the size of the index. Inserting a
+    key again moves it; beyond ``max_points`` the least recently inserted
+    key is dropped. Cells hold tuples that are replaced, never mutated, so
+    lookups take no lock; inserts serialize on one.
+    """
+
+    def __init__(self, cell_deg=0.5, max_points=None):
+        self.cell_deg = cell_deg
+        self.max_points = max_points
+        self._lon_cells = max(1, round(360 / cell_deg))
+        self._cells = {}
+        self._points = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_deg), math.floor((lon + 180) / self.cell_deg) % self._lon_cells
+
+    def insert(self, key, lat, lon, value=None, timestamp=None):
+        point = GeoPoint(key, float(lat), float(lon), value, time.time() if timestamp is None else timestamp)
+        cell = self._cell(point.lat, point.lon)
+        with self._lock:
+            self._remove(key)
+            self._cells[cell] = self._cells.get(cell, ()) + (point,)
+            self._points[key] = point
+            if self.max_points is not None and len(self._points) > self.max_points:
+                self._remove(next(iter(self._points)))
+
+    def _remove(self, key):
+        old = self._points.pop(key, None)
+        if old is not None:
+            cell = self._cell(old.lat, old.lon)
+            remaining = tuple(p for p in self._cells[cell] if p.key != key)
+            if remaining:
+                self._cells[cell] = remaining
+            else:
+                del self._cells[cell]
+
+    def nearest(self, lat, lon, radius_km, max_age=None, now=None):
+        """(point, distance_km) for the closest point within radius_km (and max_age seconds), or None"""
+        min_time = None if max_age is None else (time.time() if now is None else now) - max_age
+        dlat = radius_km / KM_PER_DEGREE
+        row_lo = math.floor(max(-90.0, lat - dlat) / self.cell_deg)
+        row_hi = math.floor(min(90.0, lat + dlat) / self.cell_deg)
+        widest = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+        dlon = radius_km / (KM_PER_DEGREE * widest)
+        if dlon >= 180:
+            columns = range(self._lon_cells)
+        else:
+            col_lo = math.floor((lon + 180 - dlon) / self.cell_deg)
+            col_hi = math.floor((lon + 180 + dlon) / self.cell_deg)
+            columns = {c % self._lon_cells for c in range(col_lo, col_hi + 1)}
+
+        best, best_distance = None, radius_km
+        cells = self._cells
+        for row in range(row_lo, row_hi + 1):
+            for column in columns:
+                for point in cells.get((row, column), ()):
+                    if min_time is not None and point.timestamp < min_time:
+                        continue
+                    distance = haversine_km(lat, lon, point.lat, point.lon)
+                    if distance <= best_distance:
+                        best, best_distance = point, distance
+        return None if best is None else (best, best_distance)
+
+
+def load_stations(csv_path, index):
+    """Insert each city's latitude/longitude from a training CSV; returns the number of stations"""
+    with open(csv_path, newline='') as f:
+        stations = {row['city']: (row['latitude'], row['longitude'])
+                    for row in csv.DictReader(f) if row.get('city') and row.get('latitude') and row.get('longitude')}
+    for city, (lat, lon) in stations.items():
+        index.insert(city, lat, lon)
+    return len(stations)
@@ -0,0 +1,273 @@
+# utils/history_store.py
+import csv
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single-process use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Rolling-window sizes, matching the temperature_celsius_roll_* features
+ROLLING_WINDOWS = (3, 7, 14)
+CITY_KEY_BYTES = 64
+
+
+class HistoryStore:
+    """Per-city temperature history in fixed-size NumPy ring buffers.
+
+    Each city owns one record holding its last ``depth`` values plus running
+    sums and sums of squares for every rolling window, so recording a value
+    and reading lag/rolling features are O(1). Sums are recomputed from the
+    buffer each time it wraps to stop floating-point drift. One slot beyond
+    ``depth`` holds the current interval's value, so every lag is still
+    available when features are read for that observation.
+
+    With ``path`` the records live in a memory-mapped file: forked or
+    independent workers share one store and it survives restarts. Writers
+    serialize on an flock; readers don't lock.
+
+    Values closer together than ``min_interval`` seconds replace the latest
+    entry instead of pushing a new one, so lags keep the training cadence
+    (one value per day by default) however often a city is fetched.
+    """
+
+    def __init__(self, path=None, capacity=1024, depth=14, min_interval=86400.0):
+        self.path = path
+        self.capacity = capacity
+        self.lags = max(depth, max(ROLLING_WINDOWS))
+        self.depth = self.lags + 1
+        self.min_interval = min_interval
+        self.dtype = np.dtype([
+            ('city', f'S{CITY_KEY_BYTES}'),
+            ('count', 'i8'),
+            ('head', 'i8'),
+            ('updated', 'f8'),
+            ('values', 'f8', (self.depth,)),
+            ('sums', 'f8', (len(ROLLING_WINDOWS),)),
+            ('sumsq', 'f8', (len(ROLLING_WINDOWS),)),
+        ])
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._lock_file = None
+        self.records = self._open()
+
+    def _open(self):
+        if self.path is None:
+            return np.zeros(self.capacity, dtype=self.dtype)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock_file = open(self.path + '.lock', 'a+')
+        expected_size = self.capacity * self.dtype.itemsize
+        with self._file_lock():
+            if os.path.exists(self.path) and os.path.getsize(self.path) != expected_size:
+                logger.warning(f"History store {self.path} has an incompatible layout, recreating it")
+                os.remove(self.path)
+            mode = 'r+' if os.path.exists(self.path) else 'w+'
+            return np.memmap(self.path, dtype=self.dtype, mode=mode, shape=(self.capacity,))
+
+    def reset_after_fork(self):
+        """Reopen the lock file in a forked worker.
+
+        flock locks belong to the open file description, which a fork
+        shares, so a worker using its parent's descriptor would not be
+        excluded by the parent or by its sibling workers.
+        """
+        self._lock = threading.Lock()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = open(self.path + '.lock', 'a+')
+
+    @contextmanager
+    def _file_lock(self):
+        if self._lock_file is None or fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _key(city):
+        return ' '.join(city.lower().split()).encode('utf-8')[:CITY_KEY_BYTES]
+
+    def _find_slot(self, key):
+        """Slot of a city, refreshing the local index from the shared records on a miss"""
+        slot = self._slots.get(key)
+        if slot is not None and self.records['city'][slot] == key:
+            return slot
+        matches = np.flatnonzero(self.records['city'] == key)
+        if matches.size == 0:
+            self._slots.pop(key, None)
+            return None
+        self._slots[key] = int(matches[0])
+        return self._slots[key]
+
+    def _allocate_slot(self, key):
+        """Claim an empty slot, evicting the least recently updated city when full"""
+        empty = np.flatnonzero(self.records['count'] == 0)
+        slot = int(empty[0]) if empty.size else int(np.argmin(self.records['updated']))
+        self.records[slot] = np.zeros((), dtype=self.dtype)
+        self.records['city'][slot] = key
+        self._slots[key] = slot
+        return slot
+
+    def __len__(self):
+        return int(np.count_nonzero(self.records['count']))
+
+    def __contains__(self, city):
+        return self._find_slot(self._key(city)) is not None
+
+    def record(self, city, value, timestamp=None):
+        """Add one observation for a city in O(1)"""
+        value = float(value)
+        if not np.isfinite(value):
+            return
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        key = self._key(city)
+        with self._lock, self._file_lock():
+            slot = self._find_slot(key)
+            if slot is None:
+                slot = self._allocate_slot(key)
+            rec = self.records[slot:slot + 1]
+            count = int(rec['count'][0])
+            if count and timestamp - rec['updated'][0] < self.min_interval:
+                self._replace_latest(rec, value)
+            else:
+                self._push(rec, value, timestamp)
+
+    def _push(self, rec, value, timestamp):
+        # values/sums/sumsq are views into the record, so updates land in place
+        values, sums, sumsq = rec['values'][0], rec['sums'][0], rec['sumsq'][0]
+        head, count = int(rec['head'][0]), int(rec['count'][0])
+        for i, window in enumerate(ROLLING_WINDOWS):
+            if count >= window:
+                leaving = values[(head - window) % self.depth]
+                sums[i] += value - leaving
+                sumsq[i] += value * value - leaving * leaving
+            else:
+                sums[i] += value
+                sumsq[i] += value * value
+        values[head] = value
+        head = (head + 1) % self.depth
+        if head == 0:
+            self._recompute(values, sums, sumsq, head, min(count + 1, self.depth))
+        rec['head'][0] = head
+        rec['count'][0] = min(count + 1, self.depth)
+        rec['updated'][0] = timestamp
+
+    def _replace_latest(self, rec, value):
+        values, sums, sumsq = rec['values'][0], rec['sums'][0], rec['sumsq'][0]
+        latest = (int(rec['head'][0]) - 1) % self.depth
+        old = values[latest]
+        sums += value - old
+        sumsq += value * value - old * old
+        values[latest] = value
+
+    def _recompute(self, values, sums, sumsq, head, count):
+        """Exact window sums from the buffer; amortized O(1) when done once per wrap"""
+        recent = self._latest_first(values, head, count)
+        for i, window in enumerate(ROLLING_WINDOWS):
+            window_values = recent[:window]
+            sums[i] = window_values.sum()
+            sumsq[i] = np.dot(window_values, window_values)
+
+    def _latest_first(self, values, head, count):
+        order = (head - 1 - np.arange(count)) % self.depth
+        return values[order]
+
+    def _current(self, rec, before):
+        """1 if the latest entry is the one an observation at time ``before`` would replace, else 0"""
+        return int(before is not None and int(rec['count']) > 0 and before - rec['updated'] < self.min_interval)
+
+    def history(self, city, before=None):
+        """Stored values for a city, most recent first (empty if unknown).
+
+        With ``before`` (a timestamp), the entry of the interval containing it
+        is left out, so only values older than an observation made then remain.
+        """
+        slot = self._find_slot(self._key(city))
+        if slot is None:
+            return np.empty(0)
+        rec = self.records[slot]
+        recent = self._latest_first(rec['values'], int(rec['head']), int(rec['count']))
+        return recent[self._current(rec, before):]
+
+    def features(self, city, before=None):
+        """Lag and rolling-window features for a city, or None if it has no history.
+
+        temperature_celsius_lag1 is the most recent value; with ``before`` it
+        is the most recent value older than an observation made then (see
+        history). Like the training data, rolling windows cover the lags and
+        not the observation itself. Lags and windows that need more history
+        than is stored are NaN.
+        """
+        slot = self._find_slot(self._key(city))
+        if slot is None:
+            return None
+        rec = self.records[slot]
+        skip = self._current(rec, before)
+        values = self._latest_first(rec['values'], int(rec['head']), int(rec['count']))
+        recent = values[skip:]
+        count = recent.size
+        if count == 0:
+            return None
+
+        features = {}
+        for lag in range(1, self.lags + 1):
+            features[f'temperature_celsius_lag{lag}'] = float(recent[lag - 1]) if lag <= count else np.nan
+        for i, window in enumerate(ROLLING_WINDOWS):
+            mean = std = np.nan
+            if count >= window:
+                total, squares = rec['sums'][i], rec['sumsq'][i]
+                if skip:
+                    # The running sums end at the current entry; slide them back by one
+                    total += values[window] - values[0]
+                    squares += values[window] * values[window] - values[0] * values[0]
+                mean = total / window
+                std = np.sqrt(max((squares - window * mean * mean) / (window - 1), 0.0))
+            features[f'temperature_celsius_roll_mean_{window}'] = float(mean)
+            features[f'temperature_celsius_roll_std_{window}'] = float(std)
+        return features
+
+    def seed_from_csv(self, csv_path):
+        """Seed cities from a feature-engineered CSV such as combined_weather_data_fe.csv.
+
+        Rows are replayed per city in timestamp order. A city's first row also
+        contributes its lag columns so the buffer starts full.
+        """
+        with open(csv_path, newline='') as f:
+            rows = sorted(csv.DictReader(f), key=lambda r: r.get('timestamp', ''))
+
+        seen = set()
+        for row in rows:
+            city = row.get('city')
+            if not city:
+                continue
+            try:
+                ts = datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S').timestamp()
+            except (KeyError, ValueError):
+                ts = time.time()
+            if city not in seen:
+                seen.add(city)
+                for lag in range(self.lags, 0, -1):
+                    lag_value = row.get(f'temperature_celsius_lag{lag}')
+                    if lag_value not in (None, ''):
+                        self.record(city, lag_value, ts - lag * self.min_interval)
+            self.record(city, row['temperature_celsius'], ts)
+        logger.info(f"Seeded history store with {len(seen)} cities from {csv_path}")
+        return len(seen)
+
+    def flush(self):
+        if isinstance(self.records, np.memmap):
+            self.records.flush()
@@ -0,0 +1,155 @@
+# utils/logging_config.py
+"""Root log handler setup: synchronous text (the default) or queue-based JSON.
+
+In async mode request threads only build the LogRecord and put it on a
+bounded queue; a background QueueListener thread formats and writes it.
+Success-path records (below WARNING) can be sampled; warnings and errors
+always pass, and errors wait for queue space rather than being dropped.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding
+    orjson = None
+
+LOG_FORMATS = ('plain', 'json')
+
+# Same layout as logging.basicConfig's default
+PLAIN_FORMAT = '%(levelname)s:%(name)s:%(message)s'
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_traceback_formatter = logging.Formatter()
+_handler = None
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode()
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SuccessSampler(logging.Filter):
+    """Pass every WARNING-or-above record and a sample_rate fraction of the rest"""
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.sample_rate
+
+
+class AsyncQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stdlib QueueHandler formats every message in the calling thread;
+    here records are queued as-is, with only tracebacks rendered up front.
+    When the queue is full, records below ERROR are dropped and counted.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Traceback objects pin whole frames; keep only the text
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.ERROR:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
+
+
+def configure_logging(level='INFO', fmt='plain', async_mode=False, sample_rate=1.0, queue_size=10000,
+                      stream=None):
+    """Install the root handler, replacing one installed by an earlier call.
+
+    fmt is 'plain' (basicConfig's text layout) or 'json'. async_mode moves
+    formatting and writing to a background thread. sample_rate keeps that
+    fraction of records below WARNING.
+    """
+    global _handler, _listener
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{fmt}', expected one of {LOG_FORMATS}")
+    stop_logging()
+
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(PLAIN_FORMAT))
+    if async_mode:
+        log_queue = queue.Queue(maxsize=queue_size)
+        _handler = AsyncQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, writer)
+        _listener.start()
+    else:
+        _handler = writer
+    if sample_rate < 1.0:
+        _handler.addFilter(SuccessSampler(sample_rate))
+
+    root.addHandler(_handler)
+    root.setLevel(level)
+    return _handler
+
+
+def restart_after_fork():
+    """Give a forked worker its own queue and writer thread.
+
+    The listener thread does not survive fork, and the inherited queue's
+    locks may have been held by it at the moment of the fork.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.Queue(maxsize=_handler.queue.maxsize)
+    _handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers)
+    _listener.start()
+
+
+def stop_logging():
+    """Drain the queue and stop the writer thread, if one is running"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,159 @@
+# utils/lstm_worker.py
+import logging
+import multiprocessing
+import os
+import secrets
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener, wait
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _serve(address, authkey, model_file, scaler_x_path, scaler_y_path, lookback, n_features,
+           max_batch, ready):
+    """Entry point of the LSTM process: load the model, warm it up, then serve batched requests.
+
+    Only this process imports TensorFlow. Requests from every connected client
+    that are ready at the same moment are concatenated into one model call.
+    """
+    try:
+        import joblib
+        import tensorflow as tf
+
+        model = tf.keras.models.load_model(model_file, compile=False)
+        scaler_X = joblib.load(scaler_x_path)
+        scaler_y = joblib.load(scaler_y_path)
+        # Warm-up traces the graph so the first real request isn't slow
+        model.predict_on_batch(np.zeros((1, lookback, n_features), dtype=np.float32))
+        listener = Listener(address, authkey=authkey)
+    except Exception as e:
+        ready.send(('failed', f"{type(e).__name__}: {e}"))
+        return
+    ready.send(('ready', None))
+    ready.close()
+
+    connections = []
+    conn_lock = threading.Lock()
+
+    def accept_loop():
+        while True:
+            conn = listener.accept()
+            with conn_lock:
+                connections.append(conn)
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+
+    while True:
+        with conn_lock:
+            current = list(connections)
+        if not current:
+            time.sleep(0.05)
+            continue
+
+        pending = []
+        for conn in wait(current, timeout=0.05):
+            try:
+                pending.append((conn, conn.recv()))
+            except (EOFError, OSError):
+                with conn_lock:
+                    connections.remove(conn)
+        if not pending:
+            continue
+
+        # One model call for every request that arrived together
+        for start in range(0, len(pending), max_batch):
+            chunk = pending[start:start + max_batch]
+            try:
+                X = np.concatenate([x for _, x in chunk]).astype(np.float32, copy=False)
+                X_scaled = scaler_X.transform(X.reshape(-1, n_features)).reshape(X.shape)
+                y_scaled = np.asarray(model.predict_on_batch(X_scaled)).reshape(-1, 1)
+                y = scaler_y.inverse_transform(y_scaled).ravel()
+                replies, offset = [], 0
+                for conn, x in chunk:
+                    replies.append((conn, ('ok', y[offset:offset + len(x)])))
+                    offset += len(x)
+            except Exception as e:
+                replies = [(conn, ('error', f"{type(e).__name__}: {e}")) for conn, _ in chunk]
+            for conn, reply in replies:
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    pass
+
+
+class LSTMWorker:
+    """Client for an LSTM model served from a separate process.
+
+    TensorFlow is imported only in the spawned server process, so the API
+    processes that only use XGBoost never pay its import time or memory.
+    The server is started once (in the gunicorn master when preloading) and
+    every worker thread talks to it over its own connection; concurrent
+    requests are micro-batched into a single model call on the server side.
+    """
+
+    def __init__(self, model_file, scaler_x_path, scaler_y_path, lookback, n_features,
+                 max_batch=256, start_timeout=120.0, request_timeout=30.0):
+        self.lookback = lookback
+        self.n_features = n_features
+        self.request_timeout = request_timeout
+        self._authkey = secrets.token_bytes(16)
+        self._address = os.path.join(tempfile.mkdtemp(prefix='lstm-'), 'lstm.sock')
+        self._local = threading.local()
+
+        ctx = multiprocessing.get_context('spawn')
+        ready_recv, ready_send = ctx.Pipe(duplex=False)
+        self._process = ctx.Process(
+            target=_serve, name='lstm-server', daemon=True,
+            args=(self._address, self._authkey, model_file, scaler_x_path, scaler_y_path,
+                  lookback, n_features, max_batch, ready_send))
+        self._process.start()
+        ready_send.close()
+
+        if not ready_recv.poll(start_timeout):
+            self._process.terminate()
+            raise RuntimeError(f"LSTM server did not start within {start_timeout}s")
+        status, message = ready_recv.recv()
+        ready_recv.close()
+        if status != 'ready':
+            self._process.join(timeout=5)
+            raise RuntimeError(f"LSTM server failed to start: {message}")
+        logger.info(f"LSTM server ready (pid={self._process.pid})")
+
+    def reset_after_fork(self):
+        """Forget connections inherited from the parent; each process opens its own"""
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = Client(self._address, authkey=self._authkey)
+        return conn
+
+    def predict(self, X):
+        """Predict for a (N, lookback, n_features) array of sequences, in degrees Celsius"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 3 or X.shape[1:] != (self.lookback, self.n_features):
+            raise ValueError(f"Expected sequences of shape (N, {self.lookback}, {self.n_features}), got {X.shape}")
+        conn = self._connection()
+        try:
+            conn.send(X)
+            if not conn.poll(self.request_timeout):
+                raise TimeoutError(f"LSTM server did not answer within {self.request_timeout}s")
+            status, payload = conn.recv()
+        except (EOFError, OSError, TimeoutError):
+            # Drop the connection so a late reply can't be read by the next request
+            self._local.conn = None
+            conn.close()
+            raise
+        if status != 'ok':
+            raise RuntimeError(f"LSTM inference failed: {payload}")
+        return payload
+
+    def close(self):
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=5)
@@ -0,0 +1,275 @@
+# utils/metrics.py
+"""Minimal Prometheus-style metrics: counters, gauges and histograms.
+
+Label lookups are done once (``labels()`` returns a cached child that call
+sites keep) and histograms keep per-thread buckets, so the hot path of a
+timer is two perf_counter() calls, one bisect and two list updates with no
+lock. Metrics are per process; with several gunicorn workers each one
+reports its own.
+"""
+import math
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+# Seconds; spans sub-millisecond pipeline stages up to slow upstream calls
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+now = time.perf_counter
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class _ShardHolder:
+    """A thread's shard, held through a thread-local so it is released when the thread ends"""
+    __slots__ = ('shard', '__weakref__')
+
+    def __init__(self, shard):
+        self.shard = shard
+
+
+class _HistogramChild:
+    """Histogram with one bucket array per thread.
+
+    Each thread only ever writes its own shard, so observe() needs no lock;
+    a scrape sums the shards. Slot -1 of a shard holds the running sum.
+    When a thread ends its counts are folded into a base shard, so servers
+    that start a thread per request don't accumulate shards.
+    """
+    __slots__ = ('_bounds', '_local', '_base', '_shards', '_shards_lock')
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._local = threading.local()
+        self._base = self._empty()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _empty(self):
+        return [0] * (len(self._bounds) + 1) + [0.0]  # +Inf bucket, then sum
+
+    def _new_shard(self):
+        shard = self._empty()
+        holder = self._local.holder = _ShardHolder(shard)
+        weakref.finalize(holder, self._retire, shard)
+        with self._shards_lock:
+            self._shards.append(shard)
+        return shard
+
+    def _retire(self, shard):
+        with self._shards_lock:
+            for i, value in enumerate(shard):
+                self._base[i] += value
+            self._shards.remove(shard)
+
+    def observe(self, value):
+        try:
+            shard = self._local.holder.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        # Summed under the lock so a retiring shard is never counted twice
+        with self._shards_lock:
+            totals = list(self._base)
+            for shard in self._shards:
+                for i, value in enumerate(shard):
+                    totals[i] += value
+        return totals[:-1], totals[-1]
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Child metric for one combination of label values (created on first use)"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        """(suffix, label values, extra label, value) rows for the exposition format"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for suffix, values, extra, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} '
+                         f'{_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic counter; by convention its name ends in _total"""
+    type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in sorted(self._children.items()):
+            yield '', values, None, child.value
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def _samples(self):
+        for values, child in sorted(self._children.items()):
+            yield '', values, None, child.value
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _samples(self):
+        for values, child in sorted(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield '_bucket', values, ('le', _format_value(float(bound))), cumulative
+            yield '_count', values, None, cumulative
+            yield '_sum', values, None, total
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are read from a function at scrape time.
+
+    ``fn`` returns a dict mapping label-value tuples to numbers, which lets
+    existing stats() snapshots be exported without touching their hot paths.
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames, fn):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def _samples(self):
+        for values, value in sorted(self.fn().items()):
+            if value is not None:
+                yield '', values, None, value
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Re-registering a name replaces it (e.g. a second predictor's callbacks)
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# --- Metrics of the prediction service ---
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ('route', 'method'))
+PREDICTION_STAGE_LATENCY = REGISTRY.histogram(
+    'prediction_stage_duration_seconds', 'Time spent in each prediction pipeline stage', ('path', 'stage'))
+WEATHER_STAGE_LATENCY = REGISTRY.histogram(
+    'weather_stage_duration_seconds', 'Time spent fetching and parsing current weather', ('stage',))
+WEATHER_UPSTREAM_ERRORS = REGISTRY.counter(
+    'weather_upstream_errors_total', 'Failed OpenWeatherMap lookups by error type', ('type',))
+MODEL_LOAD_SECONDS = REGISTRY.histogram(
+    'model_load_duration_seconds', 'Time to load a model bundle', (),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+MODEL_RELOADS = REGISTRY.counter(
+    'model_reloads_total', 'Model hot reloads by outcome', ('outcome',))
+REQUESTS_SHED = REGISTRY.counter(
+    'http_requests_shed_total', 'Requests rejected by admission control by reason', ('reason',))
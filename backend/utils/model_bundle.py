@@ -0,0 +1,285 @@
+# utils/model_bundle.py
+# xgboost, joblib and sklearn are imported when a bundle is loaded so that
+# importing this module stays cheap.
+import hashlib
+import json
+import logging
+import os
+import time
+import warnings
+
+import numpy as np
+
+from utils.booster_pool import BoosterPool
+from utils.feature_plan import FeaturePlan
+from utils.lstm_worker import LSTMWorker
+from utils.metrics import MODEL_LOAD_SECONDS
+from utils.scaling import AffineScaler
+from utils.tree_evaluator import TreeEnsemble
+
+logger = logging.getLogger(__name__)
+
+# Supported model inference modes
+INFERENCE_MODES = ('inplace', 'dmatrix')
+
+# Used when model_config.json is missing or does not describe a model
+DEFAULT_MODEL_CONFIG = {
+    'lookback': 14,
+    'target': 'temperature_celsius',
+    'models': {
+        'xgboost': {
+            'model_file': 'xgb_weather_combined.model',
+            'scalers': ['scaler_X_combined.gz', 'scaler_y_combined.gz'],
+            'features_file': 'feature_list_xgb.json'
+        }
+    }
+}
+
+
+def load_model_config(model_path):
+    """Read model_config.json, falling back to the built-in XGBoost-only config"""
+    config_path = os.path.join(model_path, 'model_config.json')
+    if not os.path.exists(config_path):
+        logger.warning(f"Model config not found at {config_path}, using defaults")
+        return DEFAULT_MODEL_CONFIG
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    config.setdefault('lookback', DEFAULT_MODEL_CONFIG['lookback'])
+    config.setdefault('models', {})
+    config['models'].setdefault('xgboost', DEFAULT_MODEL_CONFIG['models']['xgboost'])
+    return config
+
+
+class ModelBundle:
+    """One loaded version of the model artifacts in a model directory.
+
+    A bundle is not modified after loading. Reloading builds a new bundle and
+    the predictor swaps its reference in a single assignment, so a request
+    that picked up the old bundle finishes on it.
+
+    The version is model_config.json's 'version' when set, otherwise a short
+    content hash of the XGBoost artifacts.
+    """
+
+    def __init__(self, model_path, fast_scaling=True, verify_scaling=False, inference_mode='inplace',
+                 booster_pool_size=1, booster_nthread=1, enable_lstm=True, numpy_trees_max_rows=16):
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode '{inference_mode}', expected one of {INFERENCE_MODES}")
+        self.model_path = model_path
+        self.fast_scaling = fast_scaling
+        self.verify_scaling = verify_scaling
+        self.inference_mode = inference_mode
+        self.numpy_trees_max_rows = numpy_trees_max_rows
+        self.lstm = None
+        self.lstm_features = []
+        self._load(booster_pool_size, booster_nthread, enable_lstm)
+
+    def _load(self, booster_pool_size, booster_nthread, enable_lstm):
+        try:
+            logger.info(f"Loading models from {self.model_path}")
+            started = time.perf_counter()
+            import joblib
+            import xgboost as xgb
+            from sklearn.exceptions import InconsistentVersionWarning
+            warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+
+            # Model files come from the registry in model_config.json
+            self.model_config = load_model_config(self.model_path)
+            xgb_spec = self.model_config['models']['xgboost']
+
+            # Load XGBoost model
+            self.xgb_model = xgb.Booster()
+            xgb_model_path = os.path.join(self.model_path, xgb_spec['model_file'])
+
+            if not os.path.exists(xgb_model_path):
+                raise FileNotFoundError(f"XGBoost model file not found: {xgb_model_path}")
+
+            self.xgb_model.load_model(xgb_model_path)
+            self.booster_pool = BoosterPool(self.xgb_model, booster_pool_size, booster_nthread)
+            logger.info(f"Successfully loaded XGBoost model "
+                        f"(pool={booster_pool_size}, nthread={booster_nthread}, mode={self.inference_mode})")
+
+            # Small batches are scored by a NumPy copy of the trees, skipping XGBoost's per-call cost
+            self.tree_ensemble = None
+            if self.numpy_trees_max_rows > 0:
+                self._compile_trees()
+
+            # Load scalers
+            scaler_x_path = os.path.join(self.model_path, xgb_spec['scalers'][0])
+            scaler_y_path = os.path.join(self.model_path, xgb_spec['scalers'][1])
+
+            if not os.path.exists(scaler_x_path):
+                raise FileNotFoundError(f"Feature scaler file not found: {scaler_x_path}")
+            if not os.path.exists(scaler_y_path):
+                raise FileNotFoundError(f"Target scaler file not found: {scaler_y_path}")
+
+            self.scaler_X = joblib.load(scaler_x_path)
+            self.scaler_y = joblib.load(scaler_y_path)
+            logger.info("Successfully loaded feature scalers")
+
+            # Precompile scalers into affine kernels
+            self.scaler_X_kernel = self.scaler_y_kernel = None
+            if self.fast_scaling:
+                self._compile_scalers()
+
+            # Load feature list
+            feature_list_path = os.path.join(self.model_path, xgb_spec['features_file'])
+            if not os.path.exists(feature_list_path):
+                raise FileNotFoundError(f"Feature list file not found: {feature_list_path}")
+
+            with open(feature_list_path, 'r') as f:
+                self.features = json.load(f)
+            logger.info(f"Loaded feature list with {len(self.features)} features")
+            self.doy_index = self.features.index('dayofyear') if 'dayofyear' in self.features else None
+            self.feature_plan = FeaturePlan(self.features)
+
+            # Version the artifacts so cached predictions never outlive them
+            self.artifact_paths = [os.path.join(self.model_path, 'model_config.json'),
+                                   xgb_model_path, scaler_x_path, scaler_y_path, feature_list_path]
+            self.version = str(self.model_config.get('version') or self.fingerprint(self.artifact_paths[1:]))
+            logger.info(f"Model version {self.version}")
+
+            # Optional sequence model, served out of process
+            if enable_lstm and 'lstm' in self.model_config['models']:
+                self._load_lstm(self.model_config['models']['lstm'])
+
+            self.load_seconds = time.perf_counter() - started
+            MODEL_LOAD_SECONDS.observe(self.load_seconds)
+            self.loaded_at = time.time()
+            logger.info("✅ Weather prediction models loaded successfully")
+
+        except FileNotFoundError as e:
+            logger.error(f"❌ Model file not found: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error loading models: {e}")
+            raise
+
+    @staticmethod
+    def fingerprint(paths):
+        """Short content hash identifying a set of model artifacts"""
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:12]
+
+    def artifact_signature(self):
+        """(path, mtime, size) of every artifact; changes when any file is replaced"""
+        signature = []
+        for path in self.artifact_paths:
+            try:
+                st = os.stat(path)
+                signature.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def _load_lstm(self, spec):
+        """Start the LSTM server process; the model stays unavailable if this fails"""
+        model_file = os.path.join(self.model_path, spec['model_file'])
+        scaler_x_path = os.path.join(self.model_path, spec['scalers'][0])
+        scaler_y_path = os.path.join(self.model_path, spec['scalers'][1])
+        features_path = os.path.join(self.model_path, spec['features_file'])
+        for path in (model_file, scaler_x_path, scaler_y_path, features_path):
+            if not os.path.exists(path):
+                logger.warning(f"LSTM model unavailable, file not found: {path}")
+                return
+
+        with open(features_path, 'r') as f:
+            self.lstm_features = json.load(f)
+        try:
+            self.lstm = LSTMWorker(model_file, scaler_x_path, scaler_y_path,
+                                   self.model_config['lookback'], len(self.lstm_features))
+            logger.info(f"Successfully loaded LSTM model with {len(self.lstm_features)} features")
+        except Exception as e:
+            logger.warning(f"LSTM model unavailable: {e}")
+
+    @property
+    def available_models(self):
+        """Names of the models this bundle can serve"""
+        return ['xgboost'] + (['lstm'] if self.lstm is not None else [])
+
+    def warm_up(self):
+        """Run a throwaway prediction through the serving path and on every pooled booster handle"""
+        X = np.zeros((1, len(self.features)))
+        self.inverse_scale(self.predict_scaled(self.scale_features(X)))
+        self.booster_pool.warm_up(len(self.features))
+
+    def close(self):
+        """Stop processes owned by this bundle"""
+        if self.lstm is not None:
+            self.lstm.close()
+
+    def _compile_scalers(self):
+        """Pull the scaler parameters out once and check them against sklearn"""
+        kernel_X = AffineScaler.from_sklearn(self.scaler_X)
+        kernel_y = AffineScaler.from_sklearn(self.scaler_y)
+        if kernel_X is None or kernel_y is None:
+            logger.warning("Unsupported scaler type, falling back to sklearn scaling")
+            return
+
+        rng = np.random.default_rng(0)
+        probe_X = rng.uniform(-100, 1100, size=(16, kernel_X.n_features))
+        probe_y = rng.uniform(-50, 60, size=(16, 1))
+        if not (kernel_X.verify(self.scaler_X, probe_X) and kernel_y.verify(self.scaler_y, probe_y)):
+            logger.warning("Scaler kernel does not match sklearn, falling back to sklearn scaling")
+            return
+
+        self.scaler_X_kernel = kernel_X
+        self.scaler_y_kernel = kernel_y
+        logger.info("Compiled feature scalers into NumPy kernels")
+
+    def _compile_trees(self):
+        """Compile the booster into a TreeEnsemble and check it against Booster.predict"""
+        ensemble = TreeEnsemble.from_booster(self.xgb_model)
+        if ensemble is None:
+            logger.warning("Booster not supported by the NumPy tree evaluator, using XGBoost for all batches")
+            return
+        if not ensemble.verify(self.xgb_model, ensemble.probe_inputs()):
+            logger.warning("NumPy tree evaluator does not match Booster.predict, using XGBoost for all batches")
+            return
+
+        self.tree_ensemble = ensemble
+        logger.info(f"Compiled {ensemble.n_trees} trees (depth {ensemble.depth}) into a NumPy evaluator "
+                    f"for batches of up to {self.numpy_trees_max_rows} rows")
+
+    def scale_features(self, X, out=None):
+        """Scale a feature matrix with the compiled kernel or sklearn"""
+        if self.scaler_X_kernel is None:
+            return self.scaler_X.transform(X)
+        if not self.verify_scaling:
+            return self.scaler_X_kernel.transform(X, out=out)
+        # Compute the reference first: the kernel may write into X in place
+        expected = self.scaler_X.transform(X)
+        X_scaled = self.scaler_X_kernel.transform(X, out=out)
+        if not np.allclose(X_scaled, expected):
+            logger.error("Feature scaling kernel mismatch, using sklearn result")
+            return expected
+        return X_scaled
+
+    def predict_scaled(self, X_scaled):
+        """Run the model on an already-scaled feature matrix"""
+        if self.tree_ensemble is not None and X_scaled.shape[0] <= self.numpy_trees_max_rows:
+            return self.tree_ensemble.predict(X_scaled)
+        if self.inference_mode == 'inplace':
+            return self.booster_pool.inplace_predict(np.ascontiguousarray(X_scaled, dtype=np.float32))
+        return self.booster_pool.predict(X_scaled)
+
+    def inverse_scale(self, prediction_scaled):
+        """Inverse-scale a 1-D array of model outputs"""
+        if self.scaler_y_kernel is None:
+            return self.scaler_y.inverse_transform(prediction_scaled.reshape(-1, 1)).ravel()
+        prediction = self.scaler_y_kernel.inverse_transform(prediction_scaled)
+        if self.verify_scaling:
+            expected = self.scaler_y.inverse_transform(prediction_scaled.reshape(-1, 1)).ravel()
+            if not np.allclose(prediction, expected):
+                logger.error("Target scaling kernel mismatch, using sklearn result")
+                return expected
+        return prediction
+
+    def inverse_scale_scalar(self, prediction_scaled):
+        """Inverse-scale a single model output"""
+        if self.scaler_y_kernel is None or self.verify_scaling:
+            return self.inverse_scale(np.array([prediction_scaled], dtype=np.float64))[0]
+        return self.scaler_y_kernel.inverse_transform_scalar(prediction_scaled)
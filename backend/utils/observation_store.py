@@ -0,0 +1,129 @@
+# utils/observation_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    city TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+class ObservationStore:
+    """Current-weather payloads in SQLite, shared by every worker and kept across restarts.
+
+    The database runs in WAL mode and each thread has its own connection,
+    so reads never wait on writers or on each other; only writes take
+    SQLite's write lock. Entries expire after the TTL they were stored with.
+    A background thread deletes expired entries every ``compact_interval``
+    seconds and trims the store to the ``max_entries`` most recent. Errors
+    are logged and treated as misses: the store never fails a request.
+    """
+
+    def __init__(self, path, max_entries=10000, compact_interval=60.0, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.compact_interval = compact_interval
+        self._clock = clock
+        self._local = threading.local()
+        self._compactor = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(_SCHEMA)
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def get(self, city):
+        """(payload, seconds left) for an unexpired entry, or None"""
+        try:
+            row = self._connection().execute(
+                'SELECT payload, expires_at FROM observations WHERE city = ? AND expires_at > ?',
+                (city, self._clock())).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Observation store read failed for {city}: {e}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1] - self._clock()
+
+    def put(self, city, payload, ttl):
+        """Store a payload for ttl seconds (ignored when ttl is None or <= 0)"""
+        if ttl is None or ttl <= 0:
+            return
+        now = self._clock()
+        try:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO observations (city, payload, fetched_at, expires_at) VALUES (?, ?, ?, ?)',
+                (city, json.dumps(payload), now, now + ttl))
+        except sqlite3.Error as e:
+            logger.warning(f"Observation store write failed for {city}: {e}")
+
+    def entries(self):
+        """(city, payload, seconds left) for every unexpired entry, most recent first"""
+        now = self._clock()
+        try:
+            rows = self._connection().execute(
+                'SELECT city, payload, expires_at FROM observations WHERE expires_at > ? '
+                'ORDER BY fetched_at DESC', (now,)).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Observation store read failed: {e}")
+            return []
+        return [(city, json.loads(payload), expires_at - now) for city, payload, expires_at in rows]
+
+    def warm(self, cache):
+        """Load unexpired entries into an in-process TTLCache; returns the payloads loaded"""
+        entries = self.entries()[:cache.max_size]
+        for city, payload, ttl in reversed(entries):  # most recent end up most recently used
+            cache.set(city, payload, ttl)
+        return [payload for _, payload, _ in entries]
+
+    def compact(self):
+        """Delete expired entries and trim to max_entries; returns the number removed"""
+        try:
+            db = self._connection()
+            removed = db.execute('DELETE FROM observations WHERE expires_at <= ?', (self._clock(),)).rowcount
+            removed += db.execute(
+                'DELETE FROM observations WHERE city IN '
+                '(SELECT city FROM observations ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)).rowcount
+            return removed
+        except sqlite3.Error as e:
+            logger.warning(f"Observation store compaction failed: {e}")
+            return 0
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM observations').fetchone()[0]
+
+    def start_compactor(self):
+        if self.compact_interval <= 0 or self._compactor is not None:
+            return
+        self._compactor = threading.Thread(target=self._compact_forever, name='observation-compactor', daemon=True)
+        self._compactor.start()
+
+    def _compact_forever(self):
+        while True:
+            time.sleep(self.compact_interval)
+            removed = self.compact()
+            if removed:
+                logger.info(f"Observation store compaction removed {removed} entries")
+
+    def reset_after_fork(self):
+        """Open fresh connections and restart compaction in a forked worker"""
+        self._local = threading.local()
+        self._compactor = None
+        self.start_compactor()
@@ -1,124 +1,327 @@
 # utils/predictor.py
-import pandas as pd
+import asyncio
 import numpy as np
-import xgboost as xgb
-import joblib
-import json
 import os
-from datetime import datetime
-import requests
-import warnings
+import time
+from datetime import date, datetime, timedelta
 import logging
-from sklearn.exceptions import InconsistentVersionWarning
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.cache import PredictionCache, TTLCache
+from utils.feature_plan import (CORE_VALUES_ERROR, DEFAULT_VISIBILITY, DEFAULT_WIND_SPEED, core_error, core_errors,
+                                day_of_year)
+from utils.geo_index import GeoIndex, load_stations
+from utils.history_store import HistoryStore
+from utils.metrics import MODEL_RELOADS, PREDICTION_STAGE_LATENCY, now
+from utils.model_bundle import INFERENCE_MODES, ModelBundle
+from utils.weather_client import WeatherClient
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure warnings
-warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+# Input fields accepted by the batch prediction path
+BATCH_REQUIRED_FIELDS = ('temperature', 'humidity', 'pressure', 'feels_like')
+BATCH_OPTIONAL_FIELDS = ('temperature_lag1', 'temperature_lag2', 'wind_speed', 'visibility')
+
+# Stage timers, bound once so the hot path skips the label lookup
+_SINGLE_STAGES = {stage: PREDICTION_STAGE_LATENCY.labels('single', stage)
+                  for stage in ('feature_build', 'scale', 'predict', 'inverse')}
+_BATCH_STAGES = {stage: PREDICTION_STAGE_LATENCY.labels('batch', stage)
+                 for stage in ('feature_build', 'scale', 'predict', 'inverse')}
+_FORECAST_STAGES = {stage: PREDICTION_STAGE_LATENCY.labels('forecast', stage)
+                    for stage in ('feature_build', 'rollout')}
+
+# Seconds a replaced bundle keeps its LSTM process for requests still using it
+RELOAD_GRACE_SECONDS = 30
+
+def normalize_city(city):
+    """Canonical cache key for a city name: trimmed, lower-case, single-spaced"""
+    return ' '.join(city.lower().split())
+
+def unique_cities(cities):
+    """City names with duplicates (by normalized name) removed, in request order"""
+    unique = {}
+    for city in cities:
+        unique.setdefault(normalize_city(city), city.strip())
+    return list(unique.values())
 
 class WeatherPredictor:
-    def __init__(self, model_path):
-        """Initialize the weather predictor with model path"""
+    def __init__(self, model_path, fast_scaling=True, verify_scaling=False,
+                 inference_mode='inplace', booster_pool_size=1, booster_nthread=1,
+                 weather_cache_ttl=300, weather_cache_size=1024, weather_cache_negative_ttl=60,
+                 weather_client=None, fanout_concurrency=8, enable_lstm=True, history_store=None,
+                 prediction_cache_size=4096, prediction_cache_precision=1, model_watch_interval=0,
+                 numpy_trees_max_rows=16, observation_store=None):
+        """Initialize the weather predictor with model path.
+
+        fast_scaling applies the scalers as precompiled NumPy kernels instead of
+        sklearn calls; verify_scaling additionally cross-checks every kernel
+        result against sklearn and falls back to it on mismatch.
+        inference_mode 'inplace' scores contiguous float32 arrays with
+        Booster.inplace_predict, 'dmatrix' builds a DMatrix per call.
+        booster_pool_size/booster_nthread size the pool of booster handles
+        shared by concurrent request threads.
+        numpy_trees_max_rows is the largest batch scored by a NumPy compilation
+        of the trees (checked against XGBoost at load) instead of the booster;
+        0 always uses the booster.
+        weather_cache_* configure the current-weather cache; a ttl of 0
+        disables it. Not-found cities are cached for weather_cache_negative_ttl.
+        weather_client is the OpenWeatherMap client; a default WeatherClient is
+        created when omitted.
+        fanout_concurrency bounds concurrent upstream fetches in forecast_cities.
+        enable_lstm serves the LSTM from model_config.json (when its files are
+        present) in a separate process.
+        history_store keeps per-city temperature history for real lag features;
+        an in-memory HistoryStore is created when omitted. An empty store is
+        seeded from combined_weather_data_fe.csv.
+        prediction_cache_* configure the memo of single predictions keyed on
+        the feature vector rounded to that many decimals; a size of 0 disables it.
+        model_watch_interval polls the model files every that many seconds and
+        hot-reloads the models when they change; 0 disables watching.
+        observation_store is an optional ObservationStore behind the weather
+        cache, shared by all workers; the cache is warmed from it at startup.
+        Fetched observations and the stations in combined_weather_data_fe.csv
+        are indexed by coordinates for get_weather_by_coords.
+        """
         logger.info("🚀 Initializing Weather Predictor...")
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode '{inference_mode}', expected one of {INFERENCE_MODES}")
         self.model_path = model_path
+        self.fast_scaling = fast_scaling
+        self.verify_scaling = verify_scaling
+        self.inference_mode = inference_mode
+        self.booster_pool_size = booster_pool_size
+        self.booster_nthread = booster_nthread
+        self.numpy_trees_max_rows = numpy_trees_max_rows
+        self.weather_cache_ttl = weather_cache_ttl
+        self.weather_cache_negative_ttl = weather_cache_negative_ttl
+        self.weather_cache = TTLCache(weather_cache_size) if weather_cache_ttl > 0 else None
+        self.weather_client = weather_client or WeatherClient()
+        self.observations = observation_store
+        self.stations = GeoIndex()
+        self.observed = GeoIndex(max_points=weather_cache_size)
+        if observation_store is not None and self.weather_cache is not None:
+            warmed = observation_store.warm(self.weather_cache)
+            for weather_data in warmed:
+                self._index_observation(weather_data)
+            logger.info(f"Warmed the weather cache with {len(warmed)} stored observations")
+            observation_store.start_compactor()
+        self.fanout_concurrency = fanout_concurrency
+        self._fanout_executor = None
+        self._fanout_lock = threading.Lock()
+        self.enable_lstm = enable_lstm
+        self.history = history_store if history_store is not None else HistoryStore()
+        self.prediction_cache = (PredictionCache(prediction_cache_size, prediction_cache_precision)
+                                 if prediction_cache_size > 0 else None)
+        self.bundle = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        self.reload_status = {'state': 'idle', 'reloads': 0, 'last_error': None, 'last_reload': None}
+        self.model_watch_interval = model_watch_interval
+        self._watcher = None
         self.load_models()
-        
+        self._seed_history()
+        self._load_stations()
+        self.start_model_watcher()
+
+    def reset_after_fork(self):
+        """Drop per-process resources inherited from a preloading parent.
+
+        Models, scalers and caches are kept (shared copy-on-write); thread
+        pools, watcher threads and pooled upstream connections must not
+        cross a fork.
+        """
+        self._fanout_executor = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        self.weather_client.reset_session()
+        self.history.reset_after_fork()
+        if self.observations is not None:
+            self.observations.reset_after_fork()
+        if self.bundle.lstm is not None:
+            self.bundle.lstm.reset_after_fork()
+        self._watcher = None
+        self.start_model_watcher()
+
     def load_models(self):
         """Load trained models and scalers"""
+        self.bundle = self._load_bundle(self.model_path)
+
+    def _load_bundle(self, model_path):
+        return ModelBundle(model_path, fast_scaling=self.fast_scaling, verify_scaling=self.verify_scaling,
+                           inference_mode=self.inference_mode, booster_pool_size=self.booster_pool_size,
+                           booster_nthread=self.booster_nthread, enable_lstm=self.enable_lstm,
+                           numpy_trees_max_rows=self.numpy_trees_max_rows)
+
+    def reload_models(self, model_path=None):
+        """Load a new model bundle, warm it up and swap it in atomically.
+
+        Requests already running keep the bundle they started with; new
+        requests see the new one as soon as the reference is swapped. A failed
+        load leaves the current bundle serving. Returns the new version.
+        """
+        with self._reload_lock:
+            model_path = model_path or self.model_path
+            previous = self.bundle
+            self.reload_status['state'] = 'loading'
+            try:
+                bundle = self._load_bundle(model_path)
+                bundle.warm_up()
+            except Exception as e:
+                logger.error(f"❌ Model reload from {model_path} failed, keeping version {previous.version}: {e}")
+                MODEL_RELOADS.labels('failure').inc()
+                self.reload_status.update(state='failed', last_error=str(e))
+                raise
+
+            # The swap: one reference assignment, atomic under the GIL
+            self.bundle = bundle
+            self.model_path = model_path
+            MODEL_RELOADS.labels('success').inc()
+            self.reload_status.update(state='idle', last_error=None, last_reload=datetime.now().isoformat(),
+                                      reloads=self.reload_status['reloads'] + 1)
+            logger.info(f"🔄 Swapped model version {previous.version} -> {bundle.version} "
+                        f"(loaded in {bundle.load_seconds:.2f}s)")
+            if previous.lstm is not None:
+                timer = threading.Timer(RELOAD_GRACE_SECONDS, previous.close)
+                timer.daemon = True
+                timer.start()
+            return bundle.version
+
+    def reload_models_async(self, model_path=None):
+        """Start reload_models on a background thread; False if a reload is already running"""
+        with self._reload_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            self.reload_status['state'] = 'loading'
+            self._reload_thread = threading.Thread(
+                target=self._reload_quietly, args=(model_path,), name='model-reload', daemon=True)
+            self._reload_thread.start()
+            return True
+
+    def _reload_quietly(self, model_path=None):
         try:
-            logger.info(f"Loading models from {self.model_path}")
-            
-            # Load XGBoost model
-            self.xgb_model = xgb.Booster()
-            xgb_model_path = os.path.join(self.model_path, 'xgb_weather_combined.model')
-            
-            if not os.path.exists(xgb_model_path):
-                raise FileNotFoundError(f"XGBoost model file not found: {xgb_model_path}")
-            
-            self.xgb_model.load_model(xgb_model_path)
-            logger.info("Successfully loaded XGBoost model")
-            
-            # Load scalers
-            scaler_x_path = os.path.join(self.model_path, 'scaler_X_combined.gz')
-            scaler_y_path = os.path.join(self.model_path, 'scaler_y_combined.gz')
-            
-            if not os.path.exists(scaler_x_path):
-                raise FileNotFoundError(f"Feature scaler file not found: {scaler_x_path}")
-            if not os.path.exists(scaler_y_path):
-                raise FileNotFoundError(f"Target scaler file not found: {scaler_y_path}")
-            
-            self.scaler_X = joblib.load(scaler_x_path)
-            self.scaler_y = joblib.load(scaler_y_path)
-            logger.info("Successfully loaded feature scalers")
-            
-            # Load feature list
-            feature_list_path = os.path.join(self.model_path, 'feature_list_xgb.json')
-            if not os.path.exists(feature_list_path):
-                raise FileNotFoundError(f"Feature list file not found: {feature_list_path}")
-                
-            with open(feature_list_path, 'r') as f:
-                self.features = json.load(f)
-            logger.info(f"Loaded feature list with {len(self.features)} features")
-            
-            logger.info("✅ Weather prediction models loaded successfully")
-            
-        except FileNotFoundError as e:
-            logger.error(f"❌ Model file not found: {e}")
-            raise
+            self.reload_models(model_path)
+        except Exception:
+            pass  # already logged and recorded in reload_status
+
+    def start_model_watcher(self):
+        """Poll the current bundle's files and reload when any of them changes"""
+        if self.model_watch_interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch_models, args=(self.bundle.artifact_signature(),),
+                                         name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch_models(self, signature):
+        while True:
+            time.sleep(self.model_watch_interval)
+            bundle = self.bundle
+            if bundle.artifact_signature() == signature:
+                continue
+            # Give a deploy that copies several files one interval to settle
+            time.sleep(self.model_watch_interval)
+            logger.info(f"Model files changed in {bundle.model_path}, reloading")
+            self._reload_quietly(bundle.model_path)
+            signature = self.bundle.artifact_signature()
+
+    def model_info(self):
+        """Version and reload state of the serving models"""
+        bundle = self.bundle
+        return {
+            'model_version': bundle.version,
+            'model_path': os.path.abspath(bundle.model_path),
+            'models_available': bundle.available_models,
+            'numpy_trees': bundle.tree_ensemble is not None,
+            'loaded_at': datetime.fromtimestamp(bundle.loaded_at).isoformat(),
+            'load_seconds': round(bundle.load_seconds, 3),
+            'reload': dict(self.reload_status),
+        }
+
+    @property
+    def model_version(self):
+        return self.bundle.version
+
+    @property
+    def features(self):
+        return self.bundle.features
+
+    def _seed_history(self):
+        """Seed an empty history store from the training data shipped with the models"""
+        csv_path = os.path.join(self.model_path, 'combined_weather_data_fe.csv')
+        if len(self.history) > 0 or not os.path.exists(csv_path):
+            return
+        try:
+            self.history.seed_from_csv(csv_path)
         except Exception as e:
-            logger.error(f"❌ Error loading models: {e}")
-            raise
-    
+            logger.warning(f"Could not seed history store from {csv_path}: {e}")
+
+    def _load_stations(self):
+        """Index the cities of the training data by coordinates"""
+        csv_path = os.path.join(self.model_path, 'combined_weather_data_fe.csv')
+        if not os.path.exists(csv_path):
+            return
+        try:
+            logger.info(f"Indexed {load_stations(csv_path, self.stations)} stations from {csv_path}")
+        except Exception as e:
+            logger.warning(f"Could not index stations from {csv_path}: {e}")
+
+    def history_lags(self, city):
+        """(lag1, lag2) from a city's recorded history; None where not enough history.
+
+        Only values older than the current interval count: get_current_weather
+        records today's reading before it is scored, and that reading is the
+        observation itself, not its lag.
+        """
+        if not city or not isinstance(city, str):
+            return None, None
+        recent = self.history.history(city, before=time.time())
+        return (float(recent[0]) if recent.size > 0 else None,
+                float(recent[1]) if recent.size > 1 else None)
+
+    @property
+    def available_models(self):
+        """Names of the models this predictor can currently serve"""
+        return self.bundle.available_models
+
+    def warm_up(self):
+        """Run one throwaway prediction so the first real request doesn't pay lazy setup costs"""
+        self.bundle.warm_up()
+
     def create_features(self, temp, humidity, pressure, feels_like, temp_lag1=None, temp_lag2=None, 
-                       wind_speed=None, visibility=None):
-        """Create features for prediction with validation"""
+                       wind_speed=None, visibility=None, city=None, bundle=None, validated=False):
+        """Create features for prediction with validation.
+
+        Missing lags are taken from the city's recorded history when a city is
+        given, and only synthesized from temp as a last resort. Features are
+        laid out by bundle's feature plan (the serving bundle when omitted).
+        Pass validated=True when the caller has already checked that every
+        input is a number.
+        """
         try:
-            # Validate numeric inputs
-            numeric_inputs = [temp, humidity, pressure, feels_like]
-            if not all(isinstance(x, (int, float)) and not np.isnan(float(x)) for x in numeric_inputs):
-                raise ValueError("Core weather parameters must be valid numeric values")
-            
-            # Validate ranges
+            if not validated and not all(isinstance(x, (int, float))
+                                         for x in (temp, humidity, pressure, feels_like)):
+                raise ValueError(CORE_VALUES_ERROR)
+            error = core_error(temp, humidity, pressure, feels_like)
+            if error is not None:
+                raise ValueError(error)
             if not (-50 <= temp <= 60):
                 logger.warning(f"Temperature {temp}°C is outside typical range (-50°C to 60°C)")
-            if not (0 <= humidity <= 100):
-                raise ValueError(f"Humidity must be between 0-100%, got {humidity}%")
             if not (800 <= pressure <= 1100):
                 logger.warning(f"Pressure {pressure}mb is outside typical range (800-1100mb)")
             
-            # Use provided lags or simulate them
-            lag1 = temp_lag1 if temp_lag1 is not None else temp - 0.5
-            lag2 = temp_lag2 if temp_lag2 is not None else temp - 1.0
-            
-            # Get current day of year
-            day_of_year = datetime.now().timetuple().tm_yday
+            # Use provided lags, then recorded history, then simulate them
+            if city is not None and (temp_lag1 is None or temp_lag2 is None):
+                history_lag1, history_lag2 = self.history_lags(city)
+                temp_lag1 = temp_lag1 if temp_lag1 is not None else history_lag1
+                temp_lag2 = temp_lag2 if temp_lag2 is not None else history_lag2
             
-            features = {
-                'temperature_celsius_lag1': float(lag1),
-                'temperature_celsius_lag2': float(lag2),
-                'humidity': float(humidity),
-                'pressure_mb': float(pressure),
-                'feels_like_celsius': float(feels_like),
-                'dayofyear': float(day_of_year),
-                'sin_doy': np.sin(2 * np.pi * day_of_year / 365.0),
-                'cos_doy': np.cos(2 * np.pi * day_of_year / 365.0)
-            }
+            return (bundle or self.bundle).feature_plan.row(
+                temp_lag1 if temp_lag1 is not None else temp - 0.5,
+                temp_lag2 if temp_lag2 is not None else temp - 1.0,
+                humidity, pressure, feels_like,
+                wind_speed if wind_speed is not None else DEFAULT_WIND_SPEED,
+                visibility if visibility is not None else DEFAULT_VISIBILITY,
+                day_of_year())
             
-            # Add optional features if they exist in the feature list
-            if 'wind_speed_mps' in self.features:
-                features['wind_speed_mps'] = float(wind_speed) if wind_speed is not None else 5.0
-            if 'visibility_km' in self.features:
-                features['visibility_km'] = float(visibility) if visibility is not None else 10.0
-            
-            # Create feature array in correct order
-            feature_values = [features[f] for f in self.features]
-            return np.array(feature_values).reshape(1, -1)
-            
-        except KeyError as e:
-            logger.error(f"Missing required feature in model: {e}")
-            raise ValueError(f"Missing required feature in model: {e}")
         except ValueError as e:
             logger.error(f"Invalid input value: {e}")
             raise
@@ -127,147 +330,650 @@ class WeatherPredictor:
             raise
     
     def predict_temperature(self, temp, humidity, pressure, feels_like, temp_lag1=None, temp_lag2=None,
-                           wind_speed=None, visibility=None):
-        """Make temperature prediction using XGBoost with enhanced validation and confidence estimation"""
+                           wind_speed=None, visibility=None, city=None, validated=False):
+        """Make temperature prediction using XGBoost with enhanced validation and confidence estimation.
+
+        validated=True skips the input type checks (see create_features).
+        """
         try:
-            logger.info(f"Starting prediction with params: temp={temp}, humidity={humidity}, pressure={pressure}")
+            logger.info("Starting prediction with params: temp=%s, humidity=%s, pressure=%s", temp, humidity, pressure)
             
-            # Validate input parameters
-            required_params = [temp, humidity, pressure, feels_like]
-            if not all(isinstance(x, (int, float)) for x in required_params):
-                raise ValueError("All required parameters must be numbers")
+            # One bundle for the whole request, even if a reload swaps it meanwhile
+            bundle = self.bundle
             
             # Create features
+            t0 = now()
             X = self.create_features(temp, humidity, pressure, feels_like, temp_lag1, temp_lag2,
-                                   wind_speed, visibility)
-            
-            # Scale features
-            X_scaled = self.scaler_X.transform(X)
-            
-            # Create DMatrix and predict
-            dmatrix = xgb.DMatrix(X_scaled)
-            prediction_scaled = self.xgb_model.predict(dmatrix)[0]
-            
-            # Inverse transform prediction
-            prediction = self.scaler_y.inverse_transform([[prediction_scaled]])[0][0]
-            
-            # Calculate confidence based on prediction difference and input consistency
-            temp_diff = abs(prediction - temp)
-            feels_like_diff = abs(feels_like - temp)
-            
-            # Enhanced confidence calculation
-            if temp_diff < 1.0 and feels_like_diff < 3.0:
-                confidence = 'Very High'
-            elif temp_diff < 2.0 and feels_like_diff < 5.0:
-                confidence = 'High'
-            elif temp_diff < 3.0:
-                confidence = 'Medium'
-            else:
-                confidence = 'Low'
+                                   wind_speed, visibility, city, bundle, validated)
+            t1 = now()
+            _SINGLE_STAGES['feature_build'].observe(t1 - t0)
+            
+            # Serve near-identical inputs from the prediction cache
+            prediction = cache_key = None
+            if self.prediction_cache is not None:
+                doy = int(X[0, bundle.doy_index]) if bundle.doy_index is not None else day_of_year()
+                cache_scope = (bundle.version, doy)
+                cache_key = self.prediction_cache.key(X)
+                prediction = self.prediction_cache.get(cache_key, cache_scope)
+            
+            if prediction is None:
+                # Scale features
+                t0 = now()
+                X_scaled = bundle.scale_features(X)
+                t1 = now()
+                
+                # Run the booster
+                prediction_scaled = bundle.predict_scaled(X_scaled)[0]
+                t2 = now()
+                
+                # Inverse transform prediction
+                prediction = bundle.inverse_scale_scalar(prediction_scaled)
+                t3 = now()
+                _SINGLE_STAGES['scale'].observe(t1 - t0)
+                _SINGLE_STAGES['predict'].observe(t2 - t1)
+                _SINGLE_STAGES['inverse'].observe(t3 - t2)
+                if cache_key is not None:
+                    self.prediction_cache.set(cache_key, prediction, cache_scope)
+            
+            result = self._build_result(prediction, temp, feels_like, 'XGBoost', len(bundle.features), bundle.version)
+            logger.info("Prediction successful: %s°C (confidence: %s)",
+                        result['predicted_temperature'], result['confidence'])
+            return result
             
-            result = {
-                'predicted_temperature': round(float(prediction), 2),
-                'current_temperature': float(temp),
-                'temperature_difference': round(float(prediction - temp), 2),
-                'confidence': confidence,
+        except Exception as e:
+            logger.error(f"Prediction failed: {str(e)}")
+            return {
+                'error': 'Prediction failed',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    def predict_sequence(self, temp, feels_like, sequence):
+        """Make temperature prediction using the LSTM over a lookback window of feature rows"""
+        try:
+            bundle = self.bundle
+            if bundle.lstm is None:
+                raise ValueError("LSTM model is not available")
+            logger.info("Starting LSTM prediction with params: temp=%s, feels_like=%s", temp, feels_like)
+
+            X = sequence if isinstance(sequence, np.ndarray) else self.create_sequence(sequence)
+            prediction = float(bundle.lstm.predict(X[np.newaxis])[0])
+
+            result = self._build_result(prediction, temp, feels_like, 'LSTM', len(bundle.lstm_features), bundle.version)
+            logger.info("LSTM prediction successful: %s°C", result['predicted_temperature'])
+            return result
+
+        except Exception as e:
+            logger.error(f"LSTM prediction failed: {str(e)}")
+            return {
+                'error': 'Prediction failed',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    def create_sequence(self, sequence, city=None):
+        """Validate a lookback window and return it as a (lookback, n_features) float32 array.
+
+        Each row is either a list of values in feature_list_lstm.json order or
+        a dict keyed by feature name. With a city, the last row (the
+        observation being scored) may leave out the lag and rolling-window
+        features; they are taken from the city's recorded history.
+        """
+        lookback = self.bundle.model_config['lookback']
+        lstm_features = self.bundle.lstm_features
+        if not isinstance(sequence, list) or len(sequence) != lookback:
+            raise ValueError(f"Sequence must be a list of {lookback} feature rows")
+
+        X = np.empty((lookback, len(lstm_features)), dtype=np.float32)
+        for i, row in enumerate(sequence):
+            if isinstance(row, dict) and city is not None and i == lookback - 1:
+                row = self._with_history_features(row, city)
+            if isinstance(row, dict):
+                missing = [f for f in lstm_features if f not in row]
+                if missing:
+                    raise ValueError(f"Sequence row {i} is missing features: {', '.join(missing)}")
+                row = [row[f] for f in lstm_features]
+            if not isinstance(row, list) or len(row) != len(lstm_features):
+                raise ValueError(f"Sequence row {i} must have {len(lstm_features)} values")
+            if not all(isinstance(x, (int, float)) for x in row):
+                raise ValueError(f"Sequence row {i} must contain only numbers")
+            X[i] = row
+        if not np.isfinite(X).all():
+            raise ValueError("Sequence contains NaN or infinite values")
+        return X
+
+    def _with_history_features(self, row, city):
+        """A sequence row with missing history features filled from the city's history"""
+        history = self.history.features(city, before=time.time()) if isinstance(city, str) else None
+        if history is None:
+            return row
+        filled = {name: value for name, value in history.items() if not np.isnan(value)}
+        filled.update(row)
+        return filled
+
+    @staticmethod
+    def _build_result(prediction, temp, feels_like, model_type, features_used, model_version):
+        """Shape a single prediction into the /predict response with a confidence estimate"""
+        # Calculate confidence based on prediction difference and input consistency
+        temp_diff = abs(prediction - temp)
+        feels_like_diff = abs(feels_like - temp)
+        
+        # Enhanced confidence calculation
+        if temp_diff < 1.0 and feels_like_diff < 3.0:
+            confidence = 'Very High'
+        elif temp_diff < 2.0 and feels_like_diff < 5.0:
+            confidence = 'High'
+        elif temp_diff < 3.0:
+            confidence = 'Medium'
+        else:
+            confidence = 'Low'
+        
+        return {
+            'predicted_temperature': round(float(prediction), 2),
+            'current_temperature': float(temp),
+            'temperature_difference': round(float(prediction - temp), 2),
+            'confidence': confidence,
+            'prediction_metadata': {
+                'model_type': model_type,
+                'features_used': features_used,
+                'model_version': model_version,
+                'timestamp': datetime.now().isoformat()
+            }
+        }
+    
+    def predict_batch(self, observations):
+        """Predict temperatures for many observations with one vectorized model call.
+
+        Accepts either a list of observation dicts (same keys as /predict) or a
+        columnar dict mapping each field to a list of values. Invalid rows are
+        reported individually and do not fail the rest of the batch. Rows that
+        name a 'city' but omit lags get them from the city's history.
+        """
+        t0 = now()
+        try:
+            columns, n_rows = self._to_columns(observations)
+            self._fill_lags_from_history(columns, columns.pop('city'))
+        except ValueError as e:
+            logger.warning(f"Invalid batch payload: {e}")
+            return {
+                'error': 'Invalid batch payload',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+        try:
+            values, errors = self._validate_columns(columns, n_rows)
+            valid = np.array([e is None for e in errors], dtype=bool)
+
+            bundle = self.bundle
+            predictions = np.full(n_rows, np.nan)
+            if valid.any():
+                X = self.create_feature_matrix(values, valid, bundle)
+                t1 = now()
+                X_scaled = bundle.scale_features(X, out=X)
+                t2 = now()
+                prediction_scaled = bundle.predict_scaled(X_scaled)
+                t3 = now()
+                predictions[valid] = bundle.inverse_scale(prediction_scaled)
+                t4 = now()
+                _BATCH_STAGES['feature_build'].observe(t1 - t0)
+                _BATCH_STAGES['scale'].observe(t2 - t1)
+                _BATCH_STAGES['predict'].observe(t3 - t2)
+                _BATCH_STAGES['inverse'].observe(t4 - t3)
+
+            temp = values['temperature']
+            temp_diff = np.abs(predictions - temp)
+            feels_like_diff = np.abs(values['feels_like'] - temp)
+            confidence = np.select(
+                [(temp_diff < 1.0) & (feels_like_diff < 3.0),
+                 (temp_diff < 2.0) & (feels_like_diff < 5.0),
+                 temp_diff < 3.0],
+                ['Very High', 'High', 'Medium'],
+                default='Low'
+            )
+
+            items = []
+            for i in range(n_rows):
+                if errors[i] is not None:
+                    items.append({'index': i, 'error': 'Invalid input', 'message': errors[i]})
+                    continue
+                items.append({
+                    'index': i,
+                    'predicted_temperature': round(float(predictions[i]), 2),
+                    'current_temperature': float(temp[i]),
+                    'temperature_difference': round(float(predictions[i] - temp[i]), 2),
+                    'confidence': str(confidence[i])
+                })
+
+            succeeded = int(valid.sum())
+            logger.info("Batch prediction finished: %d/%d rows scored", succeeded, n_rows)
+            return {
+                'predictions': items,
+                'count': n_rows,
+                'succeeded': succeeded,
+                'failed': n_rows - succeeded,
                 'prediction_metadata': {
                     'model_type': 'XGBoost',
-                    'features_used': len(self.features),
+                    'features_used': len(bundle.features),
+                    'model_version': bundle.version,
                     'timestamp': datetime.now().isoformat()
                 }
             }
-            
-            logger.info(f"Prediction successful: {result['predicted_temperature']}°C (confidence: {confidence})")
-            return result
-            
+
         except Exception as e:
-            logger.error(f"Prediction failed: {str(e)}")
+            logger.error(f"Batch prediction failed: {str(e)}")
             return {
-                'error': 'Prediction failed',
+                'error': 'Batch prediction failed',
                 'message': str(e),
                 'timestamp': datetime.now().isoformat()
             }
-    
+
+    def forecast(self, observations, horizon=7):
+        """Forecast several days ahead for many observations by recursive rollout.
+
+        Accepts the same payloads as predict_batch, and step 1 is the same
+        prediction. Each later step feeds the previous prediction back as
+        temperature_celsius_lag1 (the old lag1 becomes lag2), moves the
+        day-of-year features on by a day and keeps feels_like at its observed
+        offset from the temperature; humidity, pressure and the other inputs
+        are held at their observed values. Every step is one vectorized model
+        call over all valid rows, so cost grows with the horizon, not with
+        rows x horizon.
+        """
+        t0 = now()
+        try:
+            columns, n_rows = self._to_columns(observations)
+            cities = columns.pop('city')
+            self._fill_lags_from_history(columns, cities)
+        except ValueError as e:
+            logger.warning(f"Invalid forecast payload: {e}")
+            return {
+                'error': 'Invalid forecast payload',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+        try:
+            values, errors = self._validate_columns(columns, n_rows)
+            valid = np.array([e is None for e in errors], dtype=bool)
+
+            bundle = self.bundle
+            start = date.today()
+            forecasts = np.full((n_rows, horizon), np.nan)
+            if valid.any():
+                X = self.create_feature_matrix(values, valid, bundle)
+                feels_offset = values['feels_like'][valid] - values['temperature'][valid]
+                t1 = now()
+                forecasts[valid] = self._rollout(X, horizon, start, feels_offset, bundle)
+                _FORECAST_STAGES['feature_build'].observe(t1 - t0)
+                _FORECAST_STAGES['rollout'].observe(now() - t1)
+
+            dates = [(start + timedelta(days=step)).isoformat() for step in range(horizon)]
+            rounded = np.round(forecasts, 2).tolist()
+            items = []
+            for i in range(n_rows):
+                item = {'index': i}
+                if cities[i] is not None:
+                    item['city'] = cities[i]
+                if errors[i] is not None:
+                    item.update(error='Invalid input', message=errors[i])
+                else:
+                    item['current_temperature'] = float(values['temperature'][i])
+                    item['forecast'] = [{'step': step + 1, 'date': dates[step], 'predicted_temperature': t}
+                                        for step, t in enumerate(rounded[i])]
+                items.append(item)
+
+            succeeded = int(valid.sum())
+            logger.info("Forecast finished: %d/%d rows over %d steps", succeeded, n_rows, horizon)
+            return {
+                'forecasts': items,
+                'horizon': horizon,
+                'count': n_rows,
+                'succeeded': succeeded,
+                'failed': n_rows - succeeded,
+                'prediction_metadata': {
+                    'model_type': 'XGBoost',
+                    'method': 'recursive',
+                    'features_used': len(bundle.features),
+                    'model_version': bundle.version,
+                    'timestamp': datetime.now().isoformat()
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Forecast failed: {str(e)}")
+            return {
+                'error': 'Forecast failed',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    @staticmethod
+    def _rollout(X, horizon, start, feels_offset, bundle):
+        """Predict horizon steps for the feature matrix X (modified in place); returns N x horizon"""
+        plan = bundle.feature_plan
+        index = plan.index
+        if 'temperature_celsius_lag1' not in index:
+            raise ValueError("Model has no temperature_celsius_lag1 feature to roll forward")
+        lag1 = index['temperature_celsius_lag1']
+        lag2 = index.get('temperature_celsius_lag2')
+        feels_like = index.get('feels_like_celsius')
+
+        out = np.empty((X.shape[0], horizon))
+        X_scaled = np.empty_like(X)
+        for step in range(horizon):
+            if step:
+                if lag2 is not None:
+                    X[:, lag2] = X[:, lag1]
+                X[:, lag1] = out[:, step - 1]
+                if feels_like is not None:
+                    X[:, feels_like] = out[:, step - 1] + feels_offset
+            plan.set_calendar(X, (start + timedelta(days=step)).timetuple().tm_yday)
+            out[:, step] = bundle.inverse_scale(bundle.predict_scaled(bundle.scale_features(X, out=X_scaled)))
+        return out
+
+    def score_features(self, X, bundle=None):
+        """Predict temperatures for an N x F matrix already in feature-list order.
+
+        X is scaled in place when it is a float64 array; rows containing NaN
+        come back as NaN.
+        """
+        bundle = bundle or self.bundle
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(bundle.features):
+            raise ValueError(f"Expected a matrix with {len(bundle.features)} feature columns, got shape {X.shape}")
+        valid = ~np.isnan(X).any(axis=1)
+        predictions = np.full(X.shape[0], np.nan)
+        if valid.all():
+            predictions[:] = bundle.inverse_scale(bundle.predict_scaled(bundle.scale_features(X, out=X)))
+        elif valid.any():
+            X_valid = X[valid]
+            predictions[valid] = bundle.inverse_scale(bundle.predict_scaled(bundle.scale_features(X_valid, out=X_valid)))
+        return predictions
+
+    def forecast_cities(self, cities, api_key, prefetched=None):
+        """Fetch current weather for many cities concurrently and score them in one batch.
+
+        Upstream fetches run on a shared pool of at most fanout_concurrency
+        threads, so wall-clock time tracks the slowest city rather than the
+        sum. Cities that fail to fetch or score are reported individually.
+        prefetched maps the normalized name of every city in unique_cities()
+        to weather that was already fetched; then nothing is fetched here.
+        """
+        names = unique_cities(cities)
+        if prefetched is not None:
+            weather = [prefetched[normalize_city(city)] for city in names]
+        else:
+            weather = list(self._get_fanout_executor().map(
+                lambda city: self.get_current_weather(city, api_key), names))
+
+        fetched = [i for i, w in enumerate(weather) if 'error' not in w]
+        predictions = {}
+        if fetched:
+            batch = self.predict_batch([{
+                'city': names[i],
+                'temperature': weather[i]['temperature'],
+                'humidity': weather[i]['humidity'],
+                'pressure': weather[i]['pressure'],
+                'feels_like': weather[i]['feels_like'],
+                'wind_speed': weather[i]['wind_speed'],
+                'visibility': weather[i]['visibility']
+            } for i in fetched])
+            if 'error' in batch:
+                predictions = {i: batch for i in fetched}
+            else:
+                predictions = {i: item for i, item in zip(fetched, batch['predictions'])}
+
+        results = []
+        for i, city in enumerate(names):
+            if 'error' in weather[i]:
+                results.append({'city': city, **weather[i]})
+                continue
+            prediction = {k: v for k, v in predictions[i].items() if k != 'index'}
+            if 'error' in prediction:
+                results.append({'city': city, 'error': prediction['error'],
+                                'weather': weather[i], 'prediction': prediction})
+            else:
+                results.append({'city': city, 'weather': weather[i], 'prediction': prediction})
+
+        succeeded = sum('error' not in r for r in results)
+        logger.info("Multi-city forecast finished: %d/%d cities", succeeded, len(results))
+        return {
+            'results': results,
+            'count': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def _get_fanout_executor(self):
+        """Shared, lazily created thread pool for upstream fan-out"""
+        if self._fanout_executor is None:
+            with self._fanout_lock:
+                if self._fanout_executor is None:
+                    self._fanout_executor = ThreadPoolExecutor(
+                        max_workers=self.fanout_concurrency, thread_name_prefix='weather-fanout')
+        return self._fanout_executor
+
+    def create_feature_matrix(self, values, valid, bundle=None):
+        """Build the N x F feature matrix for the valid rows of a validated batch"""
+        plan = (bundle or self.bundle).feature_plan
+        temp = values['temperature'][valid]
+        lag1 = values['temperature_lag1'][valid]
+        lag2 = values['temperature_lag2'][valid]
+        # Optional inputs are only filled in for models that use them
+        wind = visibility = None
+        if 'wind_speed_mps' in plan.index:
+            wind = values['wind_speed'][valid]
+            wind = np.where(np.isnan(wind), DEFAULT_WIND_SPEED, wind)
+        if 'visibility_km' in plan.index:
+            visibility = values['visibility'][valid]
+            visibility = np.where(np.isnan(visibility), DEFAULT_VISIBILITY, visibility)
+        return plan.matrix(np.where(np.isnan(lag1), temp - 0.5, lag1), np.where(np.isnan(lag2), temp - 1.0, lag2),
+                           values['humidity'][valid], values['pressure'][valid], values['feels_like'][valid],
+                           wind, visibility, day_of_year())
+
+    def _fill_lags_from_history(self, columns, cities):
+        """Fill missing lag values in place for rows that name a city with recorded history"""
+        lag1_column, lag2_column = columns['temperature_lag1'], columns['temperature_lag2']
+        for i, city in enumerate(cities):
+            if city is None or (lag1_column[i] is not None and lag2_column[i] is not None):
+                continue
+            lag1, lag2 = self.history_lags(city)
+            if lag1_column[i] is None:
+                lag1_column[i] = lag1
+            if lag2_column[i] is None:
+                lag2_column[i] = lag2
+
+    @staticmethod
+    def _to_columns(observations):
+        """Normalize a row-oriented or columnar batch payload into per-field lists"""
+        fields = BATCH_REQUIRED_FIELDS + BATCH_OPTIONAL_FIELDS + ('city',)
+        if isinstance(observations, dict):
+            lengths = {len(v) for v in observations.values() if isinstance(v, list)}
+            if len(lengths) != 1:
+                raise ValueError("Columnar payload must contain lists of equal length")
+            n_rows = lengths.pop()
+            columns = {}
+            for field in fields:
+                column = observations.get(field)
+                if column is None:
+                    column = [None] * n_rows
+                elif not isinstance(column, list):
+                    raise ValueError(f"Column '{field}' must be a list")
+                columns[field] = column
+            return columns, n_rows
+
+        if isinstance(observations, list):
+            columns = {field: [] for field in fields}
+            for row in observations:
+                if not isinstance(row, dict):
+                    row = {}
+                for field in fields:
+                    columns[field].append(row.get(field))
+            return columns, len(observations)
+
+        raise ValueError("Observations must be a list of objects or a dict of columns")
+
+    @staticmethod
+    def _validate_columns(columns, n_rows):
+        """Convert columns to float arrays and collect a per-row error message (or None)"""
+        errors = [None] * n_rows
+        values = {}
+        for field, column in columns.items():
+            array = np.full(n_rows, np.nan)
+            required = field in BATCH_REQUIRED_FIELDS
+            for i, x in enumerate(column):
+                if x is None:
+                    if required and errors[i] is None:
+                        errors[i] = f"Missing required field: {field}"
+                elif not isinstance(x, (int, float)):
+                    if errors[i] is None:
+                        errors[i] = f"Invalid type for {field}. Must be a number (int or float)."
+                else:
+                    array[i] = x
+            values[field] = array
+
+        # Vectorized value checks over rows that passed type validation
+        core = np.column_stack([values[f] for f in BATCH_REQUIRED_FIELDS])
+        for i, error in enumerate(core_errors(core)):
+            if error is not None and errors[i] is None:
+                errors[i] = error
+        return values, errors
+
     def get_current_weather(self, city, api_key):
         """Fetch current weather data from OpenWeatherMap with enhanced error handling"""
+        error = self._check_weather_request(city, api_key)
+        if error:
+            return error
+
+        if self.weather_cache is None:
+            return self._fetch_current_weather(city, api_key)[0]
+
+        # Serve from cache; concurrent misses for one city share a single upstream call
+        weather_data = self.weather_cache.get_or_load(
+            normalize_city(city), lambda: self._load_current_weather(city, api_key))
+        return dict(weather_data)
+
+    async def get_current_weather_async(self, city, api_key, client):
+        """get_current_weather for event-loop callers, fetching through an AsyncWeatherClient"""
+        error = self._check_weather_request(city, api_key)
+        if error:
+            return error
+
+        async def fetch():
+            # SQLite, history-file and index I/O run on the loop's default executor
+            loop = asyncio.get_running_loop()
+            if self.observations is not None:
+                stored = await loop.run_in_executor(None, self._stored_observation, city)
+                if stored is not None:
+                    return stored
+            weather_data, status = await client.get_current_weather(city, api_key)
+            return await loop.run_in_executor(None, self._keep_observation, city, weather_data, status)
+
+        if self.weather_cache is None:
+            return (await fetch())[0]
+        weather_data = await self.weather_cache.get_or_load_async(normalize_city(city), fetch)
+        return dict(weather_data)
+
+    def _check_weather_request(self, city, api_key):
+        """Error response for a request that cannot be sent upstream, or None"""
         if not api_key:
             logger.error("API key not configured")
             return {'error': 'API key not configured'}
-        
+
         if not city or not isinstance(city, str):
             logger.error(f"Invalid city parameter: {city}")
             return {'error': 'Invalid city name provided'}
-            
-        url = "http://api.openweathermap.org/data/2.5/weather"
-        params = {
-            'q': city.strip(),
-            'appid': api_key,
-            'units': 'metric'
-        }
-        
+        return None
+
+    def _load_current_weather(self, city, api_key):
+        """Cache loader: the shared observation store, else a fetch, with how long to cache the result"""
+        stored = self._stored_observation(city)
+        if stored is not None:
+            return stored
+        weather_data, status = self._fetch_current_weather(city, api_key)
+        return self._store_observation(city, weather_data, status)
+
+    def _stored_observation(self, city):
+        """(weather_data, seconds left) from the shared observation store, indexed by coordinates; or None"""
+        stored = self.observations.get(normalize_city(city)) if self.observations is not None else None
+        if stored is not None:
+            self._index_observation(stored[0])
+        return stored
+
+    def _keep_observation(self, city, weather_data, status):
+        """Record a fetch in the city's history and share it; returns (weather_data, cache ttl)"""
+        self._record_observation(city, weather_data, status)
+        return self._store_observation(city, weather_data, status)
+
+    def _store_observation(self, city, weather_data, status):
+        """Share a fetch result with other workers; returns (weather_data, cache ttl)"""
+        ttl = self._weather_ttl(status)
+        if self.observations is not None:
+            self.observations.put(normalize_city(city), weather_data, ttl)
+        if status == 200:
+            self._index_observation(weather_data)
+        return weather_data, ttl
+
+    def _index_observation(self, weather_data):
+        """Make an observation findable by coordinates, as of its fetch time"""
+        lat, lon = weather_data.get('latitude'), weather_data.get('longitude')
+        if lat is None or lon is None or 'error' in weather_data:
+            return
         try:
-            logger.info(f"Fetching weather data for {city}")
-            response = requests.get(url, params=params, timeout=10)
-            
-            # Handle different HTTP status codes
-            if response.status_code == 401:
-                logger.error("Invalid API key")
-                return {'error': 'Invalid API key'}
-            elif response.status_code == 404:
-                logger.error(f"City not found: {city}")
-                return {'error': f'City "{city}" not found'}
-            elif response.status_code != 200:
-                logger.error(f"API returned status {response.status_code}")
-                return {'error': f'Weather API error: {response.status_code}'}
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            # Validate response structure
-            required_keys = ['main', 'weather', 'sys', 'name']
-            if not all(key in data for key in required_keys):
-                logger.error("Invalid API response structure")
-                return {'error': 'Invalid API response format'}
-            
-            # Extract sunrise and sunset times safely
-            sunrise = sunset = 'N/A'
-            try:
-                if 'sunrise' in data['sys'] and 'sunset' in data['sys']:
-                    sunrise = datetime.fromtimestamp(data['sys']['sunrise']).strftime('%H:%M')
-                    sunset = datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M')
-            except (KeyError, ValueError) as e:
-                logger.warning(f"Could not parse sunrise/sunset times: {e}")
-            
-            weather_data = {
-                'temperature': float(data['main']['temp']),
-                'humidity': float(data['main']['humidity']),
-                'pressure': float(data['main']['pressure']),
-                'feels_like': float(data['main']['feels_like']),
-                'description': data['weather'][0]['description'],
-                'city': data['name'],
-                'country': data['sys']['country'],
-                'wind_speed': float(data.get('wind', {}).get('speed', 0)),
-                'visibility': float(data.get('visibility', 10000)) / 1000,  # Convert to km
-                'sunrise': sunrise,
-                'sunset': sunset,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            logger.info(f"Weather data fetched successfully for {city}")
+            observed_at = datetime.fromisoformat(weather_data['timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            observed_at = time.time()
+        self.observed.insert((round(lat, 4), round(lon, 4)), lat, lon, weather_data, observed_at)
+
+    def get_weather_by_coords(self, lat, lon, api_key, radius_km=25.0, max_age=600.0):
+        """Current weather at a point, answered locally when possible.
+
+        Tries, in order: an observation fetched within max_age seconds less
+        than radius_km away; the current weather (usually cached) of the
+        nearest known station within radius_km; OpenWeatherMap for the exact
+        point. The result's 'lookup' says which, and how far away it was.
+        """
+        if not api_key:
+            logger.error("API key not configured")
+            return {'error': 'API key not configured'}
+
+        hit = self.observed.nearest(lat, lon, radius_km, max_age)
+        if hit is not None:
+            point, distance = hit
+            return dict(point.value, lookup={'source': 'observation', 'distance_km': round(distance, 2)})
+
+        hit = self.stations.nearest(lat, lon, radius_km)
+        if hit is not None:
+            point, distance = hit
+            weather_data = self.get_current_weather(point.key, api_key)
+            if 'error' not in weather_data:
+                return dict(weather_data, lookup={'source': 'station', 'distance_km': round(distance, 2)})
+
+        weather_data, status = self.weather_client.get_current_weather_by_coords(lat, lon, api_key)
+        if status != 200:
             return weather_data
-            
-        except requests.exceptions.Timeout:
-            logger.error(f"Weather API request timed out for {city}")
-            return {'error': 'Weather API request timed out'}
-        except requests.exceptions.ConnectionError:
-            logger.error(f"Connection error for {city}")
-            return {'error': 'Unable to connect to weather service'}
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch weather data for {city}: {str(e)}")
-            return {'error': 'Failed to fetch weather data', 'message': str(e)}
-        except (KeyError, ValueError) as e:
-            logger.error(f"Invalid API response format for {city}: {e}")
-            return {'error': 'Invalid API response format', 'message': str(e)}
-        except Exception as e:
-            logger.error(f"Unexpected error fetching weather for {city}: {str(e)}")
-            return {'error': 'Unexpected error occurred', 'message': str(e)}
\ No newline at end of file
+        self._index_observation(weather_data)
+        return dict(weather_data, lookup={'source': 'upstream', 'distance_km': 0.0})
+
+    def _weather_ttl(self, status):
+        """Seconds a fetch result with this upstream status may be cached (None: not at all)"""
+        if status == 200:
+            return self.weather_cache_ttl
+        if status == 404:
+            return self.weather_cache_negative_ttl
+        return None
+
+    def _fetch_current_weather(self, city, api_key):
+        """Call OpenWeatherMap once; returns (weather_data, HTTP status or None).
+
+        Every fresh observation is also recorded in the city's history.
+        """
+        weather_data, status = self.weather_client.get_current_weather(city, api_key)
+        self._record_observation(city, weather_data, status)
+        return weather_data, status
+
+    def _record_observation(self, city, weather_data, status):
+        if status == 200:
+            self.history.record(city, weather_data['temperature'])
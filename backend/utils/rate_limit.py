@@ -0,0 +1,203 @@
+# utils/rate_limit.py
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from utils.metrics import REQUESTS_SHED
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single-process use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Shared bucket slot: key fingerprint, tokens, last refill (time.monotonic)
+_SLOT = struct.Struct('<Qdd')
+
+Rejection = namedtuple('Rejection', 'status retry_after message')
+
+
+class MemoryBucketStore:
+    """Token buckets in a dict, private to this process.
+
+    Holds at most ``max_keys`` buckets; beyond that the oldest is dropped,
+    which only ever gives that client a full bucket again.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1.0):
+        """Take ``cost`` tokens; returns 0.0, or the seconds until they are available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    del self._buckets[next(iter(self._buckets))]
+                bucket = self._buckets[key] = [burst, now]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return 0.0
+            bucket[0] = tokens
+            return (cost - tokens) / rate
+
+
+class SharedBucketStore:
+    """Token buckets in a memory-mapped file shared by every worker process.
+
+    Keys hash to one of ``slots`` fixed slots. A key landing on a slot held
+    by another key takes it over with a full bucket, so collisions can only
+    loosen a limit, never tighten it. Each take locks just its slot's bytes
+    (lockf) across processes, so different clients never contend.
+    """
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a+b')
+        size = slots * _SLOT.size
+        if fcntl is not None:
+            fcntl.lockf(self._file, fcntl.LOCK_EX)
+        try:
+            current = os.fstat(self._file.fileno()).st_size
+            if current != size:
+                if current:
+                    logger.warning(f"Rate limit store {path} has an incompatible layout, recreating it")
+                self._file.truncate(0)
+                self._file.truncate(size)
+        finally:
+            if fcntl is not None:
+                fcntl.lockf(self._file, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def take(self, key, rate, burst, cost=1.0):
+        """Take ``cost`` tokens; returns 0.0, or the seconds until they are available"""
+        fingerprint = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+        offset = (fingerprint % self.slots) * _SLOT.size
+        with self._lock:
+            if fcntl is not None:
+                fcntl.lockf(self._file, fcntl.LOCK_EX, _SLOT.size, offset)
+            try:
+                now = time.monotonic()
+                owner, tokens, updated = _SLOT.unpack_from(self._map, offset)
+                if owner != fingerprint or updated > now:  # new key, or a stamp from before a reboot
+                    tokens, updated = burst, now
+                tokens = min(burst, tokens + (now - updated) * rate)
+                wait = 0.0
+                if tokens >= cost:
+                    tokens -= cost
+                else:
+                    wait = (cost - tokens) / rate
+                _SLOT.pack_into(self._map, offset, fingerprint, tokens, now)
+                return wait
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(self._file, fcntl.LOCK_UN, _SLOT.size, offset)
+
+
+class RateLimiter:
+    """Per-client and global token buckets over a bucket store.
+
+    Rates are requests per second; a rate of 0 turns that bucket off. Burst
+    defaults to one second's worth of requests (at least 1).
+    """
+
+    GLOBAL_KEY = '*'
+
+    def __init__(self, store=None, client_rate=0.0, client_burst=0.0, global_rate=0.0, global_burst=0.0):
+        self.store = store or MemoryBucketStore()
+        self.client_rate = client_rate
+        self.client_burst = client_burst or max(1.0, client_rate)
+        self.global_rate = global_rate
+        self.global_burst = global_burst or max(1.0, global_rate)
+
+    @property
+    def enabled(self):
+        return self.client_rate > 0 or self.global_rate > 0
+
+    def check(self, client):
+        """None if the request may proceed, else (scope, seconds to wait)"""
+        if self.client_rate > 0:
+            wait = self.store.take(client, self.client_rate, self.client_burst)
+            if wait:
+                return 'client', wait
+        if self.global_rate > 0:
+            wait = self.store.take(self.GLOBAL_KEY, self.global_rate, self.global_burst)
+            if wait:
+                return 'global', wait
+        return None
+
+
+class AdmissionControl:
+    """Decides whether to serve a request before any work is done for it.
+
+    Requests past ``max_inflight`` concurrent requests in this process get
+    503; clients over their rate (or everyone, over the global rate) get 429.
+    Both carry a Retry-After. ``exempt`` paths (health and metrics) are never
+    rejected. ``proxy_hops`` trusted proxies in front of the app mean the
+    client address is read from X-Forwarded-For instead of the socket.
+    """
+
+    def __init__(self, limiter=None, max_inflight=0, proxy_hops=0, exempt=('/health', '/metrics')):
+        self.limiter = limiter if limiter is not None and limiter.enabled else None
+        self.max_inflight = max_inflight
+        self.proxy_hops = proxy_hops
+        self.exempt = frozenset(exempt)
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def client_id(self, environ):
+        if self.proxy_hops:
+            forwarded = environ.get('HTTP_X_FORWARDED_FOR')
+            if forwarded:
+                hops = forwarded.split(',')
+                return hops[max(0, len(hops) - self.proxy_hops)].strip()
+        return environ.get('REMOTE_ADDR') or 'unknown'
+
+    def admit(self, environ):
+        """None if admitted (call leave() when done), else a Rejection"""
+        exempt = environ.get('PATH_INFO') in self.exempt
+        # Check and claim the slot together so concurrent requests cannot overshoot max_inflight
+        with self._lock:
+            busy = not exempt and self.max_inflight and self.inflight >= self.max_inflight
+            if not busy:
+                self.inflight += 1
+        if busy:
+            REQUESTS_SHED.labels('inflight').inc()
+            return Rejection(503, 1, 'Server is busy, please retry shortly.')
+        if not exempt and self.limiter is not None:
+            denied = self.limiter.check(self.client_id(environ))
+            if denied is not None:
+                self.leave()
+                scope, wait = denied
+                REQUESTS_SHED.labels(f'{scope}_rate').inc()
+                return Rejection(429, int(wait) + 1, 'Too many requests, please slow down.')
+        return None
+
+    def leave(self):
+        with self._lock:
+            self.inflight -= 1
+
+
+def make_bucket_store(kind='memory', path=None):
+    """Bucket store by name: 'memory' (per process) or 'shared' (memory-mapped file at path)"""
+    if kind == 'memory':
+        return MemoryBucketStore()
+    if kind == 'shared':
+        if not path:
+            raise ValueError("RATE_LIMIT_STORE=shared needs RATE_LIMIT_STORE_PATH")
+        return SharedBucketStore(path)
+    raise ValueError(f"Unknown rate limit store: {kind!r} (expected 'memory' or 'shared')")
@@ -0,0 +1,117 @@
+# utils/response_encoding.py
+"""Response encodings negotiated from the Accept and Accept-Encoding headers.
+
+JSON stays the default; with orjson installed it is encoded by orjson with
+the same output rules as Flask's encoder (sorted keys, HTTP dates). Clients
+sending ``Accept: application/msgpack`` get MessagePack (needs msgpack),
+with array-shaped results (batch predictions, forecasts, multi-city
+results) as columns: one list per field instead of one map per item.
+Large bodies are gzipped for clients that accept it.
+"""
+import gzip
+
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: binary responses are not offered without it
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/vnd.msgpack', 'application/x-msgpack')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with orjson.
+
+    Keys are sorted and dates go through Flask's default hook, as with the
+    standard provider; non-ASCII text is written as UTF-8 instead of \\u
+    escapes. Pretty-printed (debug) output and anything orjson rejects, such
+    as integers beyond 64 bits, fall back to the standard encoder.
+    """
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        return options | orjson.OPT_SORT_KEYS if self.sort_keys else options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.keys() - {'separators'}:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=_default, option=self._options()).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, default=_default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def to_columns(records):
+    """A list of dicts as a dict of equal-length lists (None where a field is missing).
+
+    Nested lists of dicts, like each item's forecast steps, are turned into
+    columns the same way.
+    """
+    columns = {}
+    for field in dict.fromkeys(field for record in records for field in record):
+        values = [record.get(field) for record in records]
+        sample = next((value for value in values if value is not None), None)
+        if _is_records(sample):
+            values = [to_columns(value) if _is_records(value) else value for value in values]
+        columns[field] = values
+    return columns
+
+
+def _is_records(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def columnar(payload):
+    """The payload with every top-level list of dicts turned into columns"""
+    return {key: to_columns(value) if _is_records(value) else value for key, value in payload.items()}
+
+
+def negotiate(accept_mimetypes):
+    """The response media type for a request's Accept header: JSON unless MessagePack is preferred"""
+    if msgpack is None:
+        return JSON_MIMETYPE
+    return accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES, default=JSON_MIMETYPE)
+
+
+def encode_response(payload, accept_mimetypes, response_class, json_response):
+    """Encode a dict payload for the media type the client prefers.
+
+    ``json_response`` builds the JSON response (normally ``jsonify``).
+    """
+    mimetype = negotiate(accept_mimetypes)
+    if mimetype == JSON_MIMETYPE:
+        response = json_response(payload)
+    else:
+        response = response_class(msgpack.packb(columnar(payload), default=_default), mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+
+def gzip_response(response, accept_encodings, min_size=1024, level=5):
+    """Gzip the response body in place when it is large enough and the client accepts gzip"""
+    if (response.direct_passthrough or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    if not accept_encodings['gzip'] or response.content_length is None or response.content_length < min_size:
+        return response
+    response.set_data(gzip.compress(response.get_data(), compresslevel=level))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
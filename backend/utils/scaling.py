@@ -0,0 +1,69 @@
+# utils/scaling.py
+import threading
+
+import numpy as np
+
+
+class AffineScaler:
+    """Precompiled form of a fitted sklearn MinMaxScaler/StandardScaler.
+
+    Both scalers reduce to ``X_scaled = X * mul + add``, so the parameters are
+    pulled out once at load time and applied with in-place NumPy ufuncs. This
+    skips sklearn's per-call input validation, which dominates for 1xF inputs.
+    """
+
+    def __init__(self, mul, add, clip=None):
+        self.mul = np.ascontiguousarray(mul, dtype=np.float64)
+        self.add = np.ascontiguousarray(add, dtype=np.float64)
+        self.clip = clip
+        self.n_features = self.mul.shape[0]
+        self._local = threading.local()
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        """Extract the affine parameters from a fitted scaler, or return None if unsupported"""
+        if hasattr(scaler, 'min_') and hasattr(scaler, 'scale_'):
+            # MinMaxScaler: X * scale_ + min_
+            clip = tuple(scaler.feature_range) if getattr(scaler, 'clip', False) else None
+            return cls(scaler.scale_, scaler.min_, clip)
+        if hasattr(scaler, 'scale_') and hasattr(scaler, 'mean_'):
+            # StandardScaler: (X - mean_) / scale_
+            if scaler.mean_ is None and scaler.scale_ is None:
+                return None
+            n_features = scaler.n_features_in_
+            mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+            scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+            return cls(1.0 / scale, -mean / scale)
+        return None
+
+    def _buffer(self, n_rows):
+        """Per-thread scratch buffer reused across calls of the same shape"""
+        buf = getattr(self._local, 'buf', None)
+        if buf is None or buf.shape[0] != n_rows:
+            buf = np.empty((n_rows, self.n_features), dtype=np.float64)
+            self._local.buf = buf
+        return buf
+
+    def transform(self, X, out=None):
+        """Scale X into ``out`` (a reused per-thread buffer when not given)"""
+        if out is None:
+            out = self._buffer(X.shape[0])
+        np.multiply(X, self.mul, out=out)
+        np.add(out, self.add, out=out)
+        if self.clip is not None:
+            np.clip(out, self.clip[0], self.clip[1], out=out)
+        return out
+
+    def inverse_transform(self, y):
+        """Undo the scaling for a 1-D array of single-target predictions"""
+        return (y - self.add[0]) / self.mul[0]
+
+    def inverse_transform_scalar(self, y):
+        """Undo the scaling for one prediction without touching NumPy"""
+        return (float(y) - float(self.add[0])) / float(self.mul[0])
+
+    def verify(self, scaler, X, rtol=1e-9, atol=1e-9):
+        """Check the kernel reproduces ``scaler.transform`` on X"""
+        expected = scaler.transform(X)
+        actual = self.transform(X, out=np.empty_like(expected, dtype=np.float64))
+        return np.allclose(actual, expected, rtol=rtol, atol=atol)
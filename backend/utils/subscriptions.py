@@ -0,0 +1,206 @@
+# utils/subscriptions.py
+"""Server-Sent Event subscriptions to per-city prediction updates.
+
+One background refresher per worker fetches every subscribed city once per
+interval through WeatherPredictor.forecast_cities (so through the weather
+cache, with one batched model call), encodes each city's result once and
+fans it out. Upstream and model cost follow the number of distinct cities,
+not the number of subscribers.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from utils.predictor import normalize_city, unique_cities
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event, data):
+    """One SSE message; data is an already encoded JSON string"""
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
+HEARTBEAT = b': keep-alive\n\n'
+TOO_SLOW = format_event('close', '{"reason":"client too slow"}')
+
+
+class Subscription:
+    """One client's stream: a short queue of encoded events.
+
+    Every update is a full snapshot of the client's cities, so when the
+    client falls behind the oldest queued update is dropped instead of
+    buffering without bound. A client that misses more than
+    ``max_dropped`` updates in a row is closed. With ``loop`` the consumer
+    is a coroutine on that event loop (get_async), otherwise a thread (get).
+    """
+
+    def __init__(self, cities, queue_size=8, max_dropped=32, loop=None):
+        self.cities = cities  # normalized name -> name as given
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self.dropped = 0
+        self.closed = False
+        self._behind = 0
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._loop = loop
+        self._ready = asyncio.Event() if loop is not None else threading.Event()
+
+    def offer(self, event):
+        """Queue an event from the refresher thread, dropping the oldest when full"""
+        with self._lock:
+            if self.closed:
+                return
+            if len(self._events) >= self.queue_size:
+                self._events.popleft()
+                self.dropped += 1
+                self._behind += 1
+                if self._behind > self.max_dropped:
+                    logger.warning(f"Closing a subscription {self._behind} updates behind")
+                    self.closed = True
+            self._events.append(event)
+        if self._loop is None:
+            self._ready.set()
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:  # the event loop is gone
+            self.closed = True
+
+    def _drain(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self._behind = 0
+            self._ready.clear()
+            return events
+
+    def get(self, timeout):
+        """Queued events, oldest first, waiting up to timeout seconds (thread consumers)"""
+        self._ready.wait(timeout)
+        return self._drain()
+
+    async def get_async(self, timeout):
+        """Queued events, oldest first, waiting up to timeout seconds (event-loop consumers)"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._drain()
+
+
+class SubscriptionHub:
+    """Subscribers, the cities they follow and the refresher that feeds them.
+
+    The refresher thread starts with the first subscription and wakes
+    early when someone subscribes to a city it has no result for yet. New
+    subscribers get the latest known results at once. ``max_subscribers``
+    caps streams per worker; ``max_thread_subscribers`` caps those that
+    hold a server thread (streams not served from an event loop).
+    """
+
+    def __init__(self, predictor, api_key, interval=60.0, queue_size=8, max_dropped=32,
+                 max_subscribers=1000, max_thread_subscribers=2):
+        self.predictor = predictor
+        self.api_key = api_key
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self.max_subscribers = max_subscribers
+        self.max_thread_subscribers = max_thread_subscribers
+        self._subscribers = set()
+        self._followers = {}  # normalized city -> number of subscribers following it
+        self._latest = {}  # normalized city -> encoded JSON result, for followed cities only
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._refresher = None
+        self.refreshes = 0
+
+    def subscribe(self, cities, loop=None):
+        """Register a subscriber for these cities; None when the worker is at capacity"""
+        wanted = {normalize_city(city): city for city in unique_cities(cities)}
+        with self._lock:
+            thread_streams = sum(1 for s in self._subscribers if s._loop is None)
+            if (len(self._subscribers) >= self.max_subscribers
+                    or (loop is None and thread_streams >= self.max_thread_subscribers)):
+                return None
+            subscription = Subscription(wanted, self.queue_size, self.max_dropped, loop)
+            self._subscribers.add(subscription)
+            for city in wanted:
+                self._followers[city] = self._followers.get(city, 0) + 1
+            known = all(city in self._latest for city in wanted)
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._run, name='subscription-refresher', daemon=True)
+                self._refresher.start()
+        if known:
+            subscription.offer(self._event(wanted))
+        else:
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscriber, forgetting the results of cities nobody follows any more"""
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.remove(subscription)
+            for city in subscription.cities:
+                self._followers[city] -= 1
+                if not self._followers[city]:
+                    del self._followers[city]
+                    self._latest.pop(city, None)
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'subscribers': len(subscribers),
+            'cities': len(self._followers),
+            'refreshes': self.refreshes,
+            'dropped_updates': sum(s.dropped for s in subscribers),
+        }
+
+    def _event(self, cities):
+        latest = self._latest
+        results = [result for result in (latest.get(city) for city in cities) if result is not None]
+        return format_event('forecast', '{"results":[%s],"timestamp":%s}' % (
+            ','.join(results), json.dumps(datetime.now().isoformat())))
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                subscribers = list(self._subscribers)
+            cities = {}
+            for subscription in subscribers:
+                cities.update(subscription.cities)
+            if not cities:
+                continue
+            try:
+                self.refresh(cities)
+            except Exception:
+                logger.exception("Subscription refresh failed")
+                time.sleep(1)
+
+    def refresh(self, cities):
+        """Fetch and score these cities once and send every subscriber its update"""
+        result = self.predictor.forecast_cities(list(cities.values()), self.api_key)
+        encoded = {normalize_city(item['city']): json.dumps(item) for item in result['results']}
+        self.refreshes += 1
+
+        with self._lock:
+            # Cities whose last subscriber left during the refresh are not kept
+            self._latest.update((city, data) for city, data in encoded.items() if city in self._followers)
+            subscribers = list(self._subscribers)
+        events = {}  # subscribers following the same cities share one encoded event
+        for subscription in subscribers:
+            key = frozenset(subscription.cities)
+            if key not in events:
+                events[key] = self._event(subscription.cities)
+            subscription.offer(events[key])
@@ -0,0 +1,382 @@
+# utils/weather_client.py
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import WEATHER_STAGE_LATENCY, WEATHER_UPSTREAM_ERRORS, now
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "http://api.openweathermap.org/data/2.5"
+
+# Upstream statuses worth retrying with backoff
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_FETCH_LATENCY = WEATHER_STAGE_LATENCY.labels('fetch')
+_PARSE_LATENCY = WEATHER_STAGE_LATENCY.labels('parse')
+
+
+def _count_error(error_type):
+    WEATHER_UPSTREAM_ERRORS.labels(error_type).inc()
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is open and upstream calls are skipped"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Circuit open, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class UpstreamBusyError(Exception):
+    """Raised when max_inflight upstream calls are already running"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast for ``reset_timeout`` seconds. The next call is then let
+    through as a probe: success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self):
+        """Return True if a call may go upstream now"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def retry_after(self):
+        """Seconds until the circuit will let a probe through"""
+        with self._lock:
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_abandoned(self):
+        """A call ended without an outcome (e.g. cancelled); a half-open circuit may probe again"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Weather API circuit opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+
+def parse_current_weather(data):
+    """Normalize an OpenWeatherMap /weather payload into the API's response shape"""
+    # Extract sunrise and sunset times safely
+    sunrise = sunset = 'N/A'
+    try:
+        if 'sunrise' in data['sys'] and 'sunset' in data['sys']:
+            sunrise = datetime.fromtimestamp(data['sys']['sunrise']).strftime('%H:%M')
+            sunset = datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M')
+    except (KeyError, ValueError) as e:
+        logger.warning(f"Could not parse sunrise/sunset times: {e}")
+
+    return {
+        'temperature': float(data['main']['temp']),
+        'humidity': float(data['main']['humidity']),
+        'pressure': float(data['main']['pressure']),
+        'feels_like': float(data['main']['feels_like']),
+        'description': data['weather'][0]['description'],
+        'city': data['name'],
+        'country': data['sys']['country'],
+        'wind_speed': float(data.get('wind', {}).get('speed', 0)),
+        'visibility': float(data.get('visibility', 10000)) / 1000,  # Convert to km
+        'latitude': data.get('coord', {}).get('lat'),
+        'longitude': data.get('coord', {}).get('lon'),
+        'sunrise': sunrise,
+        'sunset': sunset,
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+class WeatherClient:
+    """OpenWeatherMap client with a pooled keep-alive session, retries and a circuit breaker.
+
+    Retries use full-jitter exponential backoff on connection errors and
+    429/5xx responses (honouring Retry-After when it fits the backoff cap).
+    Read timeouts are not retried so a slow upstream costs at most one
+    timeout per request. ``base_url`` can point at a local stub server.
+    With ``max_inflight`` set, calls beyond that many concurrent upstream
+    requests are shed (answered as temporarily unavailable) instead of queued.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=10.0, connect_timeout=3.05,
+                 pool_size=10, max_retries=2, backoff_base=0.25, backoff_max=4.0,
+                 failure_threshold=5, reset_timeout=30.0, max_inflight=0, sleep=time.sleep):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_inflight = max_inflight
+        self._sleep = sleep
+
+        self.pool_size = pool_size
+        self.session = self._new_session()
+
+        self._stats_lock = threading.Lock()
+        self.requests_sent = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.shed = 0
+        self.inflight = 0
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def reset_session(self):
+        """Replace the session, e.g. in a forked worker, without sharing parent sockets"""
+        self.session = self._new_session()
+
+    def close(self):
+        self.session.close()
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff delay for the given retry attempt"""
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+                if 0 <= delay <= self.backoff_max:
+                    return delay
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # Retry, breaker and error handling shared by every transport (see AsyncWeatherClient).
+    # A transport runs attempts 0..max_retries; each starts with begin_attempt, ends with
+    # end_attempt and reports its outcome to exactly one of the attempt_* methods.
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def begin_attempt(self):
+        """Claim an upstream slot; raises UpstreamBusyError or CircuitOpenError to fail fast"""
+        with self._stats_lock:
+            if self.max_inflight and self.inflight >= self.max_inflight:
+                self.shed += 1
+                raise UpstreamBusyError()
+            self.inflight += 1
+        if not self.breaker.allow():
+            self.end_attempt()
+            self._count('short_circuited')
+            raise CircuitOpenError(self.breaker.retry_after())
+        self._count('requests_sent')
+
+    def end_attempt(self):
+        with self._stats_lock:
+            self.inflight -= 1
+
+    def attempt_answered(self, attempt, status, retry_after=None):
+        """Record an upstream response; returns the delay before retrying it, or None to use it"""
+        if status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if status in RETRY_STATUSES and attempt < self.max_retries:
+            logger.warning(f"Weather API returned {status}, retrying (attempt {attempt + 1})")
+            self._count('retries')
+            return self._backoff(attempt, retry_after)
+        return None
+
+    def attempt_failed(self, attempt, retryable):
+        """Record a transport error; returns the delay before retrying, or None to re-raise it"""
+        self.breaker.record_failure()
+        if not retryable or attempt == self.max_retries:
+            return None
+        self._count('retries')
+        return self._backoff(attempt)
+
+    def attempt_abandoned(self):
+        """Record an attempt cut short by the caller (cancelled, interrupted), which says nothing about upstream"""
+        self.breaker.record_abandoned()
+
+    def weather_response(self, city, status, decode):
+        """(weather_data, status) for an upstream /weather response; decode() returns its JSON payload"""
+        if status == 401:
+            logger.error("Invalid API key")
+            _count_error('unauthorized')
+            return {'error': 'Invalid API key'}, 401
+        elif status == 404:
+            logger.error(f"City not found: {city}")
+            _count_error('not_found')
+            return {'error': f'City "{city}" not found'}, 404
+        elif status != 200:
+            logger.error(f"API returned status {status}")
+            _count_error(f'http_{status // 100}xx')
+            return {'error': f'Weather API error: {status}'}, status
+
+        t0 = now()
+        result = self._parse_payload(city, decode())
+        _PARSE_LATENCY.observe(now() - t0)
+        return result
+
+    def _parse_payload(self, city, data):
+        """Validate and normalize a decoded 200 response; returns (weather_data, status)"""
+        required_keys = ['main', 'weather', 'sys', 'name']
+        if not all(key in data for key in required_keys):
+            logger.error("Invalid API response structure")
+            _count_error('invalid_response')
+            return {'error': 'Invalid API response format'}, None
+
+        weather_data = parse_current_weather(data)
+        logger.info("Weather data fetched successfully for %s", city)
+        return weather_data, 200
+
+    def error_response(self, city, error, timeout_errors=(requests.exceptions.Timeout,),
+                       connection_errors=(requests.exceptions.ConnectionError,),
+                       request_errors=(requests.exceptions.RequestException,)):
+        """(error, None) for an exception raised while fetching weather.
+
+        The *_errors tuples are the transport's exception classes for each
+        kind of failure; the defaults are those of requests.
+        """
+        if isinstance(error, CircuitOpenError):
+            logger.error(f"Weather API circuit open, skipping upstream call for {city}")
+            _count_error('circuit_open')
+            return {
+                'error': 'Weather service temporarily unavailable',
+                'retry_after': int(error.retry_after) + 1
+            }, None
+        if isinstance(error, UpstreamBusyError):
+            logger.warning(f"Too many upstream calls in flight, shedding request for {city}")
+            _count_error('busy')
+            return {'error': 'Weather service temporarily unavailable', 'retry_after': 1}, None
+        if isinstance(error, timeout_errors):
+            logger.error(f"Weather API request timed out for {city}")
+            _count_error('timeout')
+            return {'error': 'Weather API request timed out'}, None
+        if isinstance(error, connection_errors):
+            logger.error(f"Connection error for {city}")
+            _count_error('connection')
+            return {'error': 'Unable to connect to weather service'}, None
+        if isinstance(error, request_errors):
+            logger.error(f"Failed to fetch weather data for {city}: {str(error)}")
+            _count_error('request')
+            return {'error': 'Failed to fetch weather data', 'message': str(error)}, None
+        if isinstance(error, (KeyError, ValueError)):
+            logger.error(f"Invalid API response format for {city}: {error}")
+            _count_error('invalid_response')
+            return {'error': 'Invalid API response format', 'message': str(error)}, None
+        logger.error(f"Unexpected error fetching weather for {city}: {str(error)}")
+        _count_error('unexpected')
+        return {'error': 'Unexpected error occurred', 'message': str(error)}, None
+
+    def request(self, path, params):
+        """GET base_url/path with retries; raises CircuitOpenError or UpstreamBusyError when failing fast"""
+        url = self.url(path)
+        for attempt in range(self.max_retries + 1):
+            self.begin_attempt()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except Exception as e:
+                # Connection errors are retried; read timeouts are not, so a slow upstream costs one timeout
+                retryable = isinstance(e, requests.exceptions.ConnectionError)
+                delay = self.attempt_failed(attempt, retryable)
+                if delay is None:
+                    raise
+                self._sleep(delay)
+                continue
+            except BaseException:
+                self.attempt_abandoned()
+                raise
+            finally:
+                self.end_attempt()
+
+            delay = self.attempt_answered(attempt, response.status_code, response.headers.get('Retry-After'))
+            if delay is None:
+                return response
+            self._sleep(delay)
+
+    def get_current_weather(self, city, api_key):
+        """Fetch and normalize current weather; returns (weather_data, HTTP status or None)"""
+        params = {
+            'q': city.strip(),
+            'appid': api_key,
+            'units': 'metric'
+        }
+        return self._get_weather(city, params)
+
+    def get_current_weather_by_coords(self, lat, lon, api_key):
+        """Current weather at a latitude/longitude; returns (weather_data, HTTP status or None)"""
+        params = {'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric'}
+        return self._get_weather(f"{lat:.4f},{lon:.4f}", params)
+
+    def _get_weather(self, city, params):
+        try:
+            logger.info("Fetching weather data for %s", city)
+            t0 = now()
+            response = self.request('weather', params)
+            _FETCH_LATENCY.observe(now() - t0)
+            return self.weather_response(city, response.status_code, response.json)
+        except Exception as e:
+            return self.error_response(city, e)
+
+    def stats(self):
+        """Snapshot of client and circuit breaker counters"""
+        with self._stats_lock:
+            return {
+                'circuit_state': self.breaker.state,
+                'circuit_opened': self.breaker.times_opened,
+                'requests_sent': self.requests_sent,
+                'retries': self.retries,
+                'short_circuited': self.short_circuited,
+                'shed': self.shed,
+                'inflight': self.inflight,
+            }